@@ -0,0 +1,269 @@
+"""
+Answer Bundle - Precomputed LightRAG answers with a nearest-neighbour index
+
+A bundle is one JSON file holding answered queries, their embeddings and
+the version of the LightRAG storage they were computed from. lib/rag.js (and
+the query server's answer cache) look a visitor's question up in it by
+embedding similarity, so paraphrases of a precomputed question are answered
+without running LightRAG.
+
+The index is flat: unit query embeddings quantized to int8 and stored
+row-major in one base64 string, a quarter of the size of float32 vectors.
+An exact inner-product scan over the few hundred answers of a portfolio
+takes well under a millisecond and needs no index library on the
+JavaScript side.
+
+The storage version hashes the IDs of the processed documents in the
+working directory, so a bundle is recognised as stale after an ingestion or
+sync changes the graph.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from answer_cache import is_answered, normalize_query
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+
+DOC_STATUS_FILE = "kv_store_doc_status.json"
+
+# Task type GeminiEmbedding embeds with; query embeddings must match it
+GEMINI_TASK_TYPE = "RETRIEVAL_DOCUMENT"
+
+# Questions asked of every portfolio
+GENERAL_QUESTIONS = [
+    "What projects has this person worked on?",
+    "What is this person's work experience?",
+    "What are this person's technical skills?",
+    "What is this person's educational background?",
+    "What programming languages does this person use?",
+    "What is this person currently working on?",
+]
+
+# Questions per LightRAG entity type ({name}: entity name)
+QUESTION_TEMPLATES = {
+    "organization": ["What work was done at {name}?"],
+    "artifact": ["What is {name}?", "How was {name} built?"],
+    "method": ["What experience is there with {name}?"],
+    "concept": ["What experience is there with {name}?"],
+    "content": ["What is {name} about?"],
+    "event": ["What happened at {name}?"],
+    "location": ["What was done in {name}?"],
+    "person": ["Who is {name}?"],
+}
+DEFAULT_TEMPLATES = ["What is {name}?"]
+
+
+def storage_version(working_dir: str) -> Optional[str]:
+    """
+    Version of a working directory's knowledge graph
+
+    Hash of the sorted IDs of its processed documents, read from LightRAG's
+    JSON document status store (lib/rag.js computes the same hash).
+
+    Returns:
+        16 hex digits, or None if the working directory has no document status
+    """
+    path = os.path.join(working_dir, DOC_STATUS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        statuses = json.load(f)
+    processed = sorted(
+        doc_id for doc_id, record in statuses.items()
+        if isinstance(record, dict) and record.get("status") == "processed"
+    )
+    return hashlib.sha256("\n".join(processed).encode("utf-8")).hexdigest()[:16]
+
+
+def quantize(vectors: np.ndarray) -> str:
+    """Unit-normalize rows, quantize to int8 and encode as base64"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1)
+    quantized = np.clip(np.round(vectors * 127), -127, 127).astype(np.int8)
+    return base64.b64encode(quantized.tobytes()).decode("ascii")
+
+
+def dequantize(encoded: str, dim: int) -> np.ndarray:
+    """Inverse of quantize: unit float32 rows"""
+    vectors = np.frombuffer(base64.b64decode(encoded), dtype=np.int8).reshape(-1, dim)
+    vectors = vectors.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+async def generate_questions(rag: Any, max_entities: int = 50) -> List[str]:
+    """
+    Derive likely visitor questions from the most connected entities
+
+    Args:
+        rag: Initialized LightRAG instance
+        max_entities: Entities to write questions for, by node degree
+
+    Returns:
+        GENERAL_QUESTIONS followed by entity questions, without duplicates
+    """
+    graph = rag.chunk_entity_relation_graph
+    if hasattr(graph, "get_popular_labels"):
+        names = await graph.get_popular_labels(max_entities)
+    else:
+        degrees: Dict[str, int] = {}
+        for edge in await graph.get_all_edges():
+            for node in (edge["source"], edge["target"]):
+                degrees[node] = degrees.get(node, 0) + 1
+        names = sorted(degrees, key=lambda name: (-degrees[name], name))[:max_entities]
+
+    questions = list(GENERAL_QUESTIONS)
+    for name in names:
+        node = await graph.get_node(name) or {}
+        entity_type = str(node.get("entity_type", "")).strip().lower()
+        for template in QUESTION_TEMPLATES.get(entity_type, DEFAULT_TEMPLATES):
+            questions.append(template.format(name=name))
+
+    unique = list(dict.fromkeys(questions))
+    logger.info(f"Generated {len(unique)} questions from {len(names)} entities")
+    return unique
+
+
+async def build_answer_bundle(
+    rag: Any,
+    working_dir: str,
+    results: List[Dict[str, Any]],
+    embedding_config: Any,
+    threshold: float = 0.92,
+    batch_size: int = 64,
+) -> Dict[str, Any]:
+    """
+    Build an answer bundle from query results
+
+    Args:
+        rag: Initialized LightRAG instance (its embedding_func embeds the queries)
+        working_dir: LightRAG working directory the answers came from
+        results: Result dicts from query_lightrag
+        embedding_config: EmbeddingConfig of the working directory
+        threshold: Minimum cosine similarity for a lookup to match
+        batch_size: Queries per embedding call
+
+    Returns:
+        Bundle dict (see save_answer_bundle)
+    """
+    entries = []
+    seen = set()
+    for result in results:
+        key = (result.get("mode"), result.get("top_k"), normalize_query(result.get("query", "")))
+        if key in seen or not is_answered(result):
+            continue
+        seen.add(key)
+        entries.append({
+            "query": result["query"],
+            "normalized": key[2],
+            "mode": result["mode"],
+            "top_k": result["top_k"],
+            "result": result["result"],
+        })
+    skipped = len(results) - len(entries)
+    if skipped:
+        logger.info(f"Left {skipped} unanswered or duplicate queries out of the answer bundle")
+
+    vectors = []
+    normalized = [entry["normalized"] for entry in entries]
+    for start in range(0, len(normalized), batch_size):
+        embedded = await rag.embedding_func(normalized[start:start + batch_size])
+        vectors.append(np.atleast_2d(np.asarray(embedded, dtype=np.float32)))
+    dim = vectors[0].shape[1] if vectors else embedding_config.dim
+
+    return {
+        "format": BUNDLE_FORMAT,
+        "created": time.time(),
+        "storage_version": storage_version(working_dir),
+        "embedding": {
+            "backend": embedding_config.backend,
+            "model": embedding_config.model,
+            "dim": dim,
+            "task_type": GEMINI_TASK_TYPE if embedding_config.backend == "gemini" else None,
+        },
+        "threshold": threshold,
+        "entries": entries,
+        "vectors": quantize(np.concatenate(vectors)) if vectors else "",
+    }
+
+
+def save_answer_bundle(path: str, bundle: Dict[str, Any]):
+    """Write a bundle atomically, without indentation"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    logger.info(f"Answer bundle with {len(bundle['entries'])} answers written to {path}")
+
+
+class AnswerBundle:
+    """Loaded answer bundle with exact and nearest-neighbour lookup"""
+
+    def __init__(self, bundle: Dict[str, Any]):
+        if bundle.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported answer bundle format {bundle.get('format')}")
+        self.bundle = bundle
+        self.entries: List[Dict[str, Any]] = bundle["entries"]
+        self.threshold: float = bundle["threshold"]
+        self.storage_version: Optional[str] = bundle["storage_version"]
+        dim = bundle["embedding"]["dim"]
+        self.vectors = dequantize(bundle["vectors"], dim) if self.entries else np.zeros((0, dim), np.float32)
+        self._exact = {
+            (entry["mode"], entry["top_k"], entry["normalized"]): i for i, entry in enumerate(self.entries)
+        }
+        # (mode, top_k) -> (entry indices, their vectors): only these are candidates
+        rows: Dict[Tuple[str, int], List[int]] = {}
+        for i, entry in enumerate(self.entries):
+            rows.setdefault((entry["mode"], entry["top_k"]), []).append(i)
+        self._partitions = {
+            key: (np.array(indices), self.vectors[indices]) for key, indices in rows.items()
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "AnswerBundle":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def is_current(self, working_dir: str) -> bool:
+        """Whether the bundle was computed from the working directory's current graph"""
+        return self.storage_version == storage_version(working_dir)
+
+    def lookup(
+        self, query: str, vector: Optional[np.ndarray], mode: str, top_k: int
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Nearest precomputed answer to a query
+
+        Args:
+            query: Query string
+            vector: Query embedding (None: exact matches only)
+            mode: Query mode
+            top_k: Number of results of the query
+
+        Returns:
+            (matching entry or None, its cosine similarity)
+        """
+        index = self._exact.get((mode, top_k, normalize_query(query)))
+        if index is not None:
+            return self.entries[index], 1.0
+        if vector is None or (mode, top_k) not in self._partitions:
+            return None, 0.0
+        indices, vectors = self._partitions[(mode, top_k)]
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        similarities = vectors @ (vector / (np.linalg.norm(vector) or 1.0))
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None, 0.0
+        return self.entries[indices[best]], float(similarities[best])
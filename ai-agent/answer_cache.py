@@ -0,0 +1,310 @@
+"""
+Answer Cache - Semantic cache of LightRAG answers
+
+Chat traffic is mostly the same few questions in different words ("what
+projects has he built?", "show me his projects"). Each one otherwise costs
+a full LightRAG retrieval and a Gemini generation. The cache embeds the
+normalized query and returns an earlier answer whose query is at least
+`threshold` cosine-similar, searched among the answers of the same mode and
+top_k. Identical normalized queries hit without an embedding call, and
+identical queries arriving while the first one is still being answered wait
+for its answer (see coalesce).
+
+Entries are evicted least-recently-used beyond max_entries and expire after
+ttl_seconds. The whole cache is dropped when the working directory's
+document status store changes, i.e. after any ingestion or sync.
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Written by every LightRAG insertion and deletion, whatever the storage backends
+FINGERPRINT_FILES = ("kv_store_doc_status.json", "storage_config.json")
+
+
+def normalize_query(query: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a query"""
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def is_answered(result: Dict[str, Any]) -> bool:
+    """Whether a query result is worth reusing (not an error or LightRAG's no-context reply)"""
+    if result.get("status") != "success" or not str(result.get("result", "")).strip():
+        return False
+    try:
+        from lightrag.prompt import PROMPTS
+
+        return result["result"].strip() != PROMPTS["fail_response"].strip()
+    except (ImportError, KeyError):
+        return True
+
+
+def storage_fingerprint(working_dir: str) -> Tuple:
+    """Modification time and size of the files that change when the graph does"""
+    fingerprint = []
+    for name in FINGERPRINT_FILES:
+        try:
+            stat = os.stat(os.path.join(working_dir, name))
+            fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            fingerprint.append((name, None, None))
+    return tuple(fingerprint)
+
+
+@dataclass
+class CacheEntry:
+    query: str
+    key: Tuple[str, int]
+    normalized: str
+    vector: np.ndarray
+    result: Dict[str, Any]
+    created: float
+
+
+class CacheLookup(NamedTuple):
+    """Outcome of SemanticAnswerCache.lookup"""
+
+    # Cached result dict, or None on a miss
+    result: Optional[Dict[str, Any]]
+    # Cosine similarity of the matched query (1.0 for an identical one)
+    similarity: float
+    # Unit query embedding, passed back to store() after a miss
+    vector: Optional[np.ndarray]
+
+
+class SemanticAnswerCache:
+    """In-memory cache of query results, looked up by query similarity"""
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Awaitable[Any]],
+        working_dir: Optional[str] = None,
+        threshold: float = 0.92,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 24 * 3600,
+    ):
+        """
+        Args:
+            embed: Async function mapping a list of texts to embeddings, e.g.
+                LightRAG's embedding_func
+            working_dir: LightRAG working directory to watch for changes
+                (None: never invalidated)
+            threshold: Minimum cosine similarity of a hit
+            max_entries: Entries kept before least-recently-used ones are evicted
+            ttl_seconds: Entry lifetime (None: no expiry)
+        """
+        self.embed = embed
+        self.working_dir = working_dir
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Entry ID -> entry, least recently used first
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        # (mode, top_k, normalized query) -> entry ID
+        self._exact: Dict[Tuple[str, int, str], int] = {}
+        # (mode, top_k) -> (entry IDs, stacked unit vectors), rebuilt after changes
+        self._index: Dict[Tuple[str, int], Tuple[List[int], np.ndarray]] = {}
+        self._next_id = 0
+        self._fingerprint = storage_fingerprint(working_dir) if working_dir else None
+        # Queries being answered, by "mode:top_k:normalized query"
+        self._flights = SingleFlight()
+        self.stats = {
+            "hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._exact.clear()
+        self._index.clear()
+
+    def _check_storage(self):
+        """Drop everything if the knowledge graph changed since the answers were cached"""
+        if self.working_dir is None:
+            return
+        fingerprint = storage_fingerprint(self.working_dir)
+        if fingerprint != self._fingerprint:
+            if self._entries:
+                logger.info(f"Knowledge graph changed; dropping {len(self._entries)} cached answers")
+                self.stats["invalidations"] += 1
+            self.clear()
+            self._fingerprint = fingerprint
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._exact.pop((*entry.key, entry.normalized), None)
+        self._index.pop(entry.key, None)
+
+    def _expire(self):
+        if self.ttl_seconds is None:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for entry_id in [i for i, entry in self._entries.items() if entry.created < cutoff]:
+            self._remove(entry_id)
+
+    def _partition(self, key: Tuple[str, int]) -> Tuple[List[int], Optional[np.ndarray]]:
+        if key not in self._index:
+            ids = [i for i, entry in self._entries.items() if entry.key == key]
+            if not ids:
+                return [], None
+            self._index[key] = (ids, np.stack([self._entries[i].vector for i in ids]))
+        return self._index[key]
+
+    def _hit(self, entry_id: int, similarity: float) -> CacheLookup:
+        self._entries.move_to_end(entry_id)
+        entry = self._entries[entry_id]
+        self.stats["hits"] += 1
+        if similarity < 1.0:
+            self.stats["semantic_hits"] += 1
+        return CacheLookup(entry.result, similarity, entry.vector)
+
+    async def lookup(self, query: str, mode: str, top_k: int) -> CacheLookup:
+        """
+        Find a cached result for a query
+
+        Args:
+            query: Query string
+            mode: Query mode
+            top_k: Number of results of the query
+
+        Returns:
+            CacheLookup; on a miss, result is None and vector holds the query
+            embedding for store() (None if embedding failed)
+        """
+        self._check_storage()
+        self._expire()
+        key = (mode, top_k)
+        normalized = normalize_query(query)
+
+        entry_id = self._exact.get((*key, normalized))
+        if entry_id is not None:
+            return self._hit(entry_id, 1.0)
+
+        try:
+            vector = np.asarray(await self.embed([normalized]), dtype=np.float32).reshape(-1)
+        except Exception as e:
+            logger.warning(f"Answer cache could not embed the query: {e}")
+            self.stats["misses"] += 1
+            return CacheLookup(None, 0.0, None)
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm > 0 else vector
+
+        ids, matrix = self._partition(key)
+        if matrix is not None:
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                return self._hit(ids[best], float(similarities[best]))
+
+        self.stats["misses"] += 1
+        return CacheLookup(None, 0.0, vector)
+
+    def store(
+        self,
+        query: str,
+        mode: str,
+        top_k: int,
+        result: Dict[str, Any],
+        vector: Optional[np.ndarray],
+    ):
+        """
+        Cache a query result, unless it is an error or the no-context reply
+
+        Args:
+            query: Query string
+            mode: Query mode
+            top_k: Number of results of the query
+            result: Result dict from query_lightrag
+            vector: Query embedding from the lookup that missed
+        """
+        # A "no context" answer would be replayed after the graph learns the answer
+        if vector is None or not is_answered(result):
+            return
+        key = (mode, top_k)
+        normalized = normalize_query(query)
+        existing = self._exact.get((*key, normalized))
+        if existing is not None:
+            self._remove(existing)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = CacheEntry(query, key, normalized, vector, dict(result), time.time())
+        self._exact[(*key, normalized)] = entry_id
+        self._index.pop(key, None)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    async def coalesce(
+        self,
+        query: str,
+        mode: str,
+        top_k: int,
+        answer: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Answer a query once for all identical queries in flight
+
+        A query's answer is only stored once it returns, so concurrent
+        queries with the same normalized text would all miss and all query
+        LightRAG. The first one runs answer(); the others wait for its result.
+
+        Args:
+            query: Query string
+            mode: Query mode
+            top_k: Number of results of the query
+            answer: Zero-argument coroutine function that looks the query up,
+                answers it on a miss and stores the answer
+
+        Returns:
+            (result, whether it was shared from an identical query in flight)
+        """
+        key = f"{mode}:{top_k}:{normalize_query(query)}"
+        future = self._flights.join(key)
+        if future is None:
+            return await self._flights.do(key, answer), False
+
+        # Shield so one waiter's cancellation doesn't cancel the shared result
+        result = await asyncio.shield(future)
+        self.stats["coalesced"] += 1
+        if not is_answered(result):
+            return {**result, "query": query}, True
+        self.stats["hits"] += 1
+        return {
+            **result,
+            "query": query,
+            "cached_query": result.get("cached_query", result["query"]),
+            "similarity": result.get("similarity", 1.0),
+        }, True
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters and size, for logs and health checks"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
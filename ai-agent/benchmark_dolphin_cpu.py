@@ -0,0 +1,144 @@
+"""
+benchmark_dolphin_cpu.py - Compare Dolphin CPU inference modes on sample pages
+
+Runs OCR on a handful of rendered PDF pages with the float32 baseline and each
+optimized CPU mode (int8 dynamic quantization, bfloat16, optional
+torch.compile), then reports seconds per page and text similarity against the
+float32 output.
+"""
+
+import time
+import difflib
+import logging
+import argparse
+from typing import Dict, List, Optional
+
+from dolphin_parser import (
+    DolphinParser,
+    OCR_PROMPT,
+    cpu_supports_bf16,
+    render_pdf_page,
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def load_sample_pages(pdf_paths: List[str], max_pages: int) -> List:
+    """Render up to max_pages pages from each PDF"""
+    import pymupdf
+
+    pages = []
+    for pdf_path in pdf_paths:
+        with pymupdf.open(pdf_path) as doc:
+            page_count = min(len(doc), max_pages)
+        for page_num in range(page_count):
+            pages.append(render_pdf_page(pdf_path, page_num))
+    return pages
+
+
+def run_mode(
+    model_path: str,
+    pages: List,
+    cpu_optimize: Optional[str],
+    compile_model: bool,
+    num_threads: Optional[int],
+) -> Dict:
+    """OCR all pages with one parser configuration"""
+    parser = DolphinParser(
+        model_path=model_path,
+        cpu_optimize=cpu_optimize,
+        compile_model=compile_model,
+        num_threads=num_threads,
+    )
+
+    # Warm-up page so one-time costs (graph compilation, allocator) are excluded
+    parser.chat(OCR_PROMPT, pages[0])
+
+    outputs = []
+    start = time.perf_counter()
+    for page in pages:
+        outputs.append(parser.chat(OCR_PROMPT, page))
+    elapsed = time.perf_counter() - start
+
+    return {"outputs": outputs, "seconds_per_page": elapsed / len(pages)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare accuracy and speed of Dolphin CPU inference modes",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "pdfs",
+        nargs="+",
+        help="PDF files to sample pages from",
+    )
+    parser.add_argument(
+        "--model_path",
+        default="./hf_model",
+        help="Path to the Dolphin model directory",
+    )
+    parser.add_argument(
+        "--max_pages",
+        type=int,
+        default=2,
+        help="Maximum pages to sample from each PDF",
+    )
+    parser.add_argument(
+        "--num_threads",
+        type=int,
+        help="torch intra-op threads (default: torch's own default)",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Also benchmark each mode with torch.compile",
+    )
+
+    args = parser.parse_args()
+
+    pages = load_sample_pages(args.pdfs, args.max_pages)
+    if not pages:
+        logger.error("No pages to benchmark")
+        return
+
+    # "none" keeps the baseline float32 even when DOLPHIN_CPU_OPTIMIZE is set
+    modes = [("fp32", "none"), ("int8", "int8")]
+    if cpu_supports_bf16():
+        modes.append(("bf16", "bf16"))
+    else:
+        logger.info("CPU has no native bf16 support, skipping bf16 mode")
+
+    configs = [(name, mode, False) for name, mode in modes]
+    if args.compile:
+        configs += [(f"{name}+compile", mode, True) for name, mode in modes]
+
+    results = {}
+    for name, mode, compile_model in configs:
+        logger.info(f"Benchmarking {name} on {len(pages)} pages...")
+        results[name] = run_mode(
+            args.model_path, pages, mode, compile_model, args.num_threads
+        )
+
+    baseline = results["fp32"]
+    print("\n" + "=" * 60)
+    print(f"{'mode':<16}{'s/page':>10}{'speedup':>10}{'similarity':>14}")
+    print("=" * 60)
+    for name, result in results.items():
+        similarity = sum(
+            difflib.SequenceMatcher(None, ref, out).ratio()
+            for ref, out in zip(baseline["outputs"], result["outputs"])
+        ) / len(pages)
+        speedup = baseline["seconds_per_page"] / result["seconds_per_page"]
+        print(
+            f"{name:<16}{result['seconds_per_page']:>10.2f}"
+            f"{speedup:>9.2f}x{similarity:>14.3f}"
+        )
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+benchmark_embedding_reduction.py - Retrieval-quality cost of smaller embeddings
+
+Embeds the chunks of the document corpus once at full size, then compares
+each reduced variant against it: nearest-neighbour recall@k (how many of a
+chunk's full-size neighbours it still finds) and bytes per stored vector.
+
+- local: sentence-transformers embeddings reduced with PCA (--pca_dim in
+  ingest_portfolio_rag.py), compared with L2 distance like the FAISS index
+- gemini: text-embedding-004 embeddings truncated to fewer dimensions
+  (Matryoshka, --embedding_dim in ingest_lightrag.py) and PCA-reduced, compared
+  with cosine similarity like LightRAG's vector store
+"""
+
+import asyncio
+import logging
+import argparse
+from typing import Dict, List
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from embedding_reduction import PCAReducer, neighbor_recall
+from ingest_portfolio_rag import iter_document_chunks
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def load_chunk_texts(source_dir: str) -> List[str]:
+    """Chunk the corpus the same way both ingestion pipelines do"""
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return [chunk["text"] for chunk in iter_document_chunks(source_dir, text_splitter)]
+
+
+def embed_full(texts: List[str], backend: str, model: str) -> np.ndarray:
+    """Full-size embeddings of texts"""
+    if backend == "local":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model).encode(texts).astype(np.float32)
+
+    from gemini_llm import gemini_embedding_async, close_gemini_clients
+
+    async def embed():
+        try:
+            return await gemini_embedding_async(texts, model_name=model)
+        finally:
+            await close_gemini_clients()
+
+    return asyncio.run(embed())
+
+
+def evaluate(full: np.ndarray, dims: List[int], backend: str, k: int) -> List[Dict]:
+    """Recall@k and storage size of each reduction of the full embeddings"""
+    metric = "l2" if backend == "local" else "cosine"
+    full_dim = full.shape[1]
+    rows = [{"method": "full", "dim": full_dim, "recall": 1.0}]
+
+    for dim in dims:
+        if dim >= full_dim:
+            continue
+        if backend == "gemini":
+            # A truncated Matryoshka embedding equals the full one's leading dimensions
+            truncated = full[:, :dim]
+            rows.append({
+                "method": "matryoshka",
+                "dim": dim,
+                "recall": neighbor_recall(full, truncated, k=k, metric=metric),
+            })
+        reducer = PCAReducer.fit(full, dim)
+        rows.append({
+            "method": "pca",
+            "dim": reducer.output_dim,
+            "recall": neighbor_recall(full, reducer.transform(full), k=k, metric=metric),
+            "explained_variance": reducer.explained_variance,
+        })
+
+    for row in rows:
+        row["bytes_per_vector"] = row["dim"] * 4
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the retrieval-quality impact of PCA / Matryoshka embedding reduction",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--source_dir",
+        default="./data/documents",
+        help="Local directory containing documents",
+    )
+    parser.add_argument(
+        "--backend",
+        default="local",
+        choices=["local", "gemini"],
+        help="Embedding backend",
+    )
+    parser.add_argument(
+        "--model",
+        help="Embedding model (default: sentence-transformers/all-MiniLM-L6-v2 "
+        "for local, models/text-embedding-004 for gemini)",
+    )
+    parser.add_argument(
+        "--dims",
+        type=int,
+        nargs="+",
+        default=[64, 128, 192, 256, 384, 512],
+        help="Reduced dimensions to evaluate (sizes at or above the full size are skipped)",
+    )
+    parser.add_argument(
+        "--k",
+        type=int,
+        default=10,
+        help="Neighbours per query for recall@k",
+    )
+
+    args = parser.parse_args()
+
+    model = args.model or {
+        "local": "sentence-transformers/all-MiniLM-L6-v2",
+        "gemini": "models/text-embedding-004",
+    }[args.backend]
+
+    texts = load_chunk_texts(args.source_dir)
+    if len(texts) <= args.k:
+        logger.error(f"Need more than {args.k} chunks to measure recall@{args.k}, found {len(texts)}")
+        return
+    logger.info(f"Embedding {len(texts)} chunks with {model}...")
+    full = embed_full(texts, args.backend, model)
+
+    rows = evaluate(full, sorted(args.dims), args.backend, args.k)
+
+    print("\n" + "=" * 64)
+    print(f"{'method':<12}{'dim':>6}{'bytes/vec':>11}{f'recall@{args.k}':>12}{'variance':>12}")
+    print("=" * 64)
+    for row in rows:
+        variance = row.get("explained_variance")
+        print(
+            f"{row['method']:<12}{row['dim']:>6}{row['bytes_per_vector']:>11}"
+            f"{row['recall']:>12.3f}{'' if variance is None else f'{variance:.3f}':>12}"
+        )
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
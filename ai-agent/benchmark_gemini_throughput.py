@@ -0,0 +1,295 @@
+"""
+benchmark_gemini_throughput.py - Ingest and query throughput versus concurrency
+
+Runs LightRAG ingestion and a batch of queries against the offline fake Gemini
+backend (fake_gemini.py) at several concurrency levels, and reports documents
+per second, queries per second, query latency percentiles and how many
+requests the fake server throttled. No API key or quota is used.
+
+Each level runs in its own process: LightRAG keeps storage data in
+process-global shared dicts keyed by namespace rather than working
+directory, so a second level in the same process would find the first
+level's documents already inserted.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from gemini_llm import configure_backend, get_client, finalize_lightrag
+from ingest_lightrag import list_document_sources, run_lightrag_ingestion
+from query_lightrag import initialize_lightrag, query_lightrag
+from usage_tracker import percentile
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+_TOPICS = [
+    "Python", "TypeScript", "LightRAG", "Gemini", "Dolphin", "PyTorch",
+    "Next.js", "FAISS", "PostgreSQL", "Kubernetes", "Docker", "React",
+]
+
+_QUERIES = [
+    "What programming languages does Kyle use?",
+    "Which projects use LightRAG?",
+    "Describe the document parsing pipeline.",
+    "What machine learning frameworks appear in the portfolio?",
+    "How is the frontend built?",
+    "Which databases has Kyle worked with?",
+]
+
+
+def write_synthetic_corpus(directory: str, num_docs: int, seed: int = 0):
+    """Write num_docs small markdown documents mentioning a few topics each"""
+    rng = random.Random(seed)
+    for i in range(num_docs):
+        topics = rng.sample(_TOPICS, 4)
+        lines = [f"# Project {i}", ""]
+        for a, b in zip(topics, topics[1:]):
+            lines.append(
+                f"Project {i} combines {a} with {b}. The {a} service feeds "
+                f"results to {b}, and Kyle maintained both parts."
+            )
+        with open(os.path.join(directory, f"project_{i}.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines * 3))
+
+
+def document_statuses(working_dir: str) -> Dict[str, int]:
+    """Number of documents per status in LightRAG's JSON document status store"""
+    with open(os.path.join(working_dir, "kv_store_doc_status.json"), "r", encoding="utf-8") as f:
+        records = json.load(f)
+    return dict(Counter(record.get("status") for record in records.values() if isinstance(record, dict)))
+
+
+async def run_queries(working_dir: str, queries: List[str], concurrency: int, mode: str) -> Dict:
+    """Run queries with at most `concurrency` in flight, timing each one"""
+    rag = await initialize_lightrag(working_dir, llm_max_async=concurrency)
+    if rag is None:
+        raise RuntimeError("Failed to initialize LightRAG")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed_query(query: str):
+        async with semaphore:
+            start = time.perf_counter()
+            await query_lightrag(rag, query, mode)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(timed_query(query) for query in queries))
+    finally:
+        await finalize_lightrag(rag)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "queries_per_second": len(queries) / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+    }
+
+
+async def run_level(
+    source_dir: str,
+    num_docs: int,
+    concurrency: int,
+    num_queries: int,
+    mode: str,
+    fake_settings: Dict,
+) -> Dict:
+    """Ingest and query once at one concurrency level, in a fresh working dir"""
+    configure_backend("fake", **fake_settings)
+    client = get_client()
+
+    with tempfile.TemporaryDirectory() as working_dir:
+        start = time.perf_counter()
+        result = await run_lightrag_ingestion(
+            source_dir=source_dir,
+            output_dir=working_dir,
+            parse_cache_dir=None,
+            llm_cache_dir=None,
+            llm_max_async=concurrency,
+        )
+        ingest_seconds = time.perf_counter() - start
+        if result.get("status") != "success":
+            raise RuntimeError(f"Ingestion failed: {result.get('message')}")
+        # A level that skipped or lost documents would report inflated throughput
+        if result["documents"] != num_docs or result["failed_documents"]:
+            raise RuntimeError(
+                f"Ingested {result['documents'] - result['failed_documents']} of {num_docs} documents"
+            )
+        # LightRAG records documents it already knew as failed "dup-" entries
+        statuses = document_statuses(working_dir)
+        if statuses != {"processed": num_docs}:
+            raise RuntimeError(f"Expected {num_docs} processed documents, LightRAG has {statuses}")
+
+        # The client is recreated after finalize; keep ingestion counters
+        ingest_requests, ingest_errors = client.requests, client.errors
+        client = get_client()
+
+        queries = [_QUERIES[i % len(_QUERIES)] + f" ({i})" for i in range(num_queries)]
+        query_stats = await run_queries(working_dir, queries, concurrency, mode)
+
+    return {
+        "concurrency": concurrency,
+        "docs_per_second": num_docs / ingest_seconds,
+        "ingest_seconds": ingest_seconds,
+        "requests": ingest_requests + client.requests,
+        "throttled": ingest_errors + client.errors,
+        **query_stats,
+    }
+
+
+def _run_level_sync(*args) -> Dict:
+    """Process entry point: run_level in a fresh event loop"""
+    return asyncio.run(run_level(*args))
+
+
+def run_benchmark(
+    concurrency_levels: List[int],
+    source_dir: Optional[str],
+    num_docs: int,
+    num_queries: int,
+    mode: str,
+    fake_settings: Dict,
+) -> List[Dict]:
+    with tempfile.TemporaryDirectory() as synthetic_dir:
+        if source_dir is None:
+            write_synthetic_corpus(synthetic_dir, num_docs, fake_settings.get("seed", 0))
+            source_dir = synthetic_dir
+        else:
+            num_docs = len(list_document_sources(source_dir))
+
+        results = []
+        for concurrency in concurrency_levels:
+            print(f"Benchmarking concurrency {concurrency}...", flush=True)
+            # A fresh process per level, so no LightRAG state carries over
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                results.append(
+                    executor.submit(
+                        _run_level_sync, source_dir, num_docs, concurrency, num_queries, mode, fake_settings
+                    ).result()
+                )
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure LightRAG ingest/query throughput versus concurrency on the fake Gemini backend",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16],
+        help="Concurrency levels to benchmark",
+    )
+    parser.add_argument(
+        "--source_dir",
+        help="Documents to ingest (default: a generated synthetic corpus)",
+    )
+    parser.add_argument(
+        "--num_docs",
+        type=int,
+        default=20,
+        help="Number of synthetic documents to generate",
+    )
+    parser.add_argument(
+        "--num_queries",
+        type=int,
+        default=24,
+        help="Number of queries to run per level",
+    )
+    parser.add_argument(
+        "--mode",
+        default="hybrid",
+        choices=["local", "global", "hybrid", "naive"],
+        help="Query mode",
+    )
+    parser.add_argument(
+        "--llm_latency_ms",
+        type=float,
+        default=800,
+        help="Median latency of a fake generation request",
+    )
+    parser.add_argument(
+        "--embedding_latency_ms",
+        type=float,
+        default=150,
+        help="Median latency of a fake embedding request",
+    )
+    parser.add_argument(
+        "--latency_sigma",
+        type=float,
+        default=0.5,
+        help="Log-normal spread of fake latencies (0: constant)",
+    )
+    parser.add_argument(
+        "--error_rate",
+        type=float,
+        default=0.0,
+        help="Fraction of fake requests failing with a retryable 429",
+    )
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        help="Requests the fake server handles at once before returning 429 (default: unlimited)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for fake latencies, errors and the synthetic corpus",
+    )
+
+    args = parser.parse_args()
+
+    fake_settings = {
+        "llm_latency_ms": args.llm_latency_ms,
+        "embedding_latency_ms": args.embedding_latency_ms,
+        "latency_sigma": args.latency_sigma,
+        "error_rate": args.error_rate,
+        "capacity": args.capacity,
+        "seed": args.seed,
+    }
+    results = run_benchmark(
+        args.concurrency,
+        args.source_dir,
+        args.num_docs,
+        args.num_queries,
+        args.mode,
+        fake_settings,
+    )
+
+    print("\n" + "=" * 72)
+    print(
+        f"{'concurrency':>11}{'docs/s':>10}{'ingest s':>10}{'queries/s':>11}"
+        f"{'p50 s':>8}{'p95 s':>8}{'throttled':>11}"
+    )
+    print("=" * 72)
+    for r in results:
+        print(
+            f"{r['concurrency']:>11}{r['docs_per_second']:>10.2f}{r['ingest_seconds']:>10.1f}"
+            f"{r['queries_per_second']:>11.2f}{r['p50']:>8.2f}{r['p95']:>8.2f}"
+            f"{r['throttled']:>6}/{r['requests']:<4}"
+        )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
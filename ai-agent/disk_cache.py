@@ -0,0 +1,133 @@
+"""
+Disk Cache - Compressed on-disk key/value cache with size-based eviction
+
+Values are JSON-serializable objects stored as one gzip-compressed file per
+key. When the total size of the cache directory exceeds its limit, the least
+recently used entries are evicted (reads refresh an entry's mtime). Entries
+can optionally expire a fixed time after they were written. A cache can be
+shared by threads, e.g. the parser threads of LightRAG ingestion.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """Compressed JSON cache stored in a directory, bounded by total size"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_size_mb: float = 512,
+        ttl_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory to store cache entries in (created if missing)
+            max_size_mb: Maximum total size of the cache directory in megabytes
+            ttl_seconds: Expire entries this long after they were written (None: never)
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+        # Guards the size bookkeeping and eviction across threads
+        self._lock = threading.RLock()
+        self._size_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file()
+        )
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json.gz")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None on a miss, expired or unreadable entry
+        """
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            created_at, value = entry["created_at"], entry["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+        if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        os.utime(path)
+        return value
+
+    def set(self, key: str, value: Any):
+        """
+        Store a value, evicting least recently used entries if over the size limit
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        path = self._path(key)
+        # Per-thread temp file: two threads may write the same key
+        tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), "value": value}, f, ensure_ascii=False)
+            with self._lock:
+                if os.path.exists(path):
+                    self._size_bytes -= os.path.getsize(path)
+                os.replace(tmp_path, path)
+                self._size_bytes += os.path.getsize(path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            self._remove(tmp_path)
+            return
+
+        with self._lock:
+            if self._size_bytes > self.max_size_bytes:
+                self._evict()
+
+    def _remove(self, path: str):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                if not path.endswith(".tmp"):
+                    self._size_bytes -= size
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits its size limit"""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        evicted = 0
+        for entry in entries:
+            if self._size_bytes <= self.max_size_bytes:
+                break
+            self._remove(entry.path)
+            evicted += 1
+        logger.info(f"Evicted {evicted} entries from cache {self.cache_dir}")
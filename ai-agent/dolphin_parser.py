@@ -6,8 +6,15 @@ in the RAG ingestion pipeline. Self-contained without requiring Dolphin repo.
 """
 
 import io
+import os
+import re
 import logging
-from typing import List, Optional
+import functools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +30,44 @@ except ImportError as e:
     logger.warning(f"Dolphin dependencies not available: {e}. PDF parsing will use fallback.")
 
 
+# CPU inference modes for DolphinParser(cpu_optimize=...)
+CPU_OPTIMIZE_MODES = ("none", "auto", "int8", "bf16")
+
+
+def cpu_supports_bf16() -> bool:
+    """Check whether the CPU has native bfloat16 support (AVX512-BF16 / AMX)"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+# Prompt used when a page has no text layer and must be OCR'd
+OCR_PROMPT = "Extract all text from this document image in reading order. Output only the text content, not layout coordinates."
+
+# Page parsing modes: "page" OCRs the whole page with OCR_PROMPT; "element"
+# runs Dolphin's layout analysis first, then decodes each element crop
+PARSE_MODES = ("page", "element")
+
+# Stage 1 prompt: predicts element boxes and labels in reading order
+LAYOUT_PROMPT = "Parse the reading order of this document."
+
+# Stage 2 prompts, keyed by layout label ("text" covers every other label)
+ELEMENT_PROMPTS = {
+    "tab": "Parse the table in the image.",
+    "equ": "Read formula in the image.",
+    "text": "Read text in the image.",
+}
+
+# Layout labels with no text to decode
+SKIPPED_ELEMENT_LABELS = ("fig",)
+
+# Layout entries look like "[x1,y1,x2,y2] label", with normalized coordinates
+_LAYOUT_ENTRY_RE = re.compile(
+    r"\[(\d*\.?\d+),\s*(\d*\.?\d+),\s*(\d*\.?\d+),\s*(\d*\.?\d+)\]\s*(\w+)"
+)
+
+
 def convert_pdf_to_images(pdf_path: str, target_size: int = 896) -> List[Image.Image]:
     """Convert PDF pages to images
 
@@ -62,14 +107,160 @@ def convert_pdf_to_images(pdf_path: str, target_size: int = 896) -> List[Image.I
         return []
 
 
+def render_pdf_page(pdf_path: str, page_num: int, target_size: int = 896) -> Image.Image:
+    """Render a single PDF page to an image
+
+    Args:
+        pdf_path: Path to PDF file
+        page_num: Zero-based page index
+        target_size: Target size for the longest dimension
+
+    Returns:
+        PIL Image of the page
+    """
+    doc = pymupdf.open(pdf_path)
+    try:
+        page = doc[page_num]
+        rect = page.rect
+        scale = target_size / max(rect.width, rect.height)
+        pix = page.get_pixmap(matrix=pymupdf.Matrix(scale, scale))
+        return Image.open(io.BytesIO(pix.tobytes("png")))
+    finally:
+        doc.close()
+
+
+def iter_text_layer(pdf_path: str) -> Iterator[Optional[str]]:
+    """Lazily extract the embedded text layer of each page with PyMuPDF
+
+    Args:
+        pdf_path: Path to PDF file
+
+    Yields:
+        One entry per page: the stripped page text, or None if the page has
+        no text layer and needs OCR
+    """
+    doc = pymupdf.open(pdf_path)
+    try:
+        for page in doc:
+            text = page.get_text()
+            yield text.strip() if text and text.strip() else None
+    finally:
+        doc.close()
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    """Return the number of pages in a PDF without extracting any content"""
+    with pymupdf.open(pdf_path) as doc:
+        return len(doc)
+
+
+def parse_layout_string(layout: str) -> List[Tuple[Tuple[float, float, float, float], str]]:
+    """Parse Dolphin's stage 1 layout output
+
+    Args:
+        layout: Model output for LAYOUT_PROMPT
+
+    Returns:
+        List of ((x1, y1, x2, y2), label) in reading order, with coordinates
+        normalized to the padded square page image
+    """
+    return [
+        ((float(x1), float(y1), float(x2), float(y2)), label)
+        for x1, y1, x2, y2, label in _LAYOUT_ENTRY_RE.findall(layout)
+    ]
+
+
+def pad_to_square(image: Image.Image) -> Image.Image:
+    """Pad an image with white to a square, as Dolphin's layout coordinates assume"""
+    width, height = image.size
+    size = max(width, height)
+    if width == height:
+        return image
+    padded = Image.new("RGB", (size, size), (255, 255, 255))
+    padded.paste(image.convert("RGB"), (0, 0))
+    return padded
+
+
+def format_page(page_num: int, text: str) -> str:
+    """Format page content with the `=== Page N ===` marker (page_num is zero-based)"""
+    return f"=== Page {page_num + 1} ===\n{text}"
+
+
+class OCRError(Exception):
+    """Dolphin failed to OCR one or more PDF pages"""
+
+
+def raise_for_failed_pages(pdf_path: str, failed_pages: List[int]):
+    """Raise OCRError naming the pages of a PDF whose OCR failed (zero-based page_nums), if any"""
+    if failed_pages:
+        pages = ", ".join(str(page_num + 1) for page_num in failed_pages)
+        raise OCRError(f"Dolphin OCR failed on page(s) {pages} of {pdf_path}")
+
+
+def iter_pdf_pages_with_ocr(
+    pdf_path: str, ocr_page: Callable[[str, int], Optional[str]]
+) -> Iterator[Tuple[int, str]]:
+    """Stream the pages of a PDF, calling ocr_page for pages without a text layer
+
+    Args:
+        pdf_path: Path to the PDF file
+        ocr_page: (pdf_path, page_num) -> page text or None; raises OCRError
+            on failure (e.g. DolphinParser.ocr_page)
+
+    Yields:
+        (page_num, text) for each page with content, in page order
+        (page_num is zero-based)
+
+    Raises:
+        OCRError: after the last page, if OCR failed on any page
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+
+    failed_pages = []
+    # Use PyMuPDF for direct text extraction (faster than Dolphin for simple PDFs)
+    for page_num, text in enumerate(iter_text_layer(pdf_path)):
+        if not text:
+            # If no text found, try with Dolphin (for scanned PDFs)
+            logger.warning(f"No text found on page {page_num + 1}, trying OCR with Dolphin...")
+            try:
+                text = ocr_page(pdf_path, page_num)
+            except OCRError:
+                failed_pages.append(page_num)
+                continue
+        if text:
+            yield page_num, text
+    raise_for_failed_pages(pdf_path, failed_pages)
+
+
 class DolphinParser:
     """Wrapper class for ByteDance Dolphin document parser"""
 
-    def __init__(self, model_path: str = "./hf_model"):
+    def __init__(
+        self,
+        model_path: str = "./hf_model",
+        cpu_optimize: Optional[str] = None,
+        compile_model: Optional[bool] = None,
+        num_threads: Optional[int] = None,
+        parse_mode: Optional[str] = None,
+        max_batch_size: int = 16,
+    ):
         """Initialize Dolphin parser
 
         Args:
             model_path: Path to the Dolphin model directory
+            cpu_optimize: CPU inference mode: "int8" (dynamic quantization of the
+                decoder's linear layers), "bf16" (bfloat16 weights), or "auto"
+                (bf16 if the CPU supports it natively, else int8). "none" runs
+                plain float32 whatever the environment says (default:
+                DOLPHIN_CPU_OPTIMIZE env var, else float32)
+            compile_model: Compile the vision encoder with torch.compile
+                (default: DOLPHIN_COMPILE env var)
+            num_threads: torch intra-op threads (default: torch's own default)
+            parse_mode: "page" (one whole-page OCR prompt) or "element" (layout
+                analysis, then batched decoding of each element)
+                (default: DOLPHIN_PARSE_MODE env var, else "page")
+            max_batch_size: Maximum element crops decoded in one batch
         """
         if not DOLPHIN_AVAILABLE:
             raise ImportError("Dolphin dependencies not available. Install requirements first.")
@@ -79,6 +270,22 @@ class DolphinParser:
         self.processor = None
         self.tokenizer = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        if cpu_optimize is None:
+            cpu_optimize = os.getenv("DOLPHIN_CPU_OPTIMIZE") or None
+        if cpu_optimize and cpu_optimize not in CPU_OPTIMIZE_MODES:
+            raise ValueError(f"cpu_optimize must be one of {CPU_OPTIMIZE_MODES}, got {cpu_optimize!r}")
+        self.cpu_optimize = None if cpu_optimize == "none" else cpu_optimize
+        if compile_model is None:
+            compile_model = os.getenv("DOLPHIN_COMPILE", "").lower() in ("1", "true", "yes")
+        self.compile_model = compile_model
+        self.dtype = torch.float16 if self.device == "cuda" else torch.float32
+        self.parse_mode = parse_mode or os.getenv("DOLPHIN_PARSE_MODE") or "page"
+        if self.parse_mode not in PARSE_MODES:
+            raise ValueError(f"parse_mode must be one of {PARSE_MODES}, got {self.parse_mode!r}")
+        self.max_batch_size = max_batch_size
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
 
         logger.info(f"Initializing Dolphin parser with device: {self.device}")
         self._load_model()
@@ -96,6 +303,14 @@ class DolphinParser:
                 self.model = self.model.half()
             else:
                 self.model = self.model.float()
+                if self.cpu_optimize:
+                    self._optimize_for_cpu()
+
+            if self.compile_model:
+                # The encoder runs once per image with a fixed input size, so it
+                # compiles to a single static graph; the decoder loop is left eager
+                self.model.encoder = torch.compile(self.model.encoder)
+                logger.info("Compiled Dolphin encoder with torch.compile")
 
             self.tokenizer = self.processor.tokenizer
             logger.info("Dolphin model loaded successfully")
@@ -103,6 +318,28 @@ class DolphinParser:
             logger.error(f"Error loading Dolphin model: {e}")
             raise
 
+    def _optimize_for_cpu(self):
+        """Apply the selected CPU inference mode to the loaded model
+
+        bf16 and int8 are alternatives: dynamically quantized linear layers
+        only accept float32 activations, so a bf16 model keeps full linear
+        layers and relies on native bf16 matmuls instead.
+        """
+        mode = self.cpu_optimize
+        if mode == "auto":
+            mode = "bf16" if cpu_supports_bf16() else "int8"
+
+        if mode == "bf16":
+            self.model = self.model.to(torch.bfloat16)
+            self.dtype = torch.bfloat16
+            logger.info("Running Dolphin in bfloat16 on CPU")
+        else:
+            # The autoregressive decoder dominates CPU time and is mostly linear layers
+            self.model.decoder = torch.ao.quantization.quantize_dynamic(
+                self.model.decoder, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("Applied dynamic int8 quantization to Dolphin decoder linear layers")
+
     def chat(self, prompt: str, image: Image.Image) -> str:
         """Process an image with a text prompt
 
@@ -113,15 +350,24 @@ class DolphinParser:
         Returns:
             Generated text from the model
         """
-        # Prepare image
-        inputs = self.processor(image, return_tensors="pt", padding=True)
+        return self.chat_batch(prompt, [image])[0]
 
-        if self.device == "cuda":
-            pixel_values = inputs.pixel_values.half().to(self.device)
-        else:
-            pixel_values = inputs.pixel_values.float().to(self.device)
+    def chat_batch(self, prompt: str, images: List[Image.Image]) -> List[str]:
+        """Process several images with the same text prompt in one generate call
+
+        Args:
+            prompt: Text prompt to guide the model
+            images: PIL Images to process
 
-        # Prepare prompt
+        Returns:
+            Generated text for each image, in input order
+        """
+        # Prepare images
+        inputs = self.processor(images, return_tensors="pt", padding=True)
+
+        pixel_values = inputs.pixel_values.to(self.device, dtype=self.dtype)
+
+        # Prepare prompt (identical for every image, so no padding is needed)
         formatted_prompt = f"<s>{prompt} <Answer/>"
         prompt_inputs = self.tokenizer(
             formatted_prompt,
@@ -129,11 +375,12 @@ class DolphinParser:
             return_tensors="pt"
         )
 
-        prompt_ids = prompt_inputs.input_ids.to(self.device)
-        attention_mask = prompt_inputs.attention_mask.to(self.device)
+        batch_size = len(images)
+        prompt_ids = prompt_inputs.input_ids.expand(batch_size, -1).to(self.device)
+        attention_mask = prompt_inputs.attention_mask.expand(batch_size, -1).to(self.device)
 
         # Generate text
-        with torch.no_grad():
+        with torch.inference_mode():
             outputs = self.model.generate(
                 pixel_values=pixel_values,
                 decoder_input_ids=prompt_ids,
@@ -150,10 +397,56 @@ class DolphinParser:
             )
 
         # Decode output
-        sequence = self.tokenizer.batch_decode(outputs.sequences, skip_special_tokens=False)[0]
-        cleaned = sequence.replace(formatted_prompt, "").replace("<pad>", "").replace("</s>", "").strip()
+        sequences = self.tokenizer.batch_decode(outputs.sequences, skip_special_tokens=False)
+        return [
+            sequence.replace(formatted_prompt, "").replace("<pad>", "").replace("</s>", "").strip()
+            for sequence in sequences
+        ]
+
+    def parse_page_elements(self, image: Image.Image) -> str:
+        """Two-stage parse of a page image: layout analysis, then element decoding
 
-        return cleaned
+        Stage 1 predicts element boxes in reading order. Stage 2 crops each
+        text, table and formula element and decodes the crops in batches
+        grouped by prompt, which is much faster on dense pages than one long
+        whole-page generation, and keeps table structure.
+
+        Args:
+            image: PIL Image of the page
+
+        Returns:
+            Element contents joined in reading order, or the whole-page
+            OCR_PROMPT output if the layout has no text elements
+        """
+        page = pad_to_square(image)
+        size = page.size[0]
+        layout = parse_layout_string(self.chat(LAYOUT_PROMPT, page))
+
+        # Group element crops by prompt so each group decodes as one batch
+        groups: Dict[str, List[Tuple[int, Image.Image]]] = {}
+        for order, ((x1, y1, x2, y2), label) in enumerate(layout):
+            if label in SKIPPED_ELEMENT_LABELS:
+                continue
+            box = tuple(int(round(v * size)) for v in (x1, y1, x2, y2))
+            if box[2] - box[0] < 3 or box[3] - box[1] < 3:
+                continue
+            prompt = ELEMENT_PROMPTS.get(label, ELEMENT_PROMPTS["text"])
+            groups.setdefault(prompt, []).append((order, page.crop(box)))
+
+        if not groups:
+            # No parsable "[x1,y1,x2,y2] label" boxes: don't lose the page
+            logger.warning("Layout analysis found no text elements, falling back to whole-page OCR")
+            return self.chat(OCR_PROMPT, image)
+
+        contents: Dict[int, str] = {}
+        for prompt, elements in groups.items():
+            for start in range(0, len(elements), self.max_batch_size):
+                batch = elements[start:start + self.max_batch_size]
+                results = self.chat_batch(prompt, [crop for _, crop in batch])
+                for (order, _), text in zip(batch, results):
+                    contents[order] = text
+
+        return "\n\n".join(contents[order] for order in sorted(contents) if contents[order])
 
     def parse_pdf_simple(self, pdf_path: str) -> str:
         """Parse a PDF file and extract text content using PyMuPDF as fallback
@@ -167,46 +460,17 @@ class DolphinParser:
         Returns:
             Extracted text content
         """
-        import os
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
         logger.info(f"Parsing PDF with PyMuPDF (direct text extraction): {pdf_path}")
 
-        all_text = []
-
         try:
-            # Use PyMuPDF for direct text extraction (faster than Dolphin for simple PDFs)
-            doc = pymupdf.open(pdf_path)
-            total_pages = len(doc)
-
-            for page_num in range(total_pages):
-                page = doc[page_num]
-                text = page.get_text()
-
-                if text and text.strip():
-                    all_text.append(f"=== Page {page_num + 1} ===\n{text.strip()}")
-                else:
-                    logger.warning(f"No text found on page {page_num + 1}, trying OCR with Dolphin...")
-
-                    # If no text found, try with Dolphin (for scanned PDFs)
-                    # Need to convert before closing doc
-                    images = convert_pdf_to_images(pdf_path)
-                    if images and page_num < len(images):
-                        try:
-                            # Use Dolphin for OCR
-                            page_content = self.chat(
-                                "Extract all text from this document image in reading order. Output only the text content, not layout coordinates.",
-                                images[page_num]
-                            )
-                            if page_content and page_content.strip():
-                                all_text.append(f"=== Page {page_num + 1} ===\n{page_content.strip()}")
-                        except Exception as e:
-                            logger.error(f"Error using Dolphin OCR on page {page_num + 1}: {e}")
-                            all_text.append(f"=== Page {page_num + 1} ===\n[No text content]")
-
-            doc.close()
-            logger.info(f"Successfully extracted text from {total_pages} pages")
+            all_text = [
+                format_page(page_num, text)
+                for page_num, text in self.iter_pdf_pages(pdf_path)
+            ]
+            logger.info(f"Successfully extracted text from {len(all_text)} pages")
 
         except Exception as e:
             logger.error(f"Error parsing PDF: {e}")
@@ -214,13 +478,252 @@ class DolphinParser:
 
         return "\n\n".join(all_text)
 
+    def iter_pdf_pages(self, pdf_path: str) -> Iterator[Tuple[int, str]]:
+        """Stream the pages of a PDF as they are extracted
+
+        Pages with a text layer come straight from PyMuPDF; pages without one
+        are OCR'd with Dolphin.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Yields:
+            (page_num, text) for each page with content, in page order
+            (page_num is zero-based)
+
+        Raises:
+            OCRError: after the last page, if OCR failed on any page
+        """
+        yield from iter_pdf_pages_with_ocr(pdf_path, self.ocr_page)
+
+    def ocr_page(self, pdf_path: str, page_num: int) -> Optional[str]:
+        """OCR a single PDF page with Dolphin
+
+        Args:
+            pdf_path: Path to the PDF file
+            page_num: Zero-based page index
+
+        Returns:
+            Extracted page text, or None if the model produced no text
+
+        Raises:
+            OCRError: if OCR failed, so the page is retried on a later run
+                instead of being stored as empty
+        """
+        try:
+            image = render_pdf_page(pdf_path, page_num)
+            if self.parse_mode == "element":
+                page_content = self.parse_page_elements(image)
+            else:
+                page_content = self.chat(OCR_PROMPT, image)
+            if page_content and page_content.strip():
+                return page_content.strip()
+            return None
+        except Exception as e:
+            logger.error(f"Error using Dolphin OCR on page {page_num + 1}: {e}")
+            raise OCRError(f"Dolphin OCR failed on page {page_num + 1} of {pdf_path}: {e}") from e
+
+
+# Per-process parser used by DolphinOCRPool workers
+_worker_parser: Optional["DolphinParser"] = None
+
+
+def _init_ocr_worker(
+    model_path: str,
+    num_threads: int,
+    cpu_optimize: Optional[str],
+    parse_mode: Optional[str],
+):
+    """Load one Dolphin model per worker process with a fixed intra-op thread count"""
+    global _worker_parser
+    _worker_parser = DolphinParser(
+        model_path=model_path,
+        cpu_optimize=cpu_optimize,
+        num_threads=num_threads,
+        parse_mode=parse_mode,
+    )
 
-def parse_pdf_with_dolphin(pdf_path: str, model_path: str = "./hf_model") -> Optional[str]:
+
+def _ocr_page_task(task: Tuple[str, int]) -> Tuple[str, int, Optional[str]]:
+    """Worker entry point: OCR one (pdf_path, page_num) task"""
+    pdf_path, page_num = task
+    return pdf_path, page_num, _worker_parser.ocr_page(pdf_path, page_num)
+
+
+class DolphinOCRPool:
+    """Process pool that shards the OCR pages of one or more PDFs across workers
+
+    Each worker process holds its own loaded Dolphin model, so scanned
+    documents finish in time proportional to OCR pages / workers. Pages with
+    an embedded text layer are extracted in the calling process and never
+    reach the pool. Workers are started lazily on the first OCR page, so a
+    run over text-only PDFs never loads the model.
+    """
+
+    def __init__(
+        self,
+        model_path: str = "./hf_model",
+        num_workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        cpu_optimize: Optional[str] = None,
+        parse_mode: Optional[str] = None,
+    ):
+        """Initialize the OCR pool
+
+        Args:
+            model_path: Path to the Dolphin model directory
+            num_workers: Number of worker processes (default: CPU count // 2)
+            threads_per_worker: torch intra-op threads per worker
+                (default: CPU count divided evenly across workers)
+            cpu_optimize: Passed to each worker's DolphinParser
+            parse_mode: Passed to each worker's DolphinParser
+        """
+        if not DOLPHIN_AVAILABLE:
+            raise ImportError("Dolphin dependencies not available. Install requirements first.")
+
+        cpu_count = os.cpu_count() or 1
+        self.model_path = model_path
+        self.num_workers = max(1, num_workers or cpu_count // 2)
+        self.threads_per_worker = max(1, threads_per_worker or cpu_count // self.num_workers)
+        self.cpu_optimize = cpu_optimize
+        self.parse_mode = parse_mode
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(
+                f"Starting {self.num_workers} Dolphin OCR workers "
+                f"({self.threads_per_worker} torch threads each)"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                # spawn avoids forking a process that already holds torch/OpenMP state
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ocr_worker,
+                initargs=(
+                    self.model_path,
+                    self.threads_per_worker,
+                    self.cpu_optimize,
+                    self.parse_mode,
+                ),
+            )
+        return self._executor
+
+    def iter_pdf_pages(self, pdf_path: str) -> Iterator[Tuple[int, str]]:
+        """Stream the pages of a PDF in order while OCR pages run in the pool
+
+        OCR pages are submitted as soon as they are found, and each page is
+        yielded once it and every page before it are done.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Yields:
+            (page_num, text) for each page with content, in page order
+
+        Raises:
+            OCRError: after the last page, if OCR failed on any page
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+
+        pending: deque = deque()
+        failed_pages: List[int] = []
+
+        def ready_pages(wait: bool) -> Iterator[Tuple[int, str]]:
+            while pending:
+                page_num, result = pending[0]
+                if isinstance(result, Future):
+                    if not (wait or result.done()):
+                        return
+                    try:
+                        result = result.result()[2]
+                    except OCRError:
+                        failed_pages.append(page_num)
+                        result = None
+                pending.popleft()
+                if result:
+                    yield page_num, result
+
+        for page_num, text in enumerate(iter_text_layer(pdf_path)):
+            if text:
+                pending.append((page_num, text))
+            else:
+                future = self._get_executor().submit(_ocr_page_task, (pdf_path, page_num))
+                pending.append((page_num, future))
+            yield from ready_pages(wait=False)
+
+        yield from ready_pages(wait=True)
+        raise_for_failed_pages(pdf_path, failed_pages)
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Serializes in-process OCR: parser threads share one model
+_parser_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def get_dolphin_parser(model_path: str = "./hf_model") -> DolphinParser:
+    """Load a DolphinParser once per process and reuse it across PDFs"""
+    return DolphinParser(model_path=model_path)
+
+
+def iter_pdf_pages_with_dolphin(
+    pdf_path: str,
+    model_path: str = "./hf_model",
+    ocr_pool: Optional[DolphinOCRPool] = None,
+) -> Iterator[Tuple[int, str]]:
+    """Stream the pages of a PDF, using Dolphin only for pages that need OCR
+
+    The Dolphin model is loaded lazily on the first page without a text
+    layer, so text-only PDFs never pay the model load.
+
+    Args:
+        pdf_path: Path to the PDF file
+        model_path: Path to the Dolphin model directory
+        ocr_pool: Optional DolphinOCRPool to shard OCR pages across processes
+
+    Yields:
+        (page_num, text) for each page with content, in page order
+        (page_num is zero-based)
+
+    Raises:
+        OCRError: after the last page, if OCR failed on any page
+    """
+    if ocr_pool is not None:
+        yield from ocr_pool.iter_pdf_pages(pdf_path)
+        return
+
+    def ocr_page(path: str, page_num: int) -> Optional[str]:
+        # The model is loaded on the first OCR page, not for text-only PDFs
+        with _parser_lock:
+            return get_dolphin_parser(model_path).ocr_page(path, page_num)
+
+    yield from iter_pdf_pages_with_ocr(pdf_path, ocr_page)
+
+
+def parse_pdf_with_dolphin(
+    pdf_path: str,
+    model_path: str = "./hf_model",
+    ocr_pool: Optional[DolphinOCRPool] = None,
+) -> Optional[str]:
     """Convenience function to parse a PDF with Dolphin
 
     Args:
         pdf_path: Path to the PDF file
         model_path: Path to the Dolphin model directory
+        ocr_pool: Optional DolphinOCRPool to shard OCR pages across processes
 
     Returns:
         Extracted text content, or None if parsing fails
@@ -230,8 +733,10 @@ def parse_pdf_with_dolphin(pdf_path: str, model_path: str = "./hf_model") -> Opt
         return None
 
     try:
-        parser = DolphinParser(model_path=model_path)
-        return parser.parse_pdf_simple(pdf_path)
+        return "\n\n".join(
+            format_page(page_num, text)
+            for page_num, text in iter_pdf_pages_with_dolphin(pdf_path, model_path, ocr_pool)
+        )
     except Exception as e:
         logger.error(f"Error parsing PDF with Dolphin: {e}")
         return None
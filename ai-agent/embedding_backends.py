@@ -0,0 +1,140 @@
+"""
+Embedding Backends - Select the embedding function LightRAG uses
+
+- gemini: Gemini embedding API (text-embedding-004, 768 dimensions, or
+  fewer via Matryoshka truncation with output_dimensionality)
+- local: sentence-transformers model run in-process (dimension from the model)
+
+The backend, model and dimension used to build a knowledge graph are saved in
+its working directory, because queries must embed with the same model;
+query_lightrag.py reads them back instead of assuming Gemini.
+"""
+
+import os
+import json
+import logging
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from gemini_llm import gemini_embedding_async
+from local_embedding import DEFAULT_LOCAL_EMBEDDING_MODEL, get_local_embedding
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("gemini", "local")
+
+DEFAULT_EMBEDDING_MODELS = {
+    "gemini": "models/text-embedding-004",
+    "local": DEFAULT_LOCAL_EMBEDDING_MODEL,
+}
+
+# text-embedding-004 output dimension
+GEMINI_EMBEDDING_DIM = 768
+
+EMBEDDING_CONFIG_FILE = "embedding_config.json"
+
+
+@dataclass
+class EmbeddingConfig:
+    """Embedding backend, model and dimension of a knowledge graph (0: model's full size)"""
+
+    backend: str = "gemini"
+    model: str = DEFAULT_EMBEDDING_MODELS["gemini"]
+    dim: int = GEMINI_EMBEDDING_DIM
+
+
+def save_embedding_config(working_dir: str, config: EmbeddingConfig):
+    """Record the embedding configuration a knowledge graph was built with"""
+    path = os.path.join(working_dir, EMBEDDING_CONFIG_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(asdict(config), f, indent=2)
+
+
+def load_embedding_config(working_dir: str) -> Optional[EmbeddingConfig]:
+    """
+    Read the embedding configuration of a knowledge graph
+
+    Returns:
+        The saved EmbeddingConfig, or None for graphs built before it was recorded
+    """
+    path = os.path.join(working_dir, EMBEDDING_CONFIG_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return EmbeddingConfig(**json.load(f))
+
+
+def resolve_embedding_config(
+    working_dir: str,
+    backend: Optional[str] = None,
+    model: Optional[str] = None,
+    dim: Optional[int] = None,
+) -> EmbeddingConfig:
+    """
+    Combine explicit choices with the configuration saved in working_dir
+
+    Args:
+        working_dir: LightRAG working directory
+        backend: Requested backend (None: saved backend, else gemini)
+        model: Requested model (None: saved model for that backend, else its default)
+        dim: Requested Gemini output dimensionality (None: saved, else full size)
+
+    Returns:
+        EmbeddingConfig (dim is set by create_embedding_func)
+    """
+    saved = load_embedding_config(working_dir)
+    backend = backend or (saved.backend if saved else "gemini")
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+    if model is None:
+        model = saved.model if saved and saved.backend == backend else DEFAULT_EMBEDDING_MODELS[backend]
+    if dim is not None and backend != "gemini":
+        raise ValueError("Reducing the embedding dimension is only supported for gemini embeddings")
+    if dim is None:
+        same_model = saved and (saved.backend, saved.model) == (backend, model)
+        dim = saved.dim if same_model and backend == "gemini" else 0
+
+    if saved and (saved.backend, saved.model, saved.dim) != (backend, model, dim or saved.dim):
+        logger.warning(
+            f"{working_dir} was built with {saved.backend} embeddings ({saved.model}, "
+            f"{saved.dim} dims); using {backend} ({model}) will not match its vectors"
+        )
+    return EmbeddingConfig(backend=backend, model=model, dim=dim)
+
+
+def create_embedding_func(
+    config: EmbeddingConfig,
+) -> Callable[[list], Awaitable[np.ndarray]]:
+    """
+    Build the async embedding function for LightRAG's EmbeddingFunc
+
+    Loads the local model right away, so config.dim is set to its real
+    dimension. For gemini, a dim below the full size requests truncated
+    (Matryoshka) embeddings.
+
+    Args:
+        config: Embedding configuration; dim (0: full size) is updated in place
+
+    Returns:
+        Async function mapping texts to embeddings
+    """
+    if config.backend == "local":
+        local = get_local_embedding(config.model)
+        config.dim = local.embedding_dim
+        embed = local.acall
+    else:
+        output_dimensionality = config.dim if 0 < config.dim < GEMINI_EMBEDDING_DIM else None
+        config.dim = output_dimensionality or GEMINI_EMBEDDING_DIM
+
+        async def embed(texts):
+            return await gemini_embedding_async(texts, config.model, output_dimensionality)
+
+    async def embedding_func(texts):
+        if isinstance(texts, str):
+            texts = [texts]
+        # LightRAG expects one row per text, even for a single text
+        return np.atleast_2d(await embed(texts))
+
+    return embedding_func
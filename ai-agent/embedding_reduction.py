@@ -0,0 +1,144 @@
+"""
+Embedding Reduction - Shrink stored embedding vectors and measure the cost
+
+- PCAReducer: learns a PCA projection from the corpus embeddings at ingestion
+  time; it is saved next to the index and applied to query embeddings
+- neighbor_recall: how many of each vector's exact nearest neighbours in the
+  full space are still its nearest neighbours in the reduced space
+
+Gemini embeddings can be shortened at the source instead (Matryoshka
+training), via the output_dimensionality option of GeminiEmbedding.
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PCAReducer:
+    """Mean-centred PCA projection to a fixed number of dimensions"""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance_ratio: np.ndarray):
+        """
+        Args:
+            mean: Corpus mean, shape (input_dim,)
+            components: Principal axes as rows, shape (output_dim, input_dim)
+            explained_variance_ratio: Variance fraction kept by each axis
+        """
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)
+        self.explained_variance_ratio = explained_variance_ratio
+
+    @property
+    def output_dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def explained_variance(self) -> float:
+        """Fraction of the corpus variance kept by the projection"""
+        return float(self.explained_variance_ratio.sum())
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, output_dim: int) -> "PCAReducer":
+        """
+        Learn the projection from corpus embeddings
+
+        Args:
+            embeddings: Array of shape (num_vectors, input_dim)
+            output_dim: Target dimension (capped at min(num_vectors, input_dim))
+
+        Returns:
+            Fitted PCAReducer
+        """
+        x = embeddings.astype(np.float64)
+        mean = x.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(x - mean, full_matrices=False)
+
+        max_dim = vt.shape[0]
+        if output_dim > max_dim:
+            logger.warning(
+                f"PCA dimension {output_dim} exceeds what {x.shape[0]} vectors support, using {max_dim}"
+            )
+            output_dim = max_dim
+
+        variance = singular_values ** 2
+        ratio = variance[:output_dim] / variance.sum() if variance.sum() else np.zeros(output_dim)
+        return cls(mean, vt[:output_dim], ratio)
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        """Project embeddings of shape (n, input_dim) to (n, output_dim) float32"""
+        return ((embeddings.astype(np.float32) - self.mean) @ self.components.T).astype(np.float32)
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            mean=self.mean,
+            components=self.components,
+            explained_variance_ratio=self.explained_variance_ratio,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "PCAReducer":
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"], data["explained_variance_ratio"])
+
+
+def _top_k(vectors: np.ndarray, query_ids: np.ndarray, k: int, metric: str) -> np.ndarray:
+    """Exact top-k neighbour ids of the vectors at query_ids, excluding themselves"""
+    if metric == "cosine":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        normalized = vectors / np.where(norms == 0, 1, norms)
+        scores = -(normalized[query_ids] @ normalized.T)
+    else:
+        queries = vectors[query_ids]
+        scores = (
+            (queries ** 2).sum(axis=1, keepdims=True)
+            - 2 * queries @ vectors.T
+            + (vectors ** 2).sum(axis=1)
+        )
+    scores[np.arange(len(query_ids)), query_ids] = np.inf
+    return np.argpartition(scores, k, axis=1)[:, :k]
+
+
+def neighbor_recall(
+    full: np.ndarray,
+    reduced: np.ndarray,
+    k: int = 10,
+    num_queries: int = 200,
+    metric: str = "l2",
+    seed: int = 0,
+) -> Optional[float]:
+    """
+    Recall@k of reduced-space nearest neighbours against the full space
+
+    A sample of corpus vectors serves as queries; 1.0 means every query
+    retrieves the same k neighbours after reduction.
+
+    Args:
+        full: Full-dimension vectors, shape (n, d)
+        reduced: The same vectors after reduction, shape (n, d')
+        k: Neighbours per query
+        num_queries: Number of sampled query vectors
+        metric: "l2" (FAISS IndexFlatL2) or "cosine" (LightRAG vector stores)
+        seed: Sampling seed
+
+    Returns:
+        Mean recall@k, or None if the corpus is too small
+    """
+    n = full.shape[0]
+    k = min(k, n - 1)
+    if k < 1:
+        return None
+
+    rng = np.random.default_rng(seed)
+    query_ids = rng.choice(n, size=min(num_queries, n), replace=False)
+    full_neighbors = _top_k(full, query_ids, k, metric)
+    reduced_neighbors = _top_k(reduced, query_ids, k, metric)
+
+    overlaps = [
+        len(set(a) & set(b)) / k for a, b in zip(full_neighbors, reduced_neighbors)
+    ]
+    return float(np.mean(overlaps))
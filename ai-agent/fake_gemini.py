@@ -0,0 +1,350 @@
+"""
+Fake Gemini - Offline, deterministic stand-in for the google-genai client
+
+FakeGeminiClient implements the small part of genai.Client that gemini_llm.py
+uses (models / aio.models: generate_content, generate_content_stream,
+embed_content), so GeminiLLM, GeminiEmbedding, the rate limiter, response
+cache and single-flight layers all run unchanged without network access or
+quota. Select it with configure_backend("fake", ...) or GEMINI_BACKEND=fake.
+
+- Latency: log-normal per request around a configurable median
+- Errors: a configurable fraction of requests fail with a retryable 429, and
+  requests beyond an optional server capacity are rejected with 429 as well
+- Embeddings: deterministic feature-hashed bag of words, so texts sharing
+  words are similar and retrieval behaves plausibly
+- Completions: canned LightRAG entity-extraction records, keyword JSON for
+  query keyword extraction, and a short deterministic answer otherwise
+"""
+
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List, Optional
+
+import numpy as np
+
+from usage_tracker import lightrag_stage
+
+# Capitalized words (optionally multi-word) treated as entity candidates
+_NAME = r"[A-Z][a-zA-Z0-9+#-]{2,}(?:\.[a-z0-9]+)?"
+_ENTITY_RE = re.compile(rf"\b{_NAME}(?: {_NAME})?\b")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Markers LightRAG versions put before the text to extract from
+_INPUT_MARKERS = ("---Input Text---", "---Real Data---", "-Real Data-", "<Input Text>", "Text:")
+
+_STOPWORDS = {
+    "The", "This", "That", "These", "Those", "And", "For", "With", "From",
+    "Output", "Text", "Entity", "Entities", "Relationship", "Format", "Use",
+    "Return", "Answer", "Question", "Data", "Real", "Example", "Examples",
+}
+
+
+class FakeAPIError(Exception):
+    """Error raised by the fake backend, shaped like a genai APIError"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+@dataclass
+class FakeUsage:
+    """Token counts in the shape of GenerateContentResponse.usage_metadata"""
+
+    prompt_token_count: int = 0
+    candidates_token_count: int = 0
+    total_token_count: int = 0
+
+
+@dataclass
+class FakeResponse:
+    """Generation response or stream chunk"""
+
+    text: str
+    usage_metadata: Optional[FakeUsage] = None
+
+
+@dataclass
+class FakeEmbedding:
+    values: List[float]
+
+
+@dataclass
+class FakeEmbedResponse:
+    embeddings: List[FakeEmbedding]
+
+
+def _count_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def hash_embedding(text: str, dim: int) -> np.ndarray:
+    """
+    Deterministic unit vector for a text from hashed word and bigram features
+
+    Args:
+        text: Text to embed
+        dim: Embedding dimension
+
+    Returns:
+        float32 vector of shape (dim,)
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    words = _WORD_RE.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for feature in features or [text]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _input_text(prompt: str) -> str:
+    """Best-effort slice of an extraction prompt holding the text to extract from"""
+    for marker in _INPUT_MARKERS:
+        index = prompt.rfind(marker)
+        if index != -1:
+            return prompt[index + len(marker):]
+    return prompt[-4000:]
+
+
+def _entity_names(text: str, limit: int = 6) -> List[str]:
+    counts = Counter(
+        name for name in _ENTITY_RE.findall(text) if name.split()[0] not in _STOPWORDS
+    )
+    return [name for name, _ in counts.most_common(limit)]
+
+
+def canned_extraction(prompt: str) -> str:
+    """LightRAG entity-extraction output naming the prompt's most frequent proper nouns"""
+    names = _entity_names(_input_text(prompt))
+    pairs = list(zip(names, names[1:]))
+
+    # Current LightRAG releases parse one record per line with <|#|>
+    # separators (their prompt only names them in the system prompt, which
+    # the client never sees); only prompts spelling out the old "<|>" tuple
+    # format get that format back
+    if "<|>" not in prompt or "<|#|>" in prompt:
+        records = [
+            f"entity<|#|>{name}<|#|>concept<|#|>{name} is mentioned in the document."
+            for name in names
+        ] + [
+            f"relation<|#|>{a}<|#|>{b}<|#|>related<|#|>{a} appears together with {b}."
+            for a, b in pairs
+        ]
+        return "\n".join(records + ["<|COMPLETE|>"])
+
+    records = [
+        f'("entity"<|>"{name}"<|>"concept"<|>"{name} is mentioned in the document.")'
+        for name in names
+    ] + [
+        f'("relationship"<|>"{a}"<|>"{b}"<|>"{a} appears together with {b}."<|>"related"<|>1.0)'
+        for a, b in pairs
+    ]
+    return "##".join(records) + "<|COMPLETE|>"
+
+
+def canned_completion(prompt: str) -> str:
+    """Pick a canned answer based on which LightRAG stage the prompt belongs to"""
+    stage = lightrag_stage(prompt)
+    if stage == "keywords":
+        words = [w for w in _WORD_RE.findall(_input_text(prompt).lower()) if len(w) > 3]
+        return json.dumps({
+            "high_level_keywords": sorted(set(words[-6:-3])),
+            "low_level_keywords": sorted(set(words[-3:])),
+        })
+    if stage == "gleaning":
+        return "NO" if "YES" in prompt else "<|COMPLETE|>"
+    if stage == "extraction":
+        return canned_extraction(prompt)
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"Fake {stage} {digest} for a prompt of {len(prompt)} characters."
+
+
+class _FakeModels:
+    """Synchronous models surface (client.models)"""
+
+    def __init__(self, client: "FakeGeminiClient"):
+        self._client = client
+
+    def generate_content(self, model: str, contents: str, config: Any = None) -> FakeResponse:
+        time.sleep(self._client.begin_request(self._client.llm_latency_ms))
+        try:
+            return self._client.completion(contents)
+        finally:
+            self._client.end_request()
+
+    def embed_content(self, model: str, contents: List[str], config: Any = None) -> FakeEmbedResponse:
+        time.sleep(self._client.begin_request(self._client.embedding_latency_ms))
+        try:
+            return self._client.embeddings(contents, config)
+        finally:
+            self._client.end_request()
+
+
+class _FakeAsyncModels:
+    """Async models surface (client.aio.models)"""
+
+    def __init__(self, client: "FakeGeminiClient"):
+        self._client = client
+
+    async def generate_content(self, model: str, contents: str, config: Any = None) -> FakeResponse:
+        delay = self._client.begin_request(self._client.llm_latency_ms)
+        try:
+            await asyncio.sleep(delay)
+            return self._client.completion(contents)
+        finally:
+            self._client.end_request()
+
+    async def generate_content_stream(
+        self, model: str, contents: str, config: Any = None
+    ) -> AsyncIterator[FakeResponse]:
+        # Fail (or be rejected) before the stream starts, like the real API
+        delay = self._client.admit_request(self._client.llm_latency_ms)
+        response = self._client.completion(contents)
+        return self._stream(response, delay)
+
+    async def _stream(self, response: FakeResponse, delay: float) -> AsyncIterator[FakeResponse]:
+        # Counted in flight only once iterated: the finally of a stream that
+        # is never iterated does not run, so it would never be released
+        self._client.start_request()
+        try:
+            words = response.text.split(" ")
+            chunk_delay = delay / max(len(words), 1)
+            for i, word in enumerate(words):
+                await asyncio.sleep(chunk_delay)
+                last = i == len(words) - 1
+                yield FakeResponse(
+                    text=word if last else word + " ",
+                    usage_metadata=response.usage_metadata if last else None,
+                )
+        finally:
+            self._client.end_request()
+
+    async def embed_content(self, model: str, contents: List[str], config: Any = None) -> FakeEmbedResponse:
+        delay = self._client.begin_request(self._client.embedding_latency_ms)
+        try:
+            await asyncio.sleep(delay)
+            return self._client.embeddings(contents, config)
+        finally:
+            self._client.end_request()
+
+
+class _FakeAio:
+    def __init__(self, client: "FakeGeminiClient"):
+        self.models = _FakeAsyncModels(client)
+
+    async def aclose(self):
+        pass
+
+
+class FakeGeminiClient:
+    """Offline stand-in for genai.Client with simulated latency and errors"""
+
+    def __init__(
+        self,
+        llm_latency_ms: float = 800,
+        embedding_latency_ms: float = 150,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        capacity: Optional[int] = None,
+        embedding_dim: int = 768,
+        seed: int = 0,
+    ):
+        """
+        Initialize the fake client
+
+        Args:
+            llm_latency_ms: Median latency of a generation request in milliseconds
+            embedding_latency_ms: Median latency of an embedding request in milliseconds
+            latency_sigma: Log-normal shape parameter (0: constant latency)
+            error_rate: Fraction of requests failing with a retryable 429
+            capacity: Requests the fake server handles at once; more are
+                rejected with 429 (None: unlimited)
+            embedding_dim: Dimension of the hash embeddings (overridden by
+                config.output_dimensionality when set)
+            seed: Seed for the latency and error random draws
+        """
+        self.llm_latency_ms = llm_latency_ms
+        self.embedding_latency_ms = embedding_latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.embedding_dim = embedding_dim
+        self._random = random.Random(seed)
+
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+        self.models = _FakeModels(self)
+        self.aio = _FakeAio(self)
+
+    def begin_request(self, median_ms: float) -> float:
+        """
+        Admit a request and count it in flight until end_request
+
+        Returns:
+            Simulated latency of the request in seconds
+        """
+        delay = self.admit_request(median_ms)
+        self.start_request()
+        return delay
+
+    def admit_request(self, median_ms: float) -> float:
+        """
+        Admit a request, raising a 429 for injected or over-capacity failures
+
+        The request is not counted in flight; call start_request once it runs.
+
+        Returns:
+            Simulated latency of the request in seconds
+        """
+        self.requests += 1
+        if self.capacity is not None and self.in_flight >= self.capacity:
+            self.errors += 1
+            raise FakeAPIError(429, "RESOURCE_EXHAUSTED: fake server at capacity")
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            raise FakeAPIError(429, "RESOURCE_EXHAUSTED: injected fake error")
+
+        if self.latency_sigma <= 0 or median_ms <= 0:
+            return max(median_ms, 0) / 1000
+        return self._random.lognormvariate(math.log(median_ms), self.latency_sigma) / 1000
+
+    def start_request(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def end_request(self):
+        self.in_flight -= 1
+
+    def completion(self, prompt: str) -> FakeResponse:
+        text = canned_completion(prompt)
+        prompt_tokens, output_tokens = _count_tokens(prompt), _count_tokens(text)
+        return FakeResponse(
+            text=text,
+            usage_metadata=FakeUsage(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
+
+    def embeddings(self, texts: List[str], config: Any = None) -> FakeEmbedResponse:
+        dim = getattr(config, "output_dimensionality", None) or self.embedding_dim
+        return FakeEmbedResponse(
+            embeddings=[FakeEmbedding(values=hash_embedding(text, dim).tolist()) for text in texts]
+        )
+
+    def close(self):
+        pass
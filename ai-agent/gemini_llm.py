@@ -3,19 +3,210 @@ Gemini LLM and Embedding wrappers for LightRAG
 
 This module provides LightRAG-compatible interfaces for Google's Gemini models:
 - gemini-2.0-flash-exp for text generation
-- text-embedding-004 for embeddings
+- text-embedding-004 for embeddings (batched, returned as float32 NumPy arrays)
 
-Uses the google-genai package (not the deprecated google-generativeai)
+Uses the google-genai package (not the deprecated google-generativeai).
+configure_backend("fake") (or GEMINI_BACKEND=fake) swaps the API for the
+offline stand-in in fake_gemini.py, for benchmarking without quota.
+Clients and wrapper instances are shared process-wide; call
+close_gemini_clients() (or finalize_lightrag()) on shutdown.
 """
 
 import os
+import json
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, AsyncIterator, Optional, Union
+
+import numpy as np
 from google import genai
 from google.genai import types
 
+from disk_cache import DiskCache
+from fake_gemini import FakeGeminiClient
+from rate_limiter import AdaptiveRateLimiter, estimate_tokens
+from single_flight import SingleFlight
+from usage_tracker import UsageTracker, lightrag_stage
+
 logger = logging.getLogger(__name__)
 
+# Safety settings applied to every generation request
+SAFETY_SETTINGS = [
+    types.SafetySetting(
+        category="HARM_CATEGORY_HARASSMENT",
+        threshold="BLOCK_NONE"
+    ),
+    types.SafetySetting(
+        category="HARM_CATEGORY_HATE_SPEECH",
+        threshold="BLOCK_NONE"
+    ),
+    types.SafetySetting(
+        category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        threshold="BLOCK_NONE"
+    ),
+    types.SafetySetting(
+        category="HARM_CATEGORY_DANGEROUS_CONTENT",
+        threshold="BLOCK_NONE"
+    ),
+]
+
+# Backend serving Gemini calls: the real API, or the offline fake client
+GEMINI_BACKENDS = ("google", "fake")
+_backend = os.getenv("GEMINI_BACKEND", "google")
+_backend_settings: Dict[str, Any] = {}
+
+# Process-wide registries: one genai.Client per API key (so its HTTP
+# connections are reused), and one wrapper per (class, model, parameters)
+_clients: Dict[str, genai.Client] = {}
+_instances: Dict[tuple, Any] = {}
+
+# Optional on-disk cache of completions, shared by all GeminiLLM instances
+_response_cache: Optional[DiskCache] = None
+
+# One adaptive rate limiter per model, so all callers share its quota
+_rate_limit_settings: Dict[str, Dict[str, Any]] = {}
+_rate_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+# Identical requests already in flight are joined instead of sent again
+_llm_flights = SingleFlight()
+_embedding_flights = SingleFlight()
+
+# Per-call token and latency records for the current run
+_usage = UsageTracker()
+
+
+@dataclass
+class GeminiStats:
+    """Process-wide counters for Gemini calls"""
+
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+_stats = GeminiStats()
+
+
+def get_gemini_stats() -> Dict[str, int]:
+    """Return a snapshot of the process-wide Gemini call counters"""
+    stats = asdict(_stats)
+    stats["retries"] = sum(limiter.retries for limiter in _rate_limiters.values())
+    stats["throttled"] = sum(limiter.throttled for limiter in _rate_limiters.values())
+    stats["llm_coalesced"] = _llm_flights.coalesced
+    stats["embedding_coalesced"] = _embedding_flights.coalesced
+    return stats
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Return the process-wide tracker of per-call tokens and latency"""
+    return _usage
+
+
+def configure_rate_limits(model_name: str, **settings):
+    """
+    Set the rate limits used for a model's shared limiter
+
+    Args:
+        model_name: Gemini model name
+        **settings: AdaptiveRateLimiter arguments (rpm, tpm, initial_concurrency, ...)
+    """
+    _rate_limit_settings[model_name] = settings
+    _rate_limiters.pop(model_name, None)
+
+
+def get_rate_limiter(model_name: str) -> AdaptiveRateLimiter:
+    """Get the shared rate limiter for a model, creating it on first use"""
+    if model_name not in _rate_limiters:
+        _rate_limiters[model_name] = AdaptiveRateLimiter(
+            **_rate_limit_settings.get(model_name, {})
+        )
+    return _rate_limiters[model_name]
+
+
+def configure_response_cache(
+    cache_dir: Optional[str],
+    ttl_hours: Optional[float] = None,
+    max_size_mb: float = 256,
+):
+    """
+    Enable (or disable, with cache_dir=None) the on-disk completion cache
+
+    Completions are keyed by (model, prompt hash, temperature, max_tokens),
+    so re-running ingestion over an unchanged corpus replays earlier answers
+    instead of calling Gemini again.
+
+    Args:
+        cache_dir: Cache directory, or None to disable caching
+        ttl_hours: Expire entries this many hours after they were written (None: never)
+        max_size_mb: Size limit of the cache in megabytes
+    """
+    global _response_cache
+    if not cache_dir:
+        _response_cache = None
+        return
+    ttl_seconds = ttl_hours * 3600 if ttl_hours else None
+    _response_cache = DiskCache(cache_dir, max_size_mb=max_size_mb, ttl_seconds=ttl_seconds)
+    logger.info(f"Gemini response cache enabled: {cache_dir}")
+
+
+def configure_backend(backend: str = "google", **settings):
+    """
+    Select the backend that serves Gemini calls
+
+    Call this before any client is created; existing clients and wrapper
+    instances are dropped.
+
+    Args:
+        backend: "google" for the real API, "fake" for FakeGeminiClient
+        **settings: FakeGeminiClient arguments (llm_latency_ms, error_rate, ...)
+    """
+    global _backend, _backend_settings
+    if backend not in GEMINI_BACKENDS:
+        raise ValueError(f"Unknown Gemini backend '{backend}', expected one of {GEMINI_BACKENDS}")
+    _backend = backend
+    _backend_settings = settings
+    _clients.clear()
+    _instances.clear()
+    logger.info(f"Gemini backend: {backend}")
+
+
+def get_backend() -> str:
+    """Return the name of the configured Gemini backend"""
+    return _backend
+
+
+def _resolve_api_key(api_key: Optional[str]) -> str:
+    """Return the given API key or GOOGLE_API_KEY, raising if neither is set"""
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError(
+            "Google API key not found. Set GOOGLE_API_KEY environment variable "
+            "or pass api_key parameter."
+        )
+    return api_key
+
+
+def get_client(api_key: Optional[str] = None) -> genai.Client:
+    """
+    Get the shared genai.Client for an API key, creating it on first use
+
+    Args:
+        api_key: Google AI API key (uses GOOGLE_API_KEY env var if not provided)
+
+    Returns:
+        Shared genai.Client (a FakeGeminiClient with the fake backend)
+    """
+    if _backend == "fake":
+        if "fake" not in _clients:
+            _clients["fake"] = FakeGeminiClient(**_backend_settings)
+        return _clients["fake"]
+
+    api_key = _resolve_api_key(api_key)
+    if api_key not in _clients:
+        _clients[api_key] = genai.Client(api_key=api_key)
+    return _clients[api_key]
+
 
 class GeminiLLM:
     """Gemini LLM wrapper for LightRAG"""
@@ -26,6 +217,7 @@ class GeminiLLM:
         api_key: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 4096,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
     ):
         """
         Initialize Gemini LLM
@@ -35,108 +227,161 @@ class GeminiLLM:
             api_key: Google AI API key (uses GOOGLE_API_KEY env var if not provided)
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            rate_limiter: Limiter for async calls (default: the model's shared limiter)
         """
         self.model_name = model_name
         self.temperature = temperature
         self.max_tokens = max_tokens
-
-        # Configure API key
-        api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "Google API key not found. Set GOOGLE_API_KEY environment variable "
-                "or pass api_key parameter."
-            )
-
-        # Initialize client
-        self.client = genai.Client(api_key=api_key)
+        self.config = types.GenerateContentConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+            safety_settings=SAFETY_SETTINGS,
+        )
+
+        # Shared client for this API key
+        self.client = get_client(api_key)
+        self.rate_limiter = rate_limiter or get_rate_limiter(model_name)
         logger.info(f"Initialized Gemini LLM: {model_name}")
 
-    def __call__(self, prompt: str, **kwargs) -> str:
+    def _cache_key(self, prompt: str) -> str:
+        """Response cache key: (model, prompt hash, temperature, max_tokens)"""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        # Keep fake answers from being replayed for the real API
+        model = self.model_name if _backend == "google" else f"{_backend}:{self.model_name}"
+        return json.dumps([model, prompt_hash, self.temperature, self.max_tokens])
+
+    def _cache_get(self, prompt: str, use_cache: bool) -> Optional[str]:
+        if not use_cache or _response_cache is None:
+            return None
+        cached = _response_cache.get(self._cache_key(prompt))
+        if cached is None:
+            _stats.cache_misses += 1
+        else:
+            _stats.cache_hits += 1
+            _usage.record_cached("completion", self.model_name, lightrag_stage(prompt))
+        return cached
+
+    def _track(self, prompt: str):
+        """Usage record for one API call with this prompt"""
+        return _usage.track(
+            "completion", self.model_name, lightrag_stage(prompt), estimate_tokens(prompt)
+        )
+
+    def _cache_set(self, prompt: str, text: Optional[str], use_cache: bool):
+        if use_cache and _response_cache is not None and text:
+            _response_cache.set(self._cache_key(prompt), text)
+
+    def __call__(self, prompt: str, use_cache: bool = True, **kwargs) -> str:
         """
         Generate text using Gemini
 
         Args:
             prompt: Input prompt
+            use_cache: Consult and fill the response cache (if configured)
             **kwargs: Additional generation parameters
 
         Returns:
             Generated text
         """
-        try:
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=self.temperature,
-                    max_output_tokens=self.max_tokens,
-                    safety_settings=[
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_HARASSMENT",
-                            threshold="BLOCK_NONE"
-                        ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_HATE_SPEECH",
-                            threshold="BLOCK_NONE"
-                        ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                            threshold="BLOCK_NONE"
-                        ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_DANGEROUS_CONTENT",
-                            threshold="BLOCK_NONE"
-                        ),
-                    ]
+        cached = self._cache_get(prompt, use_cache)
+        if cached is not None:
+            return cached
+
+        with self._track(prompt) as call:
+            try:
+                response = self.client.models.generate_content(
+                    model=self.model_name,
+                    contents=prompt,
+                    config=self.config,
                 )
-            )
-            return response.text
-        except Exception as e:
-            logger.error(f"Error generating text with Gemini: {e}")
-            raise
+            except Exception as e:
+                logger.error(f"Error generating text with Gemini: {e}")
+                raise
+            call.set_usage(response.usage_metadata)
+
+        self._cache_set(prompt, response.text, use_cache)
+        return response.text
 
-    async def acall(self, prompt: str, **kwargs) -> str:
+    async def acall(self, prompt: str, use_cache: bool = True, **kwargs) -> str:
         """
         Async generate text using Gemini
 
+        Concurrent calls with the same prompt and parameters share one request.
+
         Args:
             prompt: Input prompt
+            use_cache: Consult and fill the response cache (if configured)
             **kwargs: Additional generation parameters
 
         Returns:
             Generated text
         """
-        try:
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=self.temperature,
-                    max_output_tokens=self.max_tokens,
-                    safety_settings=[
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_HARASSMENT",
-                            threshold="BLOCK_NONE"
+        cached = self._cache_get(prompt, use_cache)
+        if cached is not None:
+            return cached
+
+        async def generate() -> str:
+            with self._track(prompt) as call:
+                try:
+                    response = await self.rate_limiter.run(
+                        lambda: self.client.aio.models.generate_content(
+                            model=self.model_name,
+                            contents=prompt,
+                            config=self.config,
                         ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_HATE_SPEECH",
-                            threshold="BLOCK_NONE"
-                        ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                            threshold="BLOCK_NONE"
-                        ),
-                        types.SafetySetting(
-                            category="HARM_CATEGORY_DANGEROUS_CONTENT",
-                            threshold="BLOCK_NONE"
-                        ),
-                    ]
-                )
-            )
+                        tokens=estimate_tokens(prompt),
+                        on_retry=call.count_retry,
+                    )
+                except Exception as e:
+                    logger.error(f"Error generating text with Gemini: {e}")
+                    raise
+                call.set_usage(response.usage_metadata)
+
+            self._cache_set(prompt, response.text, use_cache)
             return response.text
-        except Exception as e:
-            logger.error(f"Error generating text with Gemini: {e}")
-            raise
+
+        return await _llm_flights.do(self._cache_key(prompt), generate)
+
+    async def astream(self, prompt: str, use_cache: bool = True, **kwargs) -> AsyncIterator[str]:
+        """
+        Async stream text deltas from Gemini as they are generated
+
+        Args:
+            prompt: Input prompt
+            use_cache: Consult and fill the response cache (if configured)
+            **kwargs: Additional generation parameters
+
+        Yields:
+            Text deltas (a cache hit is yielded as a single delta)
+        """
+        cached = self._cache_get(prompt, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        deltas = []
+        with self._track(prompt) as call:
+            try:
+                stream = await self.rate_limiter.run(
+                    lambda: self.client.aio.models.generate_content_stream(
+                        model=self.model_name,
+                        contents=prompt,
+                        config=self.config,
+                    ),
+                    tokens=estimate_tokens(prompt),
+                    on_retry=call.count_retry,
+                )
+                async for chunk in stream:
+                    # Usage is cumulative; the last chunk carries the final counts
+                    call.set_usage(chunk.usage_metadata)
+                    if chunk.text:
+                        deltas.append(chunk.text)
+                        yield chunk.text
+            except Exception as e:
+                logger.error(f"Error streaming text with Gemini: {e}")
+                raise
+
+        self._cache_set(prompt, "".join(deltas), use_cache)
 
 
 class GeminiEmbedding:
@@ -146,6 +391,10 @@ class GeminiEmbedding:
         self,
         model_name: str = "models/text-embedding-004",
         api_key: Optional[str] = None,
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        output_dimensionality: Optional[int] = None,
     ):
         """
         Initialize Gemini Embedding
@@ -153,74 +402,230 @@ class GeminiEmbedding:
         Args:
             model_name: Gemini embedding model (default: models/text-embedding-004)
             api_key: Google AI API key (uses GOOGLE_API_KEY env var if not provided)
+            batch_size: Maximum texts per embed_content request (API limit: 100)
+            max_concurrency: Maximum batch requests in flight at once (async only)
+            rate_limiter: Limiter for async calls (default: the model's shared limiter)
+            output_dimensionality: Truncate embeddings to this many dimensions
+                (Matryoshka-trained models only; None: the model's full size)
         """
         self.model_name = model_name
-
-        # Configure API key
-        api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "Google API key not found. Set GOOGLE_API_KEY environment variable "
-                "or pass api_key parameter."
-            )
-
-        # Initialize client
-        self.client = genai.Client(api_key=api_key)
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.output_dimensionality = output_dimensionality
+        self.config = types.EmbedContentConfig(
+            task_type="RETRIEVAL_DOCUMENT",
+            output_dimensionality=output_dimensionality,
+        )
+
+        # Shared client for this API key
+        self.client = get_client(api_key)
+        self.rate_limiter = rate_limiter or get_rate_limiter(model_name)
         logger.info(f"Initialized Gemini Embedding: {model_name}")
 
-    def __call__(self, texts: List[str], **kwargs) -> List[List[float]]:
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into request-sized batches"""
+        return [
+            texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)
+        ]
+
+    @staticmethod
+    def _to_array(results: List[Any]) -> np.ndarray:
+        """Stack embed_content responses into one contiguous float32 array"""
+        return np.array(
+            [embedding.values for result in results for embedding in result.embeddings],
+            dtype=np.float32,
+        )
+
+    def __call__(self, texts: List[str], **kwargs) -> np.ndarray:
         """
-        Generate embeddings for texts
+        Generate embeddings for texts, several texts per request
 
         Args:
             texts: List of text strings to embed
             **kwargs: Additional parameters
 
         Returns:
-            List of embedding vectors
+            float32 array of shape (len(texts), embedding_dim)
         """
         try:
-            embeddings = []
-            for text in texts:
-                result = self.client.models.embed_content(
-                    model=self.model_name,
-                    contents=text,
-                    config=types.EmbedContentConfig(
-                        task_type="RETRIEVAL_DOCUMENT"
+            results = []
+            for batch in self._batches(texts):
+                with self._track(batch):
+                    results.append(
+                        self.client.models.embed_content(
+                            model=self.model_name,
+                            contents=batch,
+                            config=self.config,
+                        )
                     )
-                )
-                embeddings.append(result.embeddings[0].values)
-            return embeddings
+            return self._to_array(results)
         except Exception as e:
             logger.error(f"Error generating embeddings with Gemini: {e}")
             raise
 
-    async def acall(self, texts: List[str], **kwargs) -> List[List[float]]:
+    def _track(self, batch: List[str]):
+        """Usage record for one embedding request (tokens are estimated)"""
+        return _usage.track(
+            "embedding", self.model_name, "embedding", sum(estimate_tokens(text) for text in batch)
+        )
+
+    def _text_key(self, text: str) -> str:
+        """Single-flight key for one text: (model, dimensions, text hash)"""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return json.dumps([self.model_name, self.output_dimensionality, text_hash])
+
+    async def acall(self, texts: List[str], **kwargs) -> np.ndarray:
         """
         Async generate embeddings for texts
 
+        Duplicate texts, within this call or already being embedded by a
+        concurrent call, are embedded once. The remaining texts are split into
+        request-sized batches, and up to max_concurrency batches are embedded
+        concurrently.
+
         Args:
             texts: List of text strings to embed
             **kwargs: Additional parameters
 
         Returns:
-            List of embedding vectors
+            float32 array of shape (len(texts), embedding_dim)
         """
-        try:
-            embeddings = []
-            for text in texts:
-                result = await self.client.aio.models.embed_content(
-                    model=self.model_name,
-                    contents=text,
-                    config=types.EmbedContentConfig(
-                        task_type="RETRIEVAL_DOCUMENT"
+        # Partition unique texts into ones we embed and ones another call is embedding
+        keys = [self._text_key(text) for text in texts]
+        owned: Dict[str, str] = {}
+        joined: Dict[str, asyncio.Future] = {}
+        for key, text in zip(keys, texts):
+            if key in owned or key in joined:
+                _embedding_flights.coalesced += 1
+                continue
+            future = _embedding_flights.join(key)
+            if future is not None:
+                joined[key] = future
+            else:
+                _embedding_flights.lead(key)
+                owned[key] = text
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed_batch(batch: List[str]):
+            async with semaphore:
+                with self._track(batch) as call:
+                    return await self.rate_limiter.run(
+                        lambda: self.client.aio.models.embed_content(
+                            model=self.model_name,
+                            contents=batch,
+                            config=self.config,
+                        ),
+                        tokens=call.prompt_tokens,
+                        on_retry=call.count_retry,
                     )
+
+        vectors: Dict[str, np.ndarray] = {}
+        try:
+            if owned:
+                results = await asyncio.gather(
+                    *(embed_batch(batch) for batch in self._batches(list(owned.values())))
                 )
-                embeddings.append(result.embeddings[0].values)
-            return embeddings
-        except Exception as e:
-            logger.error(f"Error generating embeddings with Gemini: {e}")
+                array = self._to_array(results)
+                # zip would silently drop the texts without a vector and leave
+                # their flights unresolved, hanging every caller waiting on them
+                if len(array) != len(owned):
+                    raise ValueError(
+                        f"Gemini returned {len(array)} embeddings for {len(owned)} texts"
+                    )
+                vectors.update(zip(owned, array))
+        except BaseException as e:
+            if not isinstance(e, asyncio.CancelledError):
+                logger.error(f"Error generating embeddings with Gemini: {e}")
+            for key in owned:
+                _embedding_flights.resolve(key, error=e)
             raise
+        for key in owned:
+            _embedding_flights.resolve(key, vectors[key])
+
+        for key, future in joined.items():
+            vectors[key] = await asyncio.shield(future)
+
+        if not keys:
+            return self._to_array([])
+        return np.stack([vectors[key] for key in keys])
+
+
+def get_gemini_llm(
+    model_name: str = "gemini-2.0-flash-exp",
+    temperature: float = 0.7,
+    max_tokens: int = 4096,
+) -> GeminiLLM:
+    """
+    Get the shared GeminiLLM for a model and generation parameters
+
+    Args:
+        model_name: Gemini model name
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+
+    Returns:
+        Shared GeminiLLM instance
+    """
+    key = (GeminiLLM, model_name, temperature, max_tokens)
+    if key not in _instances:
+        _instances[key] = GeminiLLM(
+            model_name=model_name, temperature=temperature, max_tokens=max_tokens
+        )
+    return _instances[key]
+
+
+def get_gemini_embedding(
+    model_name: str = "models/text-embedding-004",
+    output_dimensionality: Optional[int] = None,
+) -> GeminiEmbedding:
+    """
+    Get the shared GeminiEmbedding for a model and output size
+
+    Args:
+        model_name: Gemini embedding model name
+        output_dimensionality: Truncated embedding size (None: full size)
+
+    Returns:
+        Shared GeminiEmbedding instance
+    """
+    key = (GeminiEmbedding, model_name, output_dimensionality)
+    if key not in _instances:
+        _instances[key] = GeminiEmbedding(
+            model_name=model_name, output_dimensionality=output_dimensionality
+        )
+    return _instances[key]
+
+
+async def close_gemini_clients():
+    """Close all shared Gemini clients and clear the registries"""
+    for client in _clients.values():
+        try:
+            aclose = getattr(client.aio, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            close = getattr(client, "close", None)
+            if close is not None:
+                close()
+        except Exception as e:
+            logger.warning(f"Error closing Gemini client: {e}")
+    _clients.clear()
+    _instances.clear()
+    # Limiters hold asyncio primitives bound to the event loop that is closing
+    _rate_limiters.clear()
+
+
+async def finalize_lightrag(rag):
+    """
+    Finalize LightRAG storages, then close the shared Gemini clients
+
+    Args:
+        rag: LightRAG instance
+    """
+    try:
+        await rag.finalize_storages()
+    finally:
+        await close_gemini_clients()
 
 
 def gemini_model_complete(
@@ -239,65 +644,74 @@ def gemini_model_complete(
     Returns:
         Generated text
     """
-    llm = GeminiLLM(model_name=model_name)
+    llm = get_gemini_llm(model_name=model_name)
     return llm(prompt, **kwargs)
 
 
 async def gemini_model_complete_async(
     prompt: str,
     model_name: str = "gemini-2.0-flash-exp",
+    stream: bool = False,
     **kwargs
-) -> str:
+) -> Union[str, AsyncIterator[str]]:
     """
     LightRAG-compatible async completion function using Gemini
 
     Args:
         prompt: Input prompt
         model_name: Gemini model name
+        stream: Return an async iterator of text deltas instead of the full
+            text (LightRAG passes this for QueryParam(stream=True))
         **kwargs: Additional parameters
 
     Returns:
-        Generated text
+        Generated text, or an async iterator of text deltas if stream is set
     """
-    llm = GeminiLLM(model_name=model_name)
+    llm = get_gemini_llm(model_name=model_name)
+    if stream:
+        return llm.astream(prompt, **kwargs)
     return await llm.acall(prompt, **kwargs)
 
 
 def gemini_embedding(
     texts: List[str],
     model_name: str = "models/text-embedding-004",
+    output_dimensionality: Optional[int] = None,
     **kwargs
-) -> List[List[float]]:
+) -> np.ndarray:
     """
     LightRAG-compatible embedding function using Gemini
 
     Args:
         texts: List of texts to embed
         model_name: Gemini embedding model name
+        output_dimensionality: Truncated embedding size (None: full size)
         **kwargs: Additional parameters
 
     Returns:
-        List of embedding vectors
+        float32 array of embedding vectors
     """
-    embedding = GeminiEmbedding(model_name=model_name)
+    embedding = get_gemini_embedding(model_name, output_dimensionality)
     return embedding(texts, **kwargs)
 
 
 async def gemini_embedding_async(
     texts: List[str],
     model_name: str = "models/text-embedding-004",
+    output_dimensionality: Optional[int] = None,
     **kwargs
-) -> List[List[float]]:
+) -> np.ndarray:
     """
     LightRAG-compatible async embedding function using Gemini
 
     Args:
         texts: List of texts to embed
         model_name: Gemini embedding model name
+        output_dimensionality: Truncated embedding size (None: full size)
         **kwargs: Additional parameters
 
     Returns:
-        List of embedding vectors
+        float32 array of embedding vectors
     """
-    embedding = GeminiEmbedding(model_name=model_name)
+    embedding = get_gemini_embedding(model_name, output_dimensionality)
     return await embedding.acall(texts, **kwargs)
@@ -0,0 +1,201 @@
+"""
+Ingest Journal - Checkpoints of LightRAG ingestion progress
+
+An append-only JSON Lines file in the LightRAG working directory records
+every document whose entity extraction and graph merge completed, and every
+document that failed. A rerun of ingest_lightrag.py skips completed documents
+and retries failed ones, so an ingestion interrupted by a quota error or a
+crash resumes where it stopped instead of paying for finished documents again.
+
+Each line is flushed and fsynced as it is written, so a crash loses at most
+the documents still in flight. On load, completed entries are checked against
+LightRAG's document status store, so a journal that outlived its storage
+never skips a document the graph does not contain.
+"""
+
+import os
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = "ingest_journal.jsonl"
+
+# LightRAG DocStatus values
+PROCESSED = "processed"
+FAILED = "failed"
+
+# Journal-only status of a document deleted from the storage (see source_manifest.delete_documents)
+DELETED = "deleted"
+
+
+def _status_value(status: Any) -> str:
+    """DocStatus enum member or plain string to its string value"""
+    return str(getattr(status, "value", status))
+
+
+async def get_document_statuses(rag: Any, doc_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up documents in LightRAG's document status store
+
+    Args:
+        rag: Initialized LightRAG instance
+        doc_ids: Document IDs
+
+    Returns:
+        Status record (with a string "status") per ID that LightRAG knows
+    """
+    doc_ids = list(doc_ids)
+    if not doc_ids:
+        return {}
+    records = await rag.doc_status.get_by_ids(doc_ids)
+    statuses = {}
+    for doc_id, record in zip(doc_ids, records):
+        if record is None:
+            continue
+        if not isinstance(record, dict):
+            record = vars(record)
+        statuses[doc_id] = {**record, "status": _status_value(record.get("status"))}
+    return statuses
+
+
+class IngestJournal:
+    """Durable record of completed and failed documents in a working directory"""
+
+    def __init__(self, working_dir: str, filename: str = JOURNAL_FILE):
+        """
+        Load the journal (a missing file is an empty journal)
+
+        Args:
+            working_dir: LightRAG working directory
+            filename: Journal file name inside working_dir
+        """
+        self.path = os.path.join(working_dir, filename)
+        # Latest entry per document ID
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # IDs inserted this run whose outcome is not known yet
+        self._unconfirmed: Dict[str, Dict[str, str]] = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry["id"]] = entry
+                    except (ValueError, KeyError, TypeError):
+                        # A crash can leave a torn last line
+                        logger.warning(f"Skipping unreadable line {line_number} of {self.path}")
+
+    @property
+    def completed(self) -> Set[str]:
+        """IDs of documents whose extraction and graph merge completed"""
+        return {doc_id for doc_id, entry in self.entries.items() if entry["status"] == PROCESSED}
+
+    @property
+    def failed(self) -> Set[str]:
+        """IDs of documents whose latest attempt failed"""
+        return {doc_id for doc_id, entry in self.entries.items() if entry["status"] == FAILED}
+
+    def is_completed(self, doc_id: str) -> bool:
+        entry = self.entries.get(doc_id)
+        return entry is not None and entry["status"] == PROCESSED
+
+    def record(self, doc: Dict[str, str], status: str, error: Optional[str] = None):
+        """
+        Append an entry and flush it to disk
+
+        Args:
+            doc: Document dict with "id" and "file_path"
+            status: "processed", "failed" or "deleted"
+            error: Failure reason, for failed documents
+        """
+        entry = {
+            "id": doc["id"],
+            "file_path": doc["file_path"],
+            "status": status,
+            "time": time.time(),
+        }
+        if error:
+            entry["error"] = error
+        self.entries[doc["id"]] = entry
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def verify(self, rag: Any) -> int:
+        """
+        Forget completed entries that LightRAG's storage does not confirm
+
+        Args:
+            rag: Initialized LightRAG instance
+
+        Returns:
+            Number of completed entries dropped
+        """
+        completed = self.completed
+        statuses = await get_document_statuses(rag, completed)
+        stale = [
+            doc_id for doc_id in completed
+            if statuses.get(doc_id, {}).get("status") != PROCESSED
+        ]
+        for doc_id in stale:
+            del self.entries[doc_id]
+        if stale:
+            logger.warning(
+                f"{len(stale)} journaled documents are not in the LightRAG storage; they will be re-inserted"
+            )
+        return len(stale)
+
+    async def checkpoint(
+        self,
+        rag: Any,
+        docs: Optional[List[Dict[str, str]]] = None,
+        final: bool = False,
+    ) -> int:
+        """
+        Journal the outcome of inserted documents once LightRAG has one
+
+        A concurrent ainsert call may only enqueue its documents for another
+        call's processing loop, so documents whose status is still pending
+        are kept and checked again at the next checkpoint.
+
+        Args:
+            rag: LightRAG instance
+            docs: Documents just passed to ainsert
+            final: Last checkpoint of the run; documents without a final
+                status are journaled as failed
+
+        Returns:
+            Number of documents journaled as failed
+        """
+        for doc in docs or []:
+            self._unconfirmed[doc["id"]] = doc
+        statuses = await get_document_statuses(rag, self._unconfirmed)
+
+        failed = 0
+        for doc_id, doc in list(self._unconfirmed.items()):
+            record = statuses.get(doc_id)
+            status = record["status"] if record else None
+            if status == PROCESSED:
+                self.record(doc, PROCESSED)
+            elif status == FAILED:
+                error = record.get("error_msg") or record.get("error")
+                self.record(doc, FAILED, error=str(error) if error else None)
+                failed += 1
+            elif final:
+                self.record(doc, FAILED, error=f"not processed (status: {status or 'missing'})")
+                failed += 1
+            else:
+                continue
+            del self._unconfirmed[doc_id]
+        return failed
+
+    def reset(self):
+        """Delete the journal, so the next run re-inserts everything"""
+        self.entries.clear()
+        self._unconfirmed.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
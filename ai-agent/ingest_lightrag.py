@@ -13,11 +13,14 @@ Uses Google's Gemini models:
 """
 
 import os
+import time
 import asyncio
+import hashlib
 import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 # Initialize logger
 logging.basicConfig(
@@ -27,12 +30,12 @@ logger = logging.getLogger(__name__)
 
 # Import document processors from existing script
 from ingest_portfolio_rag import (
-    process_markdown_file,
-    process_txt_file,
-    process_docx_file,
-    process_pdf_file,
+    calculate_file_hash,
+    parse_local_file,
     process_github_repo,
     get_user_repos,
+    create_ocr_pool,
+    create_parse_cache,
 )
 
 # LightRAG
@@ -45,7 +48,33 @@ except ImportError:
     logger.error("LightRAG not installed. Install with: pip install lightrag-hku")
 
 # Gemini models
-from gemini_llm import gemini_model_complete_async, gemini_embedding_async
+from gemini_llm import (
+    gemini_model_complete_async,
+    finalize_lightrag,
+    configure_response_cache,
+    configure_rate_limits,
+    configure_backend,
+    get_backend,
+    get_gemini_stats,
+    get_usage_tracker,
+)
+from usage_tracker import caller_tag
+from ingest_journal import IngestJournal, FAILED, PROCESSED
+from source_manifest import (
+    delete_documents,
+    find_stored_document,
+    load_source_manifest,
+    merge_source_manifest,
+    plan_sync,
+    save_source_manifest,
+    stored_file_name,
+)
+from embedding_backends import (
+    create_embedding_func,
+    resolve_embedding_config,
+    save_embedding_config,
+)
+from lightrag_storage import resolve_storage_config, save_storage_config
 
 # Environment
 from dotenv import load_dotenv
@@ -53,15 +82,44 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-async def process_documents_for_lightrag(
+def make_document_id(file_path: str, content: str) -> str:
+    """
+    Stable LightRAG document ID derived from a document's source and content
+
+    Re-ingesting an unchanged document yields the same ID, so LightRAG skips
+    it; a changed document gets a new one.
+
+    Args:
+        file_path: Source path recorded for the document
+        content: Document text
+
+    Returns:
+        ID of the form "doc-<32 hex chars>"
+    """
+    digest = hashlib.sha256(f"{file_path}\n{content}".encode("utf-8")).hexdigest()
+    return f"doc-{digest[:32]}"
+
+
+def make_lightrag_document(file_path: str, content: str) -> Dict[str, str]:
+    """Build the {"id", "file_path", "content"} dict inserted into LightRAG"""
+    return {
+        "id": make_document_id(file_path, content),
+        "file_path": file_path,
+        "content": content,
+    }
+
+
+def list_document_sources(
     source_directory: str,
     github_repos: List[str] = None,
     github_user: str = None,
     github_token: str = None,
     enable_github: bool = False,
-) -> str:
+) -> List[Tuple[str, str]]:
     """
-    Process all documents and combine into a single text for LightRAG ingestion.
+    List the units of parsing work: local files and GitHub repositories
+
+    Listing a user's repositories calls the GitHub API, so this blocks.
 
     Args:
         source_directory: Directory containing documents
@@ -71,86 +129,521 @@ async def process_documents_for_lightrag(
         enable_github: Enable GitHub repository extraction
 
     Returns:
-        Combined text from all documents
+        ("file", path) and ("github", "owner/repo") tuples
     """
-    all_text = []
-
-    # Process local documents
+    sources = []
     if os.path.isdir(source_directory):
         supported_extensions = (".md", ".markdown", ".txt", ".docx", ".pdf")
-        source_files = []
-
         for root, dirs, files in os.walk(source_directory):
             for f in files:
                 if f.lower().endswith(supported_extensions):
-                    full_path = os.path.join(root, f)
-                    source_files.append(full_path)
+                    sources.append(("file", os.path.join(root, f)))
+        logger.info(f"Found {len(sources)} local files")
+
+    # GitHub repositories (only if enabled)
+    if enable_github:
+        repos = list(github_repos or [])
+        if github_user:
+            logger.info(f"Fetching repositories for user: {github_user}")
+            repos.extend(get_user_repos(github_user, github_token) or [])
+        if repos:
+            logger.info(f"Found {len(repos)} GitHub repositories")
+        sources.extend(("github", repo_name) for repo_name in repos)
+
+    return sources
+
 
-        logger.info(f"Processing {len(source_files)} local files...")
+def parse_document_source(
+    source: Tuple[str, str],
+    source_directory: str,
+    github_token: str = None,
+    parse_cache=None,
+    ocr_pool=None,
+) -> List[Dict[str, str]]:
+    """
+    Parse one local file or GitHub repository into LightRAG documents
+
+    A local file becomes one document; multi-page PDFs are joined with
+    "--- Page N ---" markers. A repository becomes one document per file.
+    Blocking (file parsing, OCR, GitHub API), so the pipeline runs it in a
+    thread pool.
+
+    Args:
+        source: ("file", path) or ("github", "owner/repo") from list_document_sources
+        source_directory: Directory local paths are recorded relative to
+        github_token: Optional GitHub token for API authentication
+        parse_cache: Optional parsed-document cache (see create_parse_cache)
+        ocr_pool: Optional DolphinOCRPool for scanned PDF pages
+
+    Returns:
+        Dicts with "id", "file_path" and "content" (see make_lightrag_document)
+    """
+    kind, name = source
+    if kind == "github":
+        logger.info(f"Fetching repository: {name}")
+        github_docs = process_github_repo(repo_name=name, github_token=github_token)
+        documents = []
+        for doc in github_docs:
+            source_file = doc.metadata.get("source_file", "unknown")
+            content = doc.page_content.strip()
+            if content:
+                documents.append(make_lightrag_document(f"github:{name}/{source_file}", content))
+        logger.info(f"Processed {len(github_docs)} files from {name}")
+        return documents
+
+    relative_path = os.path.relpath(name, source_directory)
+    content_hash = calculate_file_hash(name)
+    if not content_hash:
+        return []
 
-        for filepath in source_files:
-            relative_path = os.path.relpath(filepath, source_directory)
-            file_ext = filepath.lower()
+    documents = parse_local_file(
+        name,
+        relative_path,
+        content_hash,
+        parse_cache=parse_cache,
+        ocr_pool=ocr_pool,
+    )
 
-            documents = []
+    # PDFs are parsed one Document per page
+    parts = []
+    for doc in documents:
+        page = doc.metadata.get("page")
+        if page and len(documents) > 1:
+            parts.append(f"--- Page {page} ---\n{doc.page_content}")
+        else:
+            parts.append(doc.page_content)
+    content = "\n\n".join(parts).strip()
 
-            if file_ext.endswith((".md", ".markdown")):
-                documents = process_markdown_file(filepath, relative_path, "")
-            elif file_ext.endswith(".txt"):
-                documents = process_txt_file(filepath, relative_path, "")
-            elif file_ext.endswith(".docx"):
-                documents = process_docx_file(filepath, relative_path, "")
-            elif file_ext.endswith(".pdf"):
-                documents = process_pdf_file(filepath, relative_path, "")
+    if not content:
+        return []
+    logger.info(f"Processed {name}")
+    return [make_lightrag_document(relative_path, content)]
+
+
+async def produce_documents(
+    queue: asyncio.Queue,
+    sources: List[Tuple[str, str]],
+    source_directory: str,
+    github_token: str = None,
+    parse_cache=None,
+    ocr_pool=None,
+    parse_workers: int = 4,
+):
+    """
+    Parse sources in a thread pool and put their documents on the queue
+
+    Up to parse_workers sources are parsed at once. Putting on a full queue
+    waits, so parsing never runs more than the queue size ahead of
+    insertion. A source that fails to parse is logged and skipped.
+
+    Args:
+        queue: Bounded queue consumed by insert_worker
+        sources: Sources from list_document_sources
+        source_directory: Directory local paths are recorded relative to
+        github_token: Optional GitHub token for API authentication
+        parse_cache: Optional parsed-document cache (see create_parse_cache)
+        ocr_pool: Optional DolphinOCRPool for scanned PDF pages
+        parse_workers: Number of parser threads
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix="lightrag-parse")
+    semaphore = asyncio.Semaphore(parse_workers)
 
+    async def produce(source: Tuple[str, str]):
+        async with semaphore:
+            try:
+                documents = await loop.run_in_executor(
+                    executor,
+                    parse_document_source,
+                    source,
+                    source_directory,
+                    github_token,
+                    parse_cache,
+                    ocr_pool,
+                )
+            except Exception as e:
+                logger.error(f"Error parsing {source[1]}: {e}")
+                return
+            # Hold the parser slot until the queue has room (backpressure)
             for doc in documents:
-                # Add source context
-                source_info = f"\n\n--- Source: {relative_path} ---\n"
-                all_text.append(source_info + doc.page_content)
+                await queue.put(doc)
 
-            if documents:
-                logger.info(f"Processed {filepath}")
+    try:
+        await asyncio.gather(*(produce(source) for source in sources))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    # Process GitHub repositories (only if enabled)
-    if enable_github:
-        if github_user:
-            logger.info(f"Fetching repositories for user: {github_user}")
-            user_repos = get_user_repos(github_user, github_token)
-            if user_repos:
-                if github_repos:
-                    github_repos.extend(user_repos)
+
+async def insert_batch(
+    rag: "LightRAG",
+    batch: List[Dict[str, str]],
+    stats: Dict[str, int],
+    journal: Optional[IngestJournal] = None,
+) -> List[Dict[str, str]]:
+    """
+    Insert one batch of documents with a single ainsert call
+
+    If the batch fails, its documents are retried one at a time, so a bad
+    document only loses itself.
+
+    Args:
+        rag: LightRAG instance
+        batch: Documents to insert
+        stats: Counters updated in place (see insert_worker)
+        journal: Optional journal the failed documents are recorded in
+
+    Returns:
+        The documents LightRAG accepted
+    """
+
+    async def insert(docs: List[Dict[str, str]]):
+        await rag.ainsert(
+            [doc["content"] for doc in docs],
+            ids=[doc["id"] for doc in docs],
+            file_paths=[doc["file_path"] for doc in docs],
+        )
+
+    def fail(doc: Dict[str, str], error: Exception):
+        stats["failed_documents"] += 1
+        if journal is not None:
+            journal.record(doc, FAILED, error=str(error))
+
+    try:
+        await insert(batch)
+        return batch
+    except Exception as e:
+        logger.error(f"Error inserting batch of {len(batch)} documents: {e}")
+        stats["failed_batches"] += 1
+        if len(batch) == 1:
+            fail(batch[0], e)
+            return []
+
+    # Retry one by one to isolate the failing documents
+    accepted = []
+    for doc in batch:
+        try:
+            await insert([doc])
+            accepted.append(doc)
+        except Exception as e:
+            logger.error(f"Error inserting {doc['file_path']}: {e}")
+            fail(doc, e)
+    return accepted
+
+
+async def find_name_holder(
+    rag: "LightRAG", doc: Dict[str, str], names: Dict[str, str]
+) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Find the document already holding the name LightRAG stores doc under
+
+    LightRAG 1.5 keeps one document per file name and records any other
+    document inserted under that name as a failed duplicate, so doc can only
+    be inserted while its name is free.
+
+    Args:
+        rag: LightRAG instance
+        doc: Document about to be inserted
+        names: Document ID per stored name claimed this run, shared by all workers
+
+    Returns:
+        (document ID, status) of the holder (status None for a document of
+        this run not inserted yet), or None if the name is free
+    """
+    claimed = names.setdefault(stored_file_name(doc["file_path"]), doc["id"])
+    if claimed != doc["id"]:
+        return claimed, None
+    return await find_stored_document(rag, doc["file_path"])
+
+
+async def insert_worker(
+    rag: "LightRAG",
+    queue: asyncio.Queue,
+    stats: Dict[str, int],
+    seen: Dict[str, str],
+    batch_size: int = 16,
+    journal: Optional[IngestJournal] = None,
+    names: Optional[Dict[str, str]] = None,
+    deferred: Optional[List[Tuple[Dict[str, str], str]]] = None,
+):
+    """
+    Insert documents from the queue until it yields the None sentinel
+
+    Each batch is whatever is already queued, up to batch_size, so the first
+    document is inserted as soon as it is parsed and batches grow when
+    parsing runs ahead of insertion. Documents the journal lists as
+    completed are skipped, and each batch's outcome is checkpointed to it.
+    A document whose name LightRAG already stores for another document is
+    not inserted but deferred, since LightRAG would refuse it (see
+    insert_deferred_documents).
+
+    Args:
+        rag: LightRAG instance
+        queue: Queue filled by produce_documents
+        stats: Counts of "documents", "characters", "failed_documents",
+            "failed_batches" and "skipped_documents", shared by all workers
+            and updated in place
+        seen: File path per document ID already taken by a worker, shared by all workers
+        batch_size: Maximum documents per ainsert call
+        journal: Optional ingestion journal to resume from and checkpoint to
+        names: Document ID per stored name claimed this run, shared by all workers
+        deferred: List the (document, ID of the holder of its name) pairs are appended to
+    """
+    names = {} if names is None else names
+    deferred = [] if deferred is None else deferred
+    done = False
+    while not done:
+        batch: List[Dict[str, str]] = []
+        doc = await queue.get()
+        while True:
+            if doc is None:
+                done = True
+                break
+            # LightRAG rejects duplicate IDs within one ainsert call
+            if doc["id"] in seen:
+                pass
+            elif journal is not None and journal.is_completed(doc["id"]):
+                seen[doc["id"]] = doc["file_path"]
+                stats["skipped_documents"] += 1
+            else:
+                seen[doc["id"]] = doc["file_path"]
+                holder = await find_name_holder(rag, doc, names)
+                if holder is None:
+                    stats["documents"] += 1
+                    stats["characters"] += len(doc["content"])
+                    batch.append(doc)
+                elif holder == (doc["id"], PROCESSED):
+                    # Completed by a run whose journal entry was lost or reset
+                    if journal is not None:
+                        journal.record(doc, PROCESSED)
+                    stats["skipped_documents"] += 1
                 else:
-                    github_repos = user_repos
-
-        if github_repos:
-            logger.info(f"Processing {len(github_repos)} GitHub repositories...")
-            for repo_name in github_repos:
-                logger.info(f"Fetching repository: {repo_name}")
-                github_docs = process_github_repo(
-                    repo_name=repo_name, github_token=github_token
-                )
+                    deferred.append((doc, holder[0]))
+            if len(batch) >= batch_size:
+                break
+            try:
+                doc = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+        if batch:
+            accepted = await insert_batch(rag, batch, stats, journal)
+            if journal is not None:
+                stats["failed_documents"] += await journal.checkpoint(rag, accepted)
 
-                for doc in github_docs:
-                    source_info = f"\n\n--- GitHub: {repo_name} - {doc.metadata.get('source_file', 'unknown')} ---\n"
-                    all_text.append(source_info + doc.page_content)
 
-                logger.info(f"Processed {len(github_docs)} files from {repo_name}")
+async def insert_documents(
+    rag: "LightRAG",
+    sources: List[Tuple[str, str]],
+    source_directory: str,
+    github_token: str = None,
+    parse_cache=None,
+    ocr_workers: int = 1,
+    parse_workers: int = 4,
+    insert_workers: int = 2,
+    batch_size: int = 16,
+    queue_size: Optional[int] = None,
+    journal: Optional[IngestJournal] = None,
+    documents: Optional[Dict[str, str]] = None,
+    deferred: Optional[List[Tuple[Dict[str, str], str]]] = None,
+) -> Dict[str, int]:
+    """
+    Parse sources and insert their documents into LightRAG, overlapped
 
-    combined_text = "\n\n".join(all_text)
-    logger.info(f"Total text length: {len(combined_text)} characters")
+    Parser threads feed a bounded queue that concurrent insertion workers
+    drain, so LLM extraction of the first documents runs while later ones
+    are still being parsed. Each ainsert call carries explicit IDs and file
+    paths, so LightRAG skips documents it already has; documents enqueued by
+    concurrent calls are processed by LightRAG's single pipeline loop.
 
-    return combined_text
+    Args:
+        rag: LightRAG instance
+        sources: Sources from list_document_sources
+        source_directory: Directory local paths are recorded relative to
+        github_token: Optional GitHub token for API authentication
+        parse_cache: Optional parsed-document cache (see create_parse_cache)
+        ocr_workers: Number of processes for Dolphin OCR of scanned PDF pages
+        parse_workers: Number of parser threads
+        insert_workers: Number of concurrent insertion workers
+        batch_size: Maximum documents per ainsert call
+        queue_size: Parsed documents buffered ahead of insertion
+            (None: 2 * insert_workers * batch_size)
+        journal: Optional ingestion journal; completed documents are skipped
+            and the outcome of the others is recorded
+        documents: Optional dict filled with the ID of every parsed document
+            per file path, including skipped and deferred ones
+        deferred: Optional list filled with the documents not inserted
+            because another document holds their name, each with the ID of
+            that document (see insert_deferred_documents)
+
+    Returns:
+        Counts of "documents" (inserted this run), "characters",
+        "failed_documents", "failed_batches" and "skipped_documents"
+        (completed in an earlier run)
+    """
+    stats = {
+        "documents": 0,
+        "characters": 0,
+        "failed_documents": 0,
+        "failed_batches": 0,
+        "skipped_documents": 0,
+    }
+    seen: Dict[str, str] = {}
+    names: Dict[str, str] = {}
+    deferred = [] if deferred is None else deferred
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or 2 * insert_workers * batch_size)
+
+    async def produce():
+        try:
+            await produce_documents(
+                queue,
+                sources,
+                source_directory,
+                github_token=github_token,
+                parse_cache=parse_cache,
+                ocr_pool=ocr_pool,
+                parse_workers=parse_workers,
+            )
+        finally:
+            # Cancelled only once every worker has exited: none needs a sentinel
+            if not asyncio.current_task().cancelling():
+                for _ in range(insert_workers):
+                    await queue.put(None)
+
+    def on_worker_done(_):
+        # Workers only exit before their sentinel by failing; with none left
+        # to drain the queue, a producer waiting for room would wait forever
+        if all(worker.done() for worker in workers):
+            producer.cancel()
+
+    has_local_files = any(kind == "file" for kind, _ in sources)
+    ocr_pool = create_ocr_pool(ocr_workers) if has_local_files else None
+    try:
+        producer = asyncio.ensure_future(produce())
+        workers = [
+            asyncio.ensure_future(insert_worker(
+                rag, queue, stats, seen, batch_size, journal, names, deferred
+            ))
+            for _ in range(insert_workers)
+        ]
+        for worker in workers:
+            worker.add_done_callback(on_worker_done)
+        results = await asyncio.gather(*workers, return_exceptions=True)
+        # A producer cancelled after the workers exited has nothing to report
+        await asyncio.wait([producer])
+        if not producer.cancelled() and producer.exception() is not None:
+            results.append(producer.exception())
+    finally:
+        if ocr_pool is not None:
+            ocr_pool.close()
+
+    if documents is not None:
+        documents.update({file_path: doc_id for doc_id, file_path in seen.items()})
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    if journal is not None:
+        stats["failed_documents"] += await journal.checkpoint(rag, final=True)
+    return stats
+
+
+async def insert_deferred_documents(
+    rag: "LightRAG",
+    deferred: List[Tuple[Dict[str, str], str]],
+    manifest: Dict[str, List[str]],
+    documents: Dict[str, str],
+    stats: Dict[str, int],
+    batch_size: int = 16,
+    journal: Optional[IngestJournal] = None,
+) -> List[Dict[str, str]]:
+    """
+    Insert the deferred documents whose name is free by now
+
+    Runs once the documents that were to give up their name have been
+    deleted (see run_lightrag_ingestion). A document whose name is still
+    held is not inserted: LightRAG would only record it as a failed
+    duplicate. It is logged with the reason and counted in
+    stats["name_conflicts"], not as a failed document.
+
+    Args:
+        rag: LightRAG instance
+        deferred: (document, ID of the holder of its name) pairs from insert_documents
+        manifest: Document IDs per source file path, to name the holder's source
+        documents: Document ID per source file path parsed this run, likewise
+        stats: Counters updated in place (see insert_documents)
+        batch_size: Maximum documents per ainsert call
+        journal: Optional journal the outcome of the documents is recorded in
+
+    Returns:
+        The documents that were not inserted
+    """
+    sources = {doc_id: file_path for file_path, ids in manifest.items() for doc_id in ids}
+    sources.update({doc_id: file_path for file_path, doc_id in documents.items()})
+    names: Dict[str, str] = {}
+    free = []
+    skipped = []
+    for doc, _ in deferred:
+        holder = await find_name_holder(rag, doc, names)
+        if holder is None:
+            free.append(doc)
+            continue
+        skipped.append(doc)
+        stats["name_conflicts"] += 1
+        holder_id = holder[0]
+        holder_source = sources.get(holder_id)
+        if holder_source == doc["file_path"]:
+            logger.warning(
+                f"{doc['file_path']} changed since it was ingested, but LightRAG keeps one "
+                f"document per file name and still stores {holder_id}; rerun with --sync to replace it"
+            )
+        else:
+            logger.warning(
+                f"Skipping {doc['file_path']}: LightRAG stores documents by file name and "
+                f"{stored_file_name(doc['file_path'])} is taken by {holder_id} "
+                f"({holder_source or 'unknown source'})"
+            )
+
+    for start in range(0, len(free), batch_size):
+        batch = free[start:start + batch_size]
+        stats["documents"] += len(batch)
+        stats["characters"] += sum(len(doc["content"]) for doc in batch)
+        accepted = await insert_batch(rag, batch, stats, journal)
+        if journal is not None:
+            stats["failed_documents"] += await journal.checkpoint(rag, accepted)
+    if journal is not None and free:
+        stats["failed_documents"] += await journal.checkpoint(rag, final=True)
+    return skipped
 
 
 async def run_lightrag_ingestion(
     source_dir: str,
     output_dir: str,
     llm_model: str = "gemini-2.0-flash-exp",
-    embedding_model: str = "models/text-embedding-004",
+    embedding_model: Optional[str] = None,
     github_repos: List[str] = None,
     github_user: str = None,
     github_token: str = None,
     enable_github: bool = False,
+    ocr_workers: int = 1,
+    parse_cache_dir: Optional[str] = "./data/parse_cache",
+    parse_cache_max_mb: float = 512,
+    llm_cache_dir: Optional[str] = "./data/llm_cache",
+    llm_cache_ttl_hours: Optional[float] = 24 * 30,
+    llm_cache_max_mb: float = 256,
+    llm_rpm: Optional[float] = None,
+    llm_tpm: Optional[float] = None,
+    embedding_rpm: Optional[float] = None,
+    llm_max_async: int = 4,
+    backend: Optional[str] = None,
+    embedding_backend: Optional[str] = None,
+    embedding_dim: Optional[int] = None,
+    insert_batch_size: int = 16,
+    parse_workers: int = 4,
+    insert_workers: int = 2,
+    resume: bool = True,
+    sync: bool = False,
+    storage: Optional[str] = None,
+    kv_storage: Optional[str] = None,
+    vector_storage: Optional[str] = None,
+    graph_storage: Optional[str] = None,
 ):
     """
     Main LightRAG ingestion function.
@@ -159,11 +652,38 @@ async def run_lightrag_ingestion(
         source_dir: Directory with source documents
         output_dir: Output directory for LightRAG knowledge graph
         llm_model: Gemini model for text generation
-        embedding_model: Gemini model for embeddings
+        embedding_model: Embedding model (None: the backend's default)
         github_repos: List of GitHub repositories to ingest
         github_user: GitHub username to fetch all public repos from
         github_token: Optional GitHub token for API authentication
         enable_github: Enable GitHub repository extraction
+        ocr_workers: Number of processes for Dolphin OCR of scanned PDF pages
+        parse_cache_dir: Directory for the parsed-document cache (None disables it)
+        parse_cache_max_mb: Size limit of the parsed-document cache in megabytes
+        llm_cache_dir: Directory for the Gemini response cache (None disables it)
+        llm_cache_ttl_hours: Expiry of Gemini response cache entries in hours
+        llm_cache_max_mb: Size limit of the Gemini response cache in megabytes
+        llm_rpm: Requests-per-minute quota of the LLM model (None: unlimited)
+        llm_tpm: Tokens-per-minute quota of the LLM model (None: unlimited)
+        embedding_rpm: Requests-per-minute quota of the embedding model (None: unlimited)
+        llm_max_async: Maximum concurrent LLM calls LightRAG makes during extraction
+        backend: Gemini backend ("google" or "fake"; None keeps the configured one)
+        embedding_backend: "gemini" or "local" (None: the one output_dir was built with)
+        embedding_dim: Truncate Gemini embeddings to this many dimensions
+            (None: the size output_dir was built with, else full size)
+        insert_batch_size: Maximum documents per LightRAG ainsert call
+        parse_workers: Number of threads parsing documents
+        insert_workers: Number of concurrent LightRAG insertion workers
+        resume: Skip documents the ingestion journal in output_dir lists as
+            completed (False: start a new journal)
+        sync: Also delete the documents of removed sources and replace the
+            old versions of changed ones, so the storage matches the sources
+            (without it, a changed source keeps its old version)
+        storage: Storage preset, "default" or "local" (None: the one
+            output_dir was built with, else default)
+        kv_storage: Override of the LightRAG key-value backend
+        vector_storage: Override of the LightRAG vector backend
+        graph_storage: Override of the LightRAG graph backend
     """
     if not LIGHTRAG_AVAILABLE:
         logger.error("LightRAG is not available. Cannot proceed.")
@@ -173,91 +693,231 @@ async def run_lightrag_ingestion(
     logger.info(f"Source directory: {source_dir}")
     logger.info(f"Output directory: {output_dir}")
     logger.info(f"LLM model: {llm_model}")
-    logger.info(f"Embedding model: {embedding_model}")
+
+    embedding_config = resolve_embedding_config(
+        output_dir, embedding_backend, embedding_model, embedding_dim
+    )
+    logger.info(f"Embedding: {embedding_config.backend} ({embedding_config.model})")
+
+    try:
+        storage_config = resolve_storage_config(
+            output_dir, storage, kv_storage, vector_storage, graph_storage
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        return {"status": "error", "message": str(e)}
+    logger.info(f"Storage: {storage_config.lightrag_kwargs()}")
+
+    if backend is not None:
+        configure_backend(backend)
 
     # Check for API key
     api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
+    if get_backend() == "google" and not api_key:
         logger.error("GOOGLE_API_KEY not found in environment variables")
         return {"status": "error", "message": "GOOGLE_API_KEY not set"}
 
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
 
+    # Account tokens and latency of this run's Gemini calls
+    get_usage_tracker().reset()
+
+    # Replay Gemini answers for prompts seen in earlier runs
+    configure_response_cache(llm_cache_dir, llm_cache_ttl_hours, llm_cache_max_mb)
+
+    # Throttle to the API quota; retries with backoff are always on
+    configure_rate_limits(
+        llm_model, rpm=llm_rpm, tpm=llm_tpm, initial_concurrency=llm_max_async
+    )
+    if embedding_config.backend == "gemini":
+        configure_rate_limits(embedding_config.model, rpm=embedding_rpm)
+
     # Initialize LightRAG with Gemini models
     try:
         logger.info("Initializing LightRAG...")
+        init_start = time.perf_counter()
 
         # Create wrapper functions for LightRAG
         async def llm_model_func(prompt, **kwargs):
             return await gemini_model_complete_async(prompt, model_name=llm_model, **kwargs)
 
-        async def embedding_func(texts):
-            if isinstance(texts, str):
-                texts = [texts]
-            embeddings = await gemini_embedding_async(texts, model_name=embedding_model)
-            return embeddings if len(texts) > 1 else embeddings[0]
+        embedding_func = create_embedding_func(embedding_config)
 
         rag = LightRAG(
             working_dir=output_dir,
             llm_model_func=llm_model_func,
+            llm_model_max_async=llm_max_async,
             embedding_func=EmbeddingFunc(
-                embedding_dim=768,  # text-embedding-004 dimension
+                embedding_dim=embedding_config.dim,
                 max_token_size=8192,
                 func=embedding_func,
             ),
+            **storage_config.lightrag_kwargs(),
         )
 
         # Initialize storages
         await rag.initialize_storages()
-        logger.info("LightRAG initialized successfully")
+        save_embedding_config(output_dir, embedding_config)
+        save_storage_config(output_dir, storage_config)
+        logger.info(f"LightRAG initialized in {time.perf_counter() - init_start:.2f}s")
+
+        # Resume from the documents completed by earlier runs
+        journal = IngestJournal(output_dir)
+        if resume:
+            await journal.verify(rag)
+            if journal.completed:
+                logger.info(
+                    f"Resuming: {len(journal.completed)} documents already completed, "
+                    f"{len(journal.failed)} failed in earlier runs will be retried"
+                )
+        else:
+            journal.reset()
+        manifest = await load_source_manifest(output_dir, rag)
 
     except Exception as e:
         logger.error(f"Error initializing LightRAG: {e}")
         return {"status": "error", "message": f"LightRAG initialization failed: {e}"}
 
-    # Process documents
+    # Parse documents in threads and insert them while parsing continues
     try:
-        logger.info("Processing documents...")
-        combined_text = await process_documents_for_lightrag(
-            source_directory=source_dir,
-            github_repos=github_repos,
-            github_user=github_user,
-            github_token=github_token,
-            enable_github=enable_github,
+        logger.info("Processing documents and inserting them into LightRAG...")
+        loop = asyncio.get_running_loop()
+        sources = await loop.run_in_executor(
+            None,
+            list_document_sources,
+            source_dir,
+            github_repos,
+            github_user,
+            github_token,
+            enable_github,
         )
-
-        if not combined_text or len(combined_text.strip()) < 100:
-            logger.warning("No sufficient text content found to process")
-            await rag.finalize_storages()
-            return {"status": "error", "message": "No documents found to process"}
+        documents: Dict[str, str] = {}
+        deferred: List[Tuple[Dict[str, str], str]] = []
+        with caller_tag("ingest"):
+            insert_stats = await insert_documents(
+                rag,
+                sources,
+                source_dir,
+                github_token=github_token,
+                parse_cache=create_parse_cache(parse_cache_dir, parse_cache_max_mb),
+                ocr_workers=ocr_workers,
+                parse_workers=parse_workers,
+                insert_workers=insert_workers,
+                batch_size=insert_batch_size,
+                journal=journal,
+                documents=documents,
+                deferred=deferred,
+            )
 
     except Exception as e:
         logger.error(f"Error processing documents: {e}")
-        await rag.finalize_storages()
+        await finalize_lightrag(rag)
         return {"status": "error", "message": f"Document processing failed: {e}"}
 
-    # Insert into LightRAG
+    if insert_stats["documents"] == 0 and insert_stats["skipped_documents"] == 0 and not deferred:
+        logger.warning("No text content found to process")
+        await finalize_lightrag(rag)
+        return {"status": "error", "message": "No documents found to process"}
+
+    # LightRAG keeps one document per file name, and refuses deletions while
+    # it is inserting. With the pipeline idle, the documents whose name a
+    # deferred document needs are deleted first: a failed earlier attempt at
+    # the same document, and in sync mode the old version of a changed
+    # source. Sync mode also deletes the documents of removed sources now,
+    # which frees the name of a moved file.
+    insert_stats["name_conflicts"] = 0
+    replaced = {
+        holder_id: doc["file_path"]
+        for doc, holder_id in deferred
+        if holder_id == doc["id"] or (sync and holder_id in manifest.get(doc["file_path"], []))
+    }
+    deleted = 0
     try:
-        logger.info("Inserting documents into LightRAG knowledge graph...")
-        await rag.ainsert(combined_text)
-        logger.info("Documents inserted successfully")
+        if sync:
+            stale, manifest = plan_sync(
+                manifest,
+                documents,
+                local_files=[os.path.relpath(name, source_dir) for kind, name in sources if kind == "file"],
+                github_repos=[name for kind, name in sources if kind == "github"],
+                enable_github=enable_github,
+                # A replacement counts as completed: its old version goes first
+                completed=journal.completed | {
+                    doc["id"] for doc, holder_id in deferred if holder_id in replaced
+                },
+            )
+            stale.update(replaced)
+        else:
+            stale = replaced
+        if stale:
+            logger.info(f"Deleting {len(stale)} stale or replaced documents")
+        with caller_tag("ingest"):
+            deleted, failed_deletions = await delete_documents(rag, stale, journal)
+        if sync:
+            for file_path, ids in failed_deletions.items():
+                manifest.setdefault(file_path, []).extend(ids)
+            # Recorded before the replacements are inserted, so a crash in
+            # between leaves a manifest without the deleted versions
+            save_source_manifest(output_dir, manifest)
+
+        with caller_tag("ingest"):
+            skipped = await insert_deferred_documents(
+                rag, deferred, manifest, documents, insert_stats, insert_batch_size, journal
+            )
+        for doc in skipped:
+            if documents.get(doc["file_path"]) == doc["id"]:
+                del documents[doc["file_path"]]
+            ids = manifest.get(doc["file_path"], [])
+            if doc["id"] in ids:
+                ids.remove(doc["id"])
+                if not ids:
+                    del manifest[doc["file_path"]]
+
+        # Record which documents each source produced
+        if not sync:
+            manifest = merge_source_manifest(manifest, documents)
+        save_source_manifest(output_dir, manifest)
 
     except Exception as e:
-        logger.error(f"Error inserting documents into LightRAG: {e}")
-        await rag.finalize_storages()
-        return {"status": "error", "message": f"LightRAG insertion failed: {e}"}
+        logger.error(f"Error syncing LightRAG storage: {e}")
+        await finalize_lightrag(rag)
+        return {"status": "error", "message": f"Sync failed: {e}"}
+
+    logger.info(
+        f"Inserted {insert_stats['documents'] - insert_stats['failed_documents']} of "
+        f"{insert_stats['documents']} documents ({insert_stats['failed_batches']} failed batches, "
+        f"{insert_stats['skipped_documents']} already completed, "
+        f"{insert_stats['name_conflicts']} skipped for a file name LightRAG already stores)"
+    )
+
+    if insert_stats["documents"] and insert_stats["failed_documents"] == insert_stats["documents"]:
+        await finalize_lightrag(rag)
+        return {
+            "status": "error",
+            "message": "LightRAG insertion failed for every document; rerun to retry them",
+            "journal": journal.path,
+        }
 
     # Finalize
     try:
-        await rag.finalize_storages()
+        logger.info(f"Gemini call stats: {get_gemini_stats()}")
+        usage_path = get_usage_tracker().write_summary(output_dir, "ingest")
+        logger.info(f"Gemini usage summary written to {usage_path}")
+        await finalize_lightrag(rag)
         logger.info("LightRAG ingestion completed successfully")
 
         return {
             "status": "success",
-            "message": f"Processed documents into knowledge graph",
+            "message": f"Processed {insert_stats['documents']} documents into knowledge graph",
             "output_dir": output_dir,
-            "text_length": len(combined_text),
+            "documents": insert_stats["documents"],
+            "failed_documents": insert_stats["failed_documents"],
+            "skipped_documents": insert_stats["skipped_documents"],
+            "name_conflicts": insert_stats["name_conflicts"],
+            "deleted_documents": deleted,
+            "journal": journal.path,
+            "text_length": insert_stats["characters"],
+            "usage_summary": usage_path,
         }
 
     except Exception as e:
@@ -287,8 +947,66 @@ def main():
     )
     parser.add_argument(
         "--embedding_model",
-        default="models/text-embedding-004",
-        help="Gemini model for embeddings.",
+        help="Embedding model (default: models/text-embedding-004 for gemini, "
+        "sentence-transformers/all-MiniLM-L6-v2 for local).",
+    )
+    parser.add_argument(
+        "--embedding_backend",
+        choices=["gemini", "local"],
+        help="Embed with the Gemini API or a local sentence-transformers model "
+        "(default: the backend the output directory was built with, else gemini).",
+    )
+    parser.add_argument(
+        "--embedding_dim",
+        type=int,
+        help="Truncate Gemini embeddings to this many dimensions, e.g. 256 or 512 "
+        "(default: the size the output directory was built with, else 768).",
+    )
+    parser.add_argument(
+        "--insert_batch_size",
+        type=int,
+        default=16,
+        help="Maximum documents per LightRAG insert call; a failing batch only loses its own documents.",
+    )
+    parser.add_argument(
+        "--parse_workers",
+        type=int,
+        default=4,
+        help="Threads parsing documents while earlier ones are already being inserted.",
+    )
+    parser.add_argument(
+        "--insert_workers",
+        type=int,
+        default=2,
+        help="Concurrent LightRAG insertion workers consuming parsed documents.",
+    )
+    parser.add_argument(
+        "--no_resume",
+        action="store_true",
+        help="Start a new ingestion journal instead of skipping documents completed by earlier runs.",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Delete documents whose source file was removed or changed, so the storage matches the sources.",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["default", "local"],
+        help="LightRAG storage backends: JSON/NanoVectorDB files, or SQLite key-value stores and FAISS "
+        "(default: the backends the output directory was built with, else default).",
+    )
+    parser.add_argument(
+        "--kv_storage",
+        help="Override the LightRAG key-value backend, e.g. SQLiteKVStorage.",
+    )
+    parser.add_argument(
+        "--vector_storage",
+        help="Override the LightRAG vector backend, e.g. FaissVectorDBStorage.",
+    )
+    parser.add_argument(
+        "--graph_storage",
+        help="Override the LightRAG graph backend, e.g. Neo4JStorage (configured through LightRAG's environment variables).",
     )
     parser.add_argument(
         "--enable-github",
@@ -308,6 +1026,76 @@ def main():
         "--github_token",
         help="GitHub personal access token for higher API rate limits (optional)",
     )
+    parser.add_argument(
+        "--ocr_workers",
+        type=int,
+        default=1,
+        help="Worker processes for Dolphin OCR of scanned PDF pages (one model per worker).",
+    )
+    parser.add_argument(
+        "--parse_cache_dir",
+        default="./data/parse_cache",
+        help="Directory for the parsed-document cache.",
+    )
+    parser.add_argument(
+        "--parse_cache_max_mb",
+        type=float,
+        default=512,
+        help="Size limit of the parsed-document cache in megabytes.",
+    )
+    parser.add_argument(
+        "--no_parse_cache",
+        action="store_true",
+        help="Disable the parsed-document cache and re-parse every file.",
+    )
+    parser.add_argument(
+        "--llm_cache_dir",
+        default="./data/llm_cache",
+        help="Directory for the Gemini response cache.",
+    )
+    parser.add_argument(
+        "--llm_cache_ttl_hours",
+        type=float,
+        default=24 * 30,
+        help="Expire Gemini response cache entries after this many hours.",
+    )
+    parser.add_argument(
+        "--llm_cache_max_mb",
+        type=float,
+        default=256,
+        help="Size limit of the Gemini response cache in megabytes.",
+    )
+    parser.add_argument(
+        "--no_llm_cache",
+        action="store_true",
+        help="Disable the Gemini response cache and call the API for every prompt.",
+    )
+    parser.add_argument(
+        "--llm_rpm",
+        type=float,
+        help="Requests-per-minute quota of the LLM model (default: unlimited).",
+    )
+    parser.add_argument(
+        "--llm_tpm",
+        type=float,
+        help="Tokens-per-minute quota of the LLM model (default: unlimited).",
+    )
+    parser.add_argument(
+        "--embedding_rpm",
+        type=float,
+        help="Requests-per-minute quota of the embedding model (default: unlimited).",
+    )
+    parser.add_argument(
+        "--llm_max_async",
+        type=int,
+        default=4,
+        help="Maximum concurrent LLM calls LightRAG makes during entity extraction.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["google", "fake"],
+        help="Gemini backend; 'fake' runs offline with simulated latency (default: GEMINI_BACKEND or google).",
+    )
 
     args = parser.parse_args()
 
@@ -325,6 +1113,28 @@ def main():
             github_user=args.github_user,
             github_token=github_token,
             enable_github=args.enable_github,
+            ocr_workers=args.ocr_workers,
+            parse_cache_dir=None if args.no_parse_cache else args.parse_cache_dir,
+            parse_cache_max_mb=args.parse_cache_max_mb,
+            llm_cache_dir=None if args.no_llm_cache else args.llm_cache_dir,
+            llm_cache_ttl_hours=args.llm_cache_ttl_hours,
+            llm_cache_max_mb=args.llm_cache_max_mb,
+            llm_rpm=args.llm_rpm,
+            llm_tpm=args.llm_tpm,
+            embedding_rpm=args.embedding_rpm,
+            llm_max_async=args.llm_max_async,
+            backend=args.backend,
+            embedding_backend=args.embedding_backend,
+            embedding_dim=args.embedding_dim,
+            insert_batch_size=args.insert_batch_size,
+            parse_workers=args.parse_workers,
+            insert_workers=args.insert_workers,
+            resume=not args.no_resume,
+            sync=args.sync,
+            storage=args.storage,
+            kv_storage=args.kv_storage,
+            vector_storage=args.vector_storage,
+            graph_storage=args.graph_storage,
         )
     )
 
@@ -17,7 +17,7 @@ import logging
 import argparse
 import base64
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 # Initialize logger
 logging.basicConfig(
@@ -48,7 +48,12 @@ except ImportError:
     logger.warning("markdown not installed. .md files will be processed as plain text.")
 
 try:
-    from dolphin_parser import parse_pdf_with_dolphin, DOLPHIN_AVAILABLE
+    from dolphin_parser import (
+        iter_pdf_pages_with_dolphin,
+        count_pdf_pages,
+        DolphinOCRPool,
+        DOLPHIN_AVAILABLE,
+    )
     PDF_AVAILABLE = DOLPHIN_AVAILABLE
     if not PDF_AVAILABLE:
         logger.warning("Dolphin not available. .pdf files will not be processed.")
@@ -73,11 +78,29 @@ from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
 
+# Parsed-document cache
+from disk_cache import DiskCache
+
+# Optional PCA compression of stored vectors
+from embedding_reduction import PCAReducer, neighbor_recall
+
 # Environment
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Bump a parser's version whenever its output format changes, so that stale
+# entries in the parsed-document cache are no longer hit
+PARSER_VERSIONS = {
+    "markdown": "1",
+    "text": "1",
+    "docx": "1",
+    "pdf_dolphin": "2",
+}
+
+# PCA transform saved next to the FAISS index when built with --pca_dim
+PCA_FILENAME = "portfolio_pca.npz"
+
 
 def calculate_file_hash(filepath):
     """Calculates the SHA256 hash of a file."""
@@ -244,43 +267,66 @@ def process_docx_file(
     return documents
 
 
-def process_pdf_file(
-    filepath: str, document_id: str, content_hash: str
-) -> List[Document]:
-    """Extract text from PDF documents (.pdf) using ByteDance Dolphin."""
-    if not PDF_AVAILABLE:
-        return []
+def iter_pdf_documents(
+    filepath: str,
+    document_id: str,
+    content_hash: str,
+    ocr_pool: Optional["DolphinOCRPool"] = None,
+) -> Iterator[Document]:
+    """Stream PDF pages as Documents (one per page) using ByteDance Dolphin.
 
-    documents = []
-    try:
-        # Use Dolphin to parse the PDF
-        logging.info(f"Using Dolphin to parse PDF: {filepath}")
-        full_text = parse_pdf_with_dolphin(filepath, model_path="./hf_model")
+    Each Document carries its 1-based page number in metadata["page"], and is
+    yielded as soon as the page is extracted. If ocr_pool is given, OCR of
+    scanned pages is sharded across its worker processes.
 
-        if full_text and len(full_text.strip()) > 40:
-            # Count pages from the output (rough estimate based on page markers)
-            num_pages = full_text.count("=== Page ")
+    An error that stops extraction (e.g. a crashed OCR worker or a corrupt
+    page) is raised after the pages extracted before it, so callers can tell
+    a truncated parse from a complete one.
+    """
+    if not PDF_AVAILABLE:
+        return
+
+    # Use Dolphin to parse the PDF
+    logging.info(f"Using Dolphin to parse PDF: {filepath}")
+    num_pages = count_pdf_pages(filepath)
+
+    num_extracted = 0
+    for page_num, page_text in iter_pdf_pages_with_dolphin(
+        filepath, model_path="./hf_model", ocr_pool=ocr_pool
+    ):
+        num_extracted += 1
+        yield Document(
+            page_content=page_text,
+            metadata={
+                "parent_document_id": document_id,
+                "parent_content_hash": content_hash,
+                "source_type": "pdf_text_dolphin",
+                "source_file": filepath,
+                "page": page_num + 1,
+                "num_pages": num_pages,
+                "parser": "dolphin-1.5",
+            },
+        )
 
-            documents.append(
-                Document(
-                    page_content=full_text,
-                    metadata={
-                        "parent_document_id": document_id,
-                        "parent_content_hash": content_hash,
-                        "source_type": "pdf_text_dolphin",
-                        "source_file": filepath,
-                        "num_pages": num_pages,
-                        "parser": "dolphin-1.5",
-                    },
-                )
-            )
-            logging.info(f"Extracted text from {num_pages} pages in PDF using Dolphin: {filepath}")
-        else:
-            logging.warning(f"No text content found in PDF: {filepath}")
+    if num_extracted:
+        logging.info(f"Extracted text from {num_extracted} pages in PDF using Dolphin: {filepath}")
+    else:
+        logging.warning(f"No text content found in PDF: {filepath}")
 
+
+def process_pdf_file(
+    filepath: str,
+    document_id: str,
+    content_hash: str,
+    ocr_pool: Optional["DolphinOCRPool"] = None,
+) -> List[Document]:
+    """Extract text from PDF documents (.pdf) using ByteDance Dolphin, one Document per page."""
+    documents = []
+    try:
+        for doc in iter_pdf_documents(filepath, document_id, content_hash, ocr_pool):
+            documents.append(doc)
     except Exception as e:
         logging.error(f"Error processing PDF file with Dolphin {filepath}: {e}")
-
     return documents
 
 
@@ -527,27 +573,189 @@ def add_semantic_tags(chunk_text: str) -> tuple[str, dict]:
     return enriched_text, extracted_data
 
 
-def process_documents(
+def create_parse_cache(
+    cache_dir: Optional[str], max_size_mb: float = 512
+) -> Optional[DiskCache]:
+    """Create the parsed-document cache, or None if caching is disabled."""
+    if not cache_dir:
+        return None
+    return DiskCache(cache_dir, max_size_mb=max_size_mb)
+
+
+def get_file_parser(filepath: str) -> Optional[tuple[str, str]]:
+    """
+    Resolve the parser for a local file from its extension.
+
+    Returns:
+        (parser_name, parser_version), or None for unsupported files
+    """
+    file_ext = filepath.lower()
+    if file_ext.endswith((".md", ".markdown")):
+        # Output differs depending on whether markdown rendering is available
+        name = "markdown" if MARKDOWN_AVAILABLE and HTML_AVAILABLE else "markdown_raw"
+        return name, PARSER_VERSIONS["markdown"]
+    if file_ext.endswith(".txt"):
+        return "text", PARSER_VERSIONS["text"]
+    if file_ext.endswith(".docx"):
+        return "docx", PARSER_VERSIONS["docx"]
+    if file_ext.endswith(".pdf"):
+        # OCR output depends on the parse mode ("page" or "element") and on
+        # the CPU inference mode, since int8/bf16 and compiled models decode
+        # slightly different text. These are read from the same environment
+        # variables DolphinParser uses.
+        parse_mode = os.getenv("DOLPHIN_PARSE_MODE") or "page"
+        cpu_optimize = os.getenv("DOLPHIN_CPU_OPTIMIZE") or "none"
+        name = f"pdf_dolphin_{parse_mode}_{cpu_optimize}"
+        if os.getenv("DOLPHIN_COMPILE", "").lower() in ("1", "true", "yes"):
+            name += "_compiled"
+        return name, PARSER_VERSIONS["pdf_dolphin"]
+    return None
+
+
+def iter_local_file_documents(
+    filepath: str,
+    document_id: str,
+    content_hash: str,
+    parse_cache: Optional[DiskCache] = None,
+    ocr_pool: Optional["DolphinOCRPool"] = None,
+) -> Iterator[Document]:
+    """
+    Stream Documents from a local file with the parser for its type, using the parsed-document cache.
+
+    Cache entries are keyed by (content hash, parser name, parser version), so
+    unchanged files skip extraction entirely, including Dolphin OCR of PDFs.
+    PDFs are yielded page by page as they are extracted.
+
+    Args:
+        filepath: Path to the file
+        document_id: Document ID stored in chunk metadata
+        content_hash: SHA256 of the file contents (see calculate_file_hash)
+        parse_cache: Optional parsed-document cache
+        ocr_pool: Optional DolphinOCRPool for scanned PDF pages
+
+    Yields:
+        Document objects
+    """
+    parser_info = get_file_parser(filepath)
+    if parser_info is None:
+        return
+    parser_name, parser_version = parser_info
+
+    cache_key = f"{content_hash}:{parser_name}:{parser_version}"
+    if parse_cache is not None and content_hash:
+        cached = parse_cache.get(cache_key)
+        if cached is not None:
+            logging.info(f"Using cached {parser_name} output for {filepath}")
+            # Per-run fields are re-stamped; the cached entry may come from another path
+            for entry in cached:
+                yield Document(
+                    page_content=entry["page_content"],
+                    metadata={
+                        **entry["metadata"],
+                        "parent_document_id": document_id,
+                        "parent_content_hash": content_hash,
+                        "source_file": filepath,
+                    },
+                )
+            return
+
+    if parser_name.startswith("markdown"):
+        logging.info(f"\nProcessing Markdown file: {filepath}")
+        documents = process_markdown_file(filepath, document_id, content_hash)
+    elif parser_name == "text":
+        logging.info(f"\nProcessing text file: {filepath}")
+        documents = process_txt_file(filepath, document_id, content_hash)
+    elif parser_name == "docx":
+        logging.info(f"\nProcessing Word document: {filepath}")
+        documents = process_docx_file(filepath, document_id, content_hash)
+    else:
+        logging.info(f"\nProcessing PDF document: {filepath}")
+        documents = iter_pdf_documents(
+            filepath, document_id, content_hash, ocr_pool=ocr_pool
+        )
+
+    parsed = []
+    try:
+        for doc in documents:
+            parsed.append({"page_content": doc.page_content, "metadata": doc.metadata})
+            yield doc
+    except Exception as e:
+        # The pages extracted so far are kept for this run, but a truncated
+        # parse is never cached, so the next run parses the file again
+        logging.error(f"Error processing {filepath}, {len(parsed)} sections extracted: {e}")
+        return
+
+    # Empty results are not cached: parsers log and swallow errors, so an
+    # empty list may be a transient failure rather than an empty file
+    if parse_cache is not None and content_hash and parsed:
+        parse_cache.set(cache_key, parsed)
+
+
+def parse_local_file(
+    filepath: str,
+    document_id: str,
+    content_hash: str,
+    parse_cache: Optional[DiskCache] = None,
+    ocr_pool: Optional["DolphinOCRPool"] = None,
+) -> List[Document]:
+    """Parse a local file into a list of Documents (see iter_local_file_documents)."""
+    return list(
+        iter_local_file_documents(
+            filepath, document_id, content_hash, parse_cache, ocr_pool
+        )
+    )
+
+
+def create_ocr_pool(ocr_workers: int) -> Optional["DolphinOCRPool"]:
+    """Create a Dolphin OCR process pool if more than one worker is requested."""
+    if ocr_workers <= 1 or not PDF_AVAILABLE:
+        return None
+    return DolphinOCRPool(model_path="./hf_model", num_workers=ocr_workers)
+
+
+def iter_chunks(
+    documents: List[Document], text_splitter: RecursiveCharacterTextSplitter
+) -> Iterator[Dict]:
+    """Split documents and yield semantically tagged chunk dicts (ids are assigned by the caller)."""
+    for doc in text_splitter.split_documents(documents):
+        doc.metadata["chunk_id"] = str(uuid.uuid4())
+        enriched_text, extracted_data = add_semantic_tags(doc.page_content)
+        if extracted_data:
+            doc.metadata["extracted_data"] = extracted_data
+
+        yield {
+            "id": None,
+            "text": enriched_text,
+            "metadata": doc.metadata,
+        }
+
+
+def iter_document_chunks(
     source_directory: str,
     text_splitter: RecursiveCharacterTextSplitter,
-) -> List[Dict]:
+    ocr_workers: int = 1,
+    parse_cache: Optional[DiskCache] = None,
+) -> Iterator[Dict]:
     """
-    Process all documents in the source directory.
+    Stream chunks from all documents in the source directory.
+
+    Each parsed Document (one per PDF page) is split as soon as it is
+    extracted, so consumers can start before long PDFs finish parsing.
 
     Args:
         source_directory: Directory containing documents
         text_splitter: Text splitter for chunking
+        ocr_workers: Number of processes for Dolphin OCR of scanned PDF pages
+        parse_cache: Optional parsed-document cache
 
-    Returns:
-        List of processed chunks
+    Yields:
+        Chunk dicts with "text" and "metadata" ("id" is assigned by the caller)
     """
-    all_text_chunks = []
-
     if not os.path.isdir(source_directory):
         logging.warning(
             f"Source directory not found: {source_directory}. Skipping text processing."
         )
-        return []
+        return
 
     # Find all supported files
     supported_extensions = (
@@ -567,60 +775,116 @@ def process_documents(
 
     if not source_files:
         logging.warning(f"No supported files found in '{source_directory}'.")
-        return []
+        return
 
     logging.info(
         f"\n--- Starting Document Processing for {len(source_files)} file(s) ---"
     )
 
-    for filepath in source_files:
-        relative_path = os.path.relpath(filepath, source_directory)
-        document_id = relative_path.replace(os.sep, "_")
-        content_hash = calculate_file_hash(filepath)
-        if not content_hash:
-            continue
-
-        file_ext = filepath.lower()
-
-        # Process different file types
-        documents = []
-
-        if file_ext.endswith((".md", ".markdown")):
-            logging.info(f"\nProcessing Markdown file: {filepath}")
-            documents = process_markdown_file(filepath, document_id, content_hash)
-        elif file_ext.endswith(".txt"):
-            logging.info(f"\nProcessing text file: {filepath}")
-            documents = process_txt_file(filepath, document_id, content_hash)
-        elif file_ext.endswith(".docx"):
-            logging.info(f"\nProcessing Word document: {filepath}")
-            documents = process_docx_file(filepath, document_id, content_hash)
-        elif file_ext.endswith(".pdf"):
-            logging.info(f"\nProcessing PDF document: {filepath}")
-            documents = process_pdf_file(filepath, document_id, content_hash)
-
-        # Process extracted documents
-        if documents:
-            split_docs = text_splitter.split_documents(documents)
-            for doc in split_docs:
-                doc.metadata["chunk_id"] = str(uuid.uuid4())
-                enriched_text, extracted_data = add_semantic_tags(
-                    doc.page_content
-                )
-                if extracted_data:
-                    doc.metadata["extracted_data"] = extracted_data
-
-                all_text_chunks.append(
-                    {
-                        "id": len(all_text_chunks),
-                        "text": enriched_text,
-                        "metadata": doc.metadata,
-                    }
-                )
-            logging.info(f"Extracted {len(split_docs)} chunks from {document_id}")
+    ocr_pool = create_ocr_pool(ocr_workers)
+    try:
+        for filepath in source_files:
+            relative_path = os.path.relpath(filepath, source_directory)
+            document_id = relative_path.replace(os.sep, "_")
+            content_hash = calculate_file_hash(filepath)
+            if not content_hash:
+                continue
+
+            # Process different file types
+            num_chunks = 0
+            for document in iter_local_file_documents(
+                filepath,
+                document_id,
+                content_hash,
+                parse_cache=parse_cache,
+                ocr_pool=ocr_pool,
+            ):
+                for chunk in iter_chunks([document], text_splitter):
+                    num_chunks += 1
+                    yield chunk
+
+            if num_chunks:
+                logging.info(f"Extracted {num_chunks} chunks from {document_id}")
+    finally:
+        if ocr_pool is not None:
+            ocr_pool.close()
+
+
+def process_documents(
+    source_directory: str,
+    text_splitter: RecursiveCharacterTextSplitter,
+    ocr_workers: int = 1,
+    parse_cache: Optional[DiskCache] = None,
+) -> List[Dict]:
+    """
+    Process all documents in the source directory.
 
+    Args:
+        source_directory: Directory containing documents
+        text_splitter: Text splitter for chunking
+        ocr_workers: Number of processes for Dolphin OCR of scanned PDF pages
+        parse_cache: Optional parsed-document cache
+
+    Returns:
+        List of processed chunks
+    """
+    all_text_chunks = []
+    for chunk in iter_document_chunks(
+        source_directory, text_splitter, ocr_workers, parse_cache
+    ):
+        chunk["id"] = len(all_text_chunks)
+        all_text_chunks.append(chunk)
     return all_text_chunks
 
 
+def iter_github_chunks(
+    text_splitter: RecursiveCharacterTextSplitter,
+    github_repos: List[str] = None,
+    github_user: str = None,
+    github_token: str = None,
+) -> Iterator[Dict]:
+    """
+    Stream chunks from GitHub repositories, one repository at a time.
+
+    Args:
+        text_splitter: Text splitter for chunking
+        github_repos: List of GitHub repositories to ingest (format: "owner/repo")
+        github_user: GitHub username to fetch all public repos from
+        github_token: Optional GitHub token for API authentication
+
+    Yields:
+        Chunk dicts with "text" and "metadata" ("id" is assigned by the caller)
+    """
+    # Fetch all repos for a GitHub user if specified
+    if github_user:
+        logging.info(f"\n--- Fetching All Repositories for User: {github_user} ---")
+        user_repos = get_user_repos(github_user, github_token)
+        if user_repos:
+            if github_repos:
+                # Combine user repos with explicitly specified repos
+                github_repos.extend(user_repos)
+            else:
+                github_repos = user_repos
+
+    # Process GitHub repositories
+    if github_repos:
+        logging.info("\n--- Processing GitHub Repositories ---")
+        for repo_name in github_repos:
+            logging.info(f"\nFetching repository: {repo_name}")
+            github_docs = process_github_repo(
+                repo_name=repo_name,
+                github_token=github_token
+            )
+
+            if github_docs:
+                # Split GitHub documents into chunks
+                num_chunks = 0
+                for chunk in iter_chunks(github_docs, text_splitter):
+                    num_chunks += 1
+                    yield chunk
+                logging.info(f"Added {num_chunks} chunks from {repo_name}")
+
+
 def run_ingestion(
     source_dir: str,
     output_dir: str,
@@ -629,10 +893,18 @@ def run_ingestion(
     github_user: str = None,
     github_token: str = None,
     enable_github: bool = False,
+    ocr_workers: int = 1,
+    parse_cache_dir: Optional[str] = "./data/parse_cache",
+    parse_cache_max_mb: float = 512,
+    embedding_batch_size: int = 64,
+    pca_dim: Optional[int] = None,
 ):
     """
     Main ingestion function.
 
+    Chunks are embedded in batches as they arrive from the parsers, so
+    encoding overlaps with parsing instead of waiting for the last document.
+
     Args:
         source_dir: Directory with source documents
         output_dir: Output directory for FAISS index
@@ -641,6 +913,12 @@ def run_ingestion(
         github_user: GitHub username to fetch all public repos from
         github_token: Optional GitHub token for API authentication
         enable_github: Enable GitHub repository extraction (default: False)
+        ocr_workers: Number of processes for Dolphin OCR of scanned PDF pages
+        parse_cache_dir: Directory for the parsed-document cache (None disables it)
+        parse_cache_max_mb: Size limit of the parsed-document cache in megabytes
+        embedding_batch_size: Number of chunks to encode at a time
+        pca_dim: Reduce stored vectors to this many dimensions with PCA learned
+            from the corpus (None keeps full-dimension vectors)
     """
     logging.info(f"Starting portfolio RAG ingestion")
     logging.info(f"Source directory: {source_dir}")
@@ -664,76 +942,70 @@ def run_ingestion(
         chunk_overlap=200
     )
 
-    # Process local documents
-    all_text_chunks = process_documents(source_dir, text_splitter)
-
-    # Process GitHub repositories (only if enabled)
+    # Local documents, then GitHub repositories (only if enabled)
+    parse_cache = create_parse_cache(parse_cache_dir, parse_cache_max_mb)
+    chunk_sources = [
+        iter_document_chunks(source_dir, text_splitter, ocr_workers, parse_cache)
+    ]
     if enable_github:
-        # Fetch all repos for a GitHub user if specified
-        if github_user:
-            logging.info(f"\n--- Fetching All Repositories for User: {github_user} ---")
-            user_repos = get_user_repos(github_user, github_token)
-            if user_repos:
-                if github_repos:
-                    # Combine user repos with explicitly specified repos
-                    github_repos.extend(user_repos)
-                else:
-                    github_repos = user_repos
-
-        # Process GitHub repositories
-        if github_repos:
-            logging.info("\n--- Processing GitHub Repositories ---")
-            for repo_name in github_repos:
-                logging.info(f"\nFetching repository: {repo_name}")
-                github_docs = process_github_repo(
-                    repo_name=repo_name,
-                    github_token=github_token
-                )
-
-                if github_docs:
-                    # Split GitHub documents into chunks
-                    split_docs = text_splitter.split_documents(github_docs)
-                    for doc in split_docs:
-                        doc.metadata["chunk_id"] = str(uuid.uuid4())
-                        enriched_text, extracted_data = add_semantic_tags(
-                            doc.page_content
-                        )
-                        if extracted_data:
-                            doc.metadata["extracted_data"] = extracted_data
-
-                        all_text_chunks.append(
-                            {
-                                "id": len(all_text_chunks),
-                                "text": enriched_text,
-                                "metadata": doc.metadata,
-                            }
-                        )
-                    logging.info(f"Added {len(split_docs)} chunks from {repo_name}")
+        chunk_sources.append(
+            iter_github_chunks(text_splitter, github_repos, github_user, github_token)
+        )
     else:
         logging.info("\n--- GitHub ingestion disabled (use --enable-github to enable) ---")
 
+    # Generate embeddings batch by batch as chunks arrive
+    all_text_chunks = []
+    embedding_batches = []
+    pending_texts = []
+    for chunk_source in chunk_sources:
+        for chunk in chunk_source:
+            chunk["id"] = len(all_text_chunks)
+            all_text_chunks.append(chunk)
+            pending_texts.append(chunk["text"])
+            if len(pending_texts) >= embedding_batch_size:
+                embedding_batches.append(embeddings_model.encode(pending_texts))
+                pending_texts = []
+
+    if pending_texts:
+        embedding_batches.append(embeddings_model.encode(pending_texts))
+
     if not all_text_chunks:
         logging.warning("\n--- No data was processed. No index will be created. ---")
         return {"status": "error", "message": "No documents found to process"}
 
-    # Generate embeddings
     logging.info(
-        f"\n--- Generating Embeddings and FAISS Index for {len(all_text_chunks)} Text Chunks ---"
-    )
-
-    for i, chunk in enumerate(all_text_chunks):
-        chunk["id"] = i
-
-    text_for_embedding = [chunk["text"] for chunk in all_text_chunks]
-    text_embeddings = embeddings_model.encode(
-        text_for_embedding, show_progress_bar=True
+        f"\n--- Generated Embeddings for {len(all_text_chunks)} Text Chunks, Building FAISS Index ---"
     )
+    text_embeddings = np.vstack(embedding_batches)
 
     # Save FAISS index and metadata
     os.makedirs(output_dir, exist_ok=True)
 
     index_path = os.path.join(output_dir, "portfolio_index.faiss")
     metadata_path = os.path.join(output_dir, "portfolio_metadata.json")
+    pca_path = os.path.join(output_dir, PCA_FILENAME)
+
+    reduction = {}
+    if pca_dim:
+        reducer = PCAReducer.fit(text_embeddings, pca_dim)
+        reduced_embeddings = reducer.transform(text_embeddings)
+        recall = neighbor_recall(text_embeddings, reduced_embeddings, k=10)
+        reducer.save(pca_path)
+        reduction = {
+            "pca_path": pca_path,
+            "pca_dim": reducer.output_dim,
+            "pca_explained_variance": round(reducer.explained_variance, 4),
+            "pca_recall_at_10": None if recall is None else round(recall, 4),
+        }
+        logging.info(
+            f"PCA {text_embeddings.shape[1]} -> {reducer.output_dim} dims keeps "
+            f"{reducer.explained_variance:.1%} of variance, neighbour recall@10 {recall}"
+        )
+        text_embeddings = reduced_embeddings
+    elif os.path.exists(pca_path):
+        # A stale transform would be applied to queries against a full-size index
+        os.remove(pca_path)
 
     index_saved = create_and_save_faiss_index(text_embeddings, index_path)
     meta_saved = store_metadata_as_json(all_text_chunks, metadata_path)
@@ -745,6 +1017,7 @@ def run_ingestion(
             "message": f"Processed {len(all_text_chunks)} chunks",
             "index_path": index_path,
             "metadata_path": metadata_path,
+            **reduction,
         }
     else:
         return {"status": "error", "message": "Failed to save index or metadata"}
@@ -788,6 +1061,33 @@ def main():
         "--github_token",
         help="GitHub personal access token for higher API rate limits (optional but recommended)",
     )
+    parser.add_argument(
+        "--ocr_workers",
+        type=int,
+        default=1,
+        help="Worker processes for Dolphin OCR of scanned PDF pages (one model per worker).",
+    )
+    parser.add_argument(
+        "--parse_cache_dir",
+        default="./data/parse_cache",
+        help="Directory for the parsed-document cache.",
+    )
+    parser.add_argument(
+        "--parse_cache_max_mb",
+        type=float,
+        default=512,
+        help="Size limit of the parsed-document cache in megabytes.",
+    )
+    parser.add_argument(
+        "--no_parse_cache",
+        action="store_true",
+        help="Disable the parsed-document cache and re-parse every file.",
+    )
+    parser.add_argument(
+        "--pca_dim",
+        type=int,
+        help="Compress stored vectors to this many dimensions with PCA (default: keep full size).",
+    )
 
     args = parser.parse_args()
 
@@ -802,6 +1102,10 @@ def main():
         github_user=args.github_user,
         github_token=github_token,
         enable_github=args.enable_github,
+        ocr_workers=args.ocr_workers,
+        parse_cache_dir=None if args.no_parse_cache else args.parse_cache_dir,
+        parse_cache_max_mb=args.parse_cache_max_mb,
+        pca_dim=args.pca_dim,
     )
 
     print(f"\n{result}")
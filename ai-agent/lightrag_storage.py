@@ -0,0 +1,175 @@
+"""
+LightRAG Storage - Select the storage backends of a LightRAG working directory
+
+- default: LightRAG's file storages (JSON key-value stores, NanoVectorDB,
+  NetworkX GraphML), which are loaded whole at startup and rewritten whole
+  on every flush
+- local: SQLite key-value stores (sqlite_kv_storage.py), FAISS vector
+  indexes and a SQLite graph (sqlite_graph_storage.py), which load lazily or
+  in binary and flush only what changed
+
+Individual backends can be overridden with any storage LightRAG supports,
+e.g. Neo4JStorage for the graph (configured through LightRAG's environment
+variables). The backends a working directory was built with are saved in
+it, so later ingestion and query runs open it with the same ones;
+migrate_lightrag_storage.py converts an existing directory.
+"""
+
+import os
+import json
+import logging
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STORAGE_CONFIG_FILE = "storage_config.json"
+
+
+@dataclass
+class StorageConfig:
+    """LightRAG storage backend names"""
+
+    kv_storage: str = "JsonKVStorage"
+    vector_storage: str = "NanoVectorDBStorage"
+    graph_storage: str = "NetworkXStorage"
+
+    def lightrag_kwargs(self) -> Dict[str, str]:
+        """Keyword arguments for the LightRAG constructor"""
+        return asdict(self)
+
+
+STORAGE_PRESETS = {
+    "default": StorageConfig(),
+    "local": StorageConfig(
+        kv_storage="SQLiteKVStorage",
+        vector_storage="FaissVectorDBStorage",
+        graph_storage="SQLiteGraphStorage",
+    ),
+}
+
+# Backends defined in this repository, registered with LightRAG on import
+CUSTOM_STORAGES = {
+    "SQLiteKVStorage": ("KV_STORAGE", "sqlite_kv_storage"),
+    "SQLiteGraphStorage": ("GRAPH_STORAGE", "sqlite_graph_storage"),
+}
+
+
+def register_storages():
+    """Add this repository's storage backends to LightRAG's registry"""
+    try:
+        from lightrag.kg import STORAGES, STORAGE_IMPLEMENTATIONS
+    except ImportError:
+        return
+    for name, (storage_type, module) in CUSTOM_STORAGES.items():
+        STORAGES[name] = module
+        implementations = STORAGE_IMPLEMENTATIONS[storage_type]["implementations"]
+        if name not in implementations:
+            implementations.append(name)
+
+
+register_storages()
+
+
+def save_storage_config(working_dir: str, config: StorageConfig):
+    """Record the storage backends a working directory uses"""
+    path = os.path.join(working_dir, STORAGE_CONFIG_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(asdict(config), f, indent=2)
+
+
+def load_storage_config(working_dir: str) -> Optional[StorageConfig]:
+    """
+    Read the storage backends of a working directory
+
+    Returns:
+        The saved StorageConfig; the default backends for directories built
+        before it was recorded; None for an empty or missing directory
+    """
+    path = os.path.join(working_dir, STORAGE_CONFIG_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return StorageConfig(**json.load(f))
+    if os.path.isdir(working_dir) and any(
+        name.startswith(("kv_store_", "vdb_", "graph_")) for name in os.listdir(working_dir)
+    ):
+        return StorageConfig()
+    return None
+
+
+def resolve_storage_config(
+    working_dir: str,
+    preset: Optional[str] = None,
+    kv_storage: Optional[str] = None,
+    vector_storage: Optional[str] = None,
+    graph_storage: Optional[str] = None,
+) -> StorageConfig:
+    """
+    Combine explicit choices with the backends saved in working_dir
+
+    Args:
+        working_dir: LightRAG working directory
+        preset: "default" or "local" (None: saved backends, else default)
+        kv_storage: Override of the key-value backend
+        vector_storage: Override of the vector backend
+        graph_storage: Override of the graph backend
+
+    Returns:
+        StorageConfig
+
+    Raises:
+        ValueError: For an unknown preset, or backends that differ from the
+            ones an existing working directory was built with
+    """
+    if preset is not None and preset not in STORAGE_PRESETS:
+        raise ValueError(f"Unknown storage preset '{preset}', expected one of {tuple(STORAGE_PRESETS)}")
+
+    saved = load_storage_config(working_dir)
+    base = STORAGE_PRESETS[preset] if preset else saved or STORAGE_PRESETS["default"]
+    overrides = {
+        key: value
+        for key, value in (
+            ("kv_storage", kv_storage),
+            ("vector_storage", vector_storage),
+            ("graph_storage", graph_storage),
+        )
+        if value
+    }
+    config = replace(base, **overrides)
+
+    if saved and config != saved:
+        raise ValueError(
+            f"{working_dir} uses {saved.lightrag_kwargs()}; convert it with "
+            f"migrate_lightrag_storage.py instead of opening it with {config.lightrag_kwargs()}"
+        )
+    return config
+
+
+def storage_files(working_dir: str, config: StorageConfig) -> Dict[str, Any]:
+    """
+    Files of the local backends in a working directory, per backend
+
+    Used by the migration to drop the files of backends it replaced.
+    Backends that keep their data on a server have no files.
+    """
+    prefixes = {
+        "JsonKVStorage": ("kv_store_", ".json"),
+        "SQLiteKVStorage": ("kv_store_", ".sqlite"),
+        "NanoVectorDBStorage": ("vdb_", ".json"),
+        "FaissVectorDBStorage": ("faiss_index_", ""),
+        "NetworkXStorage": ("graph_", ".graphml"),
+        "SQLiteGraphStorage": ("graph_", ".sqlite"),
+    }
+    names = os.listdir(working_dir) if os.path.isdir(working_dir) else []
+    files = {}
+    for backend in asdict(config).values():
+        if backend not in prefixes:
+            continue
+        prefix, suffix = prefixes[backend]
+        files[backend] = sorted(
+            os.path.join(working_dir, name)
+            for name in names
+            # The document status store is a JSON KV file LightRAG always keeps
+            if name.startswith(prefix) and suffix in name and name != "kv_store_doc_status.json"
+        )
+    return files
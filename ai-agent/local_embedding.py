@@ -0,0 +1,157 @@
+"""
+Local Embedding - sentence-transformers embeddings for LightRAG
+
+Runs a SentenceTransformer model in-process instead of calling the Gemini
+embedding API, so embedding a query costs milliseconds instead of a network
+round trip. Encoding runs in a worker thread so the event loop stays free, and
+requests that arrive while a batch is being encoded are merged into the next
+one (dynamic batching), which keeps CPU/GPU utilization high when LightRAG
+embeds many small lists concurrently.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# One loaded model per (model, device), shared process-wide
+_instances: Dict[Tuple[str, Optional[str]], "LocalEmbedding"] = {}
+
+
+class LocalEmbedding:
+    """SentenceTransformer wrapper with async, dynamically batched encoding"""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_LOCAL_EMBEDDING_MODEL,
+        device: Optional[str] = None,
+        batch_size: int = 64,
+        normalize: bool = True,
+    ):
+        """
+        Load the model
+
+        Args:
+            model_name: sentence-transformers model name or path
+            device: Torch device (default: CUDA if available, else CPU)
+            batch_size: Texts per forward pass
+            normalize: L2-normalize embeddings (cosine similarity = dot product)
+        """
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError(
+                "sentence-transformers not installed. Install with: pip install sentence-transformers"
+            )
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.model = SentenceTransformer(model_name, device=device)
+        self.embedding_dim = self.model.get_sentence_embedding_dimension()
+
+        # One thread: torch already parallelizes a forward pass internally
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embedding")
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._worker: Optional[asyncio.Task] = None
+        logger.info(f"Initialized local embedding model: {model_name} (dim {self.embedding_dim})")
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts synchronously
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            float32 array of shape (len(texts), embedding_dim)
+        """
+        if not texts:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalize,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
+
+    async def acall(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts without blocking the event loop
+
+        The first request is encoded right away; requests arriving while it
+        runs are merged and encoded together next.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            float32 array of shape (len(texts), embedding_dim)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((texts, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return await future
+
+    async def _drain(self):
+        """Encode pending requests batch by batch until none are left"""
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            requests, self._pending = self._pending, []
+            texts = [text for request_texts, _ in requests for text in request_texts]
+            try:
+                vectors = await loop.run_in_executor(self._executor, self, texts)
+            except Exception as e:
+                logger.error(f"Error generating local embeddings: {e}")
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_texts, future in requests:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def close(self):
+        """Stop the encoding thread"""
+        self._executor.shutdown(wait=False)
+
+
+def get_local_embedding(
+    model_name: str = DEFAULT_LOCAL_EMBEDDING_MODEL,
+    device: Optional[str] = None,
+) -> LocalEmbedding:
+    """
+    Get the shared LocalEmbedding for a model, loading it on first use
+
+    Args:
+        model_name: sentence-transformers model name or path
+        device: Torch device (default: CUDA if available, else CPU)
+
+    Returns:
+        Shared LocalEmbedding instance
+    """
+    key = (model_name, device)
+    if key not in _instances:
+        _instances[key] = LocalEmbedding(model_name=model_name, device=device)
+    return _instances[key]
+
+
+def close_local_embeddings():
+    """Stop all shared local embedding models and drop them"""
+    for embedding in _instances.values():
+        embedding.close()
+    _instances.clear()
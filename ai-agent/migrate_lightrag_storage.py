@@ -0,0 +1,316 @@
+"""
+migrate_lightrag_storage.py - Convert a LightRAG working directory to other storage backends
+
+Copies the working directory to a new one, then moves every store whose
+backend changes: key-value records are copied as they are, vectors are
+copied without calling the embedding API (the target index is filled with
+the stored vectors, looked up by their content), and graph nodes and edges
+are re-inserted. Stores whose backend does not change are copied as files.
+No LLM calls are made.
+
+Example:
+    python migrate_lightrag_storage.py --working_dir ./data/lightrag_storage \\
+        --output_dir ./data/lightrag_storage_local --storage local
+"""
+
+import os
+import shutil
+import asyncio
+import logging
+import argparse
+import inspect
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+try:
+    from lightrag import LightRAG
+    from lightrag.base import BaseGraphStorage, BaseKVStorage, BaseVectorStorage, DocStatusStorage
+    from lightrag.utils import EmbeddingFunc
+    LIGHTRAG_AVAILABLE = True
+except ImportError:
+    LIGHTRAG_AVAILABLE = False
+    logger.error("LightRAG not installed. Install with: pip install lightrag-hku")
+
+from lightrag_storage import (
+    STORAGE_PRESETS,
+    StorageConfig,
+    load_storage_config,
+    resolve_storage_config,
+    save_storage_config,
+    storage_files,
+)
+from embedding_backends import (
+    EmbeddingConfig,
+    create_embedding_func,
+    load_embedding_config,
+)
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+async def _no_llm(prompt, **kwargs):
+    raise RuntimeError("Storage migration makes no LLM calls")
+
+
+def open_lightrag(working_dir: str, storage: StorageConfig, embedding_dim: int, embed) -> "LightRAG":
+    """LightRAG instance over working_dir with the given backends"""
+    return LightRAG(
+        working_dir=working_dir,
+        llm_model_func=_no_llm,
+        embedding_func=EmbeddingFunc(embedding_dim=embedding_dim, max_token_size=8192, func=embed),
+        **storage.lightrag_kwargs(),
+    )
+
+
+def list_storages(rag: "LightRAG") -> Dict[str, Any]:
+    """LightRAG's storage objects by attribute name, without the document status store"""
+    return {
+        name: value
+        for name, value in vars(rag).items()
+        if isinstance(value, (BaseKVStorage, BaseVectorStorage, BaseGraphStorage))
+        and not isinstance(value, DocStatusStorage)
+    }
+
+
+async def export_kv(storage: "BaseKVStorage") -> Dict[str, Dict[str, Any]]:
+    """All records of a key-value store"""
+    if hasattr(storage, "get_all"):
+        return await storage.get_all()
+    if hasattr(storage, "_data"):
+        # JsonKVStorage keeps the whole namespace in memory
+        return dict(storage._data.copy())
+    raise ValueError(f"Cannot read all records of {type(storage).__name__}")
+
+
+async def export_vectors(storage: "BaseVectorStorage") -> List[Dict[str, Any]]:
+    """All records of a vector store, each with its "__id__" and "__vector__" """
+    client_storage = storage.client_storage
+    if inspect.isawaitable(client_storage):
+        client_storage = await client_storage
+    records = [
+        {key: value for key, value in record.items() if not key.startswith("__") or key == "__id__"}
+        for record in client_storage["data"]
+    ]
+    vectors = await storage.get_vectors_by_ids([record["__id__"] for record in records])
+    for record in records:
+        record["__vector__"] = vectors.get(record["__id__"])
+    return [record for record in records if record["__vector__"] is not None]
+
+
+async def export_graph(storage: "BaseGraphStorage") -> Dict[str, List[Dict[str, Any]]]:
+    return {
+        "nodes": await storage.get_all_nodes(),
+        "edges": await storage.get_all_edges(),
+    }
+
+
+async def import_kv(storage: "BaseKVStorage", records: Dict[str, Dict[str, Any]]):
+    if hasattr(storage, "load_records"):
+        # Keeps the original create/update times
+        storage.load_records(records)
+    else:
+        await storage.upsert(records)
+
+
+async def import_vectors(storage: "BaseVectorStorage", records: List[Dict[str, Any]]):
+    await storage.upsert({
+        record["__id__"]: {key: value for key, value in record.items() if not key.startswith("__")}
+        for record in records
+    })
+
+
+async def import_graph(storage: "BaseGraphStorage", graph: Dict[str, List[Dict[str, Any]]]):
+    for node in graph["nodes"]:
+        node = dict(node)
+        await storage.upsert_node(node.pop("id"), node)
+    for edge in graph["edges"]:
+        edge = dict(edge)
+        await storage.upsert_edge(edge.pop("source"), edge.pop("target"), edge)
+
+
+def make_vector_lookup(
+    records_by_store: Dict[str, List[Dict[str, Any]]],
+    embedding_config: EmbeddingConfig,
+):
+    """
+    Embedding function returning stored vectors for known content
+
+    Content that has no stored vector (none is expected) is embedded with
+    the working directory's embedding backend.
+    """
+    vectors = {
+        record["content"]: record["__vector__"]
+        for records in records_by_store.values()
+        for record in records
+        if "content" in record
+    }
+    fallback = {}
+    stats = {"stored": 0, "embedded": 0}
+
+    async def embed(texts):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        missing = [text for text in texts if text not in vectors]
+        if missing:
+            if "func" not in fallback:
+                fallback["func"] = create_embedding_func(embedding_config)
+            embedded = await fallback["func"](missing)
+            embedded = np.atleast_2d(np.asarray(embedded, dtype=np.float32))
+            vectors.update(zip(missing, embedded))
+            stats["embedded"] += len(missing)
+        stats["stored"] += len(texts) - len(missing)
+        return np.array([vectors[text] for text in texts], dtype=np.float32)
+
+    return embed, stats
+
+
+async def migrate_storage(
+    working_dir: str,
+    output_dir: str,
+    preset: Optional[str] = None,
+    kv_storage: Optional[str] = None,
+    vector_storage: Optional[str] = None,
+    graph_storage: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Copy a working directory to output_dir with different storage backends
+
+    Args:
+        working_dir: Existing LightRAG working directory
+        output_dir: New working directory (must not exist)
+        preset: Target preset ("default" or "local")
+        kv_storage: Override of the target key-value backend
+        vector_storage: Override of the target vector backend
+        graph_storage: Override of the target graph backend
+
+    Returns:
+        Dictionary with status and the records copied per store
+    """
+    if not LIGHTRAG_AVAILABLE:
+        return {"status": "error", "message": "LightRAG not installed"}
+
+    source = load_storage_config(working_dir)
+    if source is None:
+        return {"status": "error", "message": f"No LightRAG storage found in {working_dir}"}
+    if os.path.exists(output_dir):
+        return {"status": "error", "message": f"Output directory {output_dir} already exists"}
+    target = resolve_storage_config(output_dir, preset, kv_storage, vector_storage, graph_storage)
+    if target == source:
+        return {"status": "error", "message": f"{working_dir} already uses {source.lightrag_kwargs()}"}
+
+    embedding_config = load_embedding_config(working_dir) or EmbeddingConfig()
+    logger.info(f"Migrating {working_dir} -> {output_dir}: {source.lightrag_kwargs()} -> {target.lightrag_kwargs()}")
+
+    # Journal, manifest, document status, configs and unchanged stores come along as files
+    shutil.copytree(working_dir, output_dir)
+    for backend, files in storage_files(output_dir, source).items():
+        if backend not in target.lightrag_kwargs().values():
+            for path in files:
+                os.remove(path)
+
+    changed = {
+        kind for kind in ("kv_storage", "vector_storage", "graph_storage")
+        if getattr(source, kind) != getattr(target, kind)
+    }
+
+    # Read the stores that change
+    source_rag = open_lightrag(working_dir, source, embedding_config.dim, _no_llm)
+    await source_rag.initialize_storages()
+    exported: Dict[str, Any] = {}
+    try:
+        for name, storage in list_storages(source_rag).items():
+            if isinstance(storage, BaseKVStorage) and "kv_storage" in changed:
+                exported[name] = await export_kv(storage)
+            elif isinstance(storage, BaseVectorStorage) and "vector_storage" in changed:
+                exported[name] = await export_vectors(storage)
+            elif isinstance(storage, BaseGraphStorage) and "graph_storage" in changed:
+                exported[name] = await export_graph(storage)
+    finally:
+        await source_rag.finalize_storages()
+
+    # Write them with the new backends
+    vector_records = {name: records for name, records in exported.items() if isinstance(records, list)}
+    embed, embed_stats = make_vector_lookup(vector_records, embedding_config)
+    target_rag = open_lightrag(output_dir, target, embedding_config.dim, embed)
+    await target_rag.initialize_storages()
+    counts = {}
+    try:
+        for name, storage in list_storages(target_rag).items():
+            if name not in exported:
+                continue
+            data = exported[name]
+            if isinstance(storage, BaseKVStorage):
+                await import_kv(storage, data)
+                counts[name] = len(data)
+            elif isinstance(storage, BaseVectorStorage):
+                await import_vectors(storage, data)
+                counts[name] = len(data)
+            else:
+                await import_graph(storage, data)
+                counts[name] = len(data["nodes"]) + len(data["edges"])
+            await storage.index_done_callback()
+            logger.info(f"Copied {counts[name]} records of {name}")
+    finally:
+        await target_rag.finalize_storages()
+
+    save_storage_config(output_dir, target)
+    logger.info(
+        f"Vectors: {embed_stats['stored']} copied, {embed_stats['embedded']} re-embedded"
+    )
+    return {
+        "status": "success",
+        "output_dir": output_dir,
+        "storage": target.lightrag_kwargs(),
+        "records": counts,
+        "re_embedded": embed_stats["embedded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a LightRAG working directory to other storage backends",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--working_dir",
+        default="./data/lightrag_storage",
+        help="Existing LightRAG working directory.",
+    )
+    parser.add_argument(
+        "--output_dir",
+        required=True,
+        help="New working directory to write (must not exist).",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=list(STORAGE_PRESETS),
+        help="Target storage preset.",
+    )
+    parser.add_argument("--kv_storage", help="Target LightRAG key-value backend, e.g. SQLiteKVStorage.")
+    parser.add_argument("--vector_storage", help="Target LightRAG vector backend, e.g. FaissVectorDBStorage.")
+    parser.add_argument("--graph_storage", help="Target LightRAG graph backend, e.g. Neo4JStorage.")
+
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        migrate_storage(
+            working_dir=args.working_dir,
+            output_dir=args.output_dir,
+            preset=args.storage,
+            kv_storage=args.kv_storage,
+            vector_storage=args.vector_storage,
+            graph_storage=args.graph_storage,
+        )
+    )
+    print(f"\n{result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,15 +9,18 @@ Supports multiple query modes:
 - global: Graph-based retrieval
 - hybrid: Combination of local and global
 - naive: Simple text chunk retrieval
+- fanout: Several of the above at once, keeping the most preferred answer
+  that arrives within its latency target
 """
 
 import os
 import json
+import time
 import asyncio
 import logging
 import argparse
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional
 
 # Initialize logger
 logging.basicConfig(
@@ -35,18 +38,58 @@ except ImportError:
     logger.error("LightRAG not installed. Install with: pip install lightrag-hku")
 
 # Gemini models
-from gemini_llm import gemini_model_complete_async, gemini_embedding_async
+from gemini_llm import (
+    gemini_model_complete_async,
+    finalize_lightrag,
+    configure_backend,
+    get_backend,
+    get_usage_tracker,
+)
+from usage_tracker import caller_tag
+from embedding_backends import create_embedding_func, resolve_embedding_config
+from lightrag_storage import resolve_storage_config
+from answer_cache import SemanticAnswerCache, is_answered
+from answer_bundle import build_answer_bundle, generate_questions, save_answer_bundle
 
 # Environment
 from dotenv import load_dotenv
 
 load_dotenv()
 
+QUERY_MODES = ("local", "global", "hybrid", "naive")
+
+FANOUT_MODE = "fanout"
+
+# Seconds the fan-out waits for each mode, most preferred mode first
+DEFAULT_LATENCY_TARGETS = {
+    "hybrid": 8.0,
+    "local": 5.0,
+    "naive": 3.0,
+}
+
+
+def parse_mode_seconds(values: Optional[List[str]], modes=QUERY_MODES) -> Dict[str, float]:
+    """["hybrid=8", "naive=3"] -> {"hybrid": 8.0, "naive": 3.0}, in the order given"""
+    parsed = {}
+    for value in values or []:
+        mode, _, seconds = value.partition("=")
+        try:
+            seconds = float(seconds)
+        except ValueError:
+            seconds = 0.0
+        if mode not in modes or seconds <= 0:
+            raise ValueError(f"Invalid value '{value}', expected MODE=SECONDS with MODE in {modes}")
+        parsed[mode] = seconds
+    return parsed
+
 
 async def initialize_lightrag(
     working_dir: str,
     llm_model: str = "gemini-2.0-flash-exp",
-    embedding_model: str = "models/text-embedding-004",
+    embedding_model: Optional[str] = None,
+    backend: Optional[str] = None,
+    llm_max_async: int = 4,
+    embedding_backend: Optional[str] = None,
 ) -> Optional[LightRAG]:
     """
     Initialize LightRAG instance
@@ -54,7 +97,10 @@ async def initialize_lightrag(
     Args:
         working_dir: Directory containing LightRAG knowledge graph
         llm_model: Gemini model for text generation
-        embedding_model: Gemini model for embeddings
+        embedding_model: Embedding model (None: the one the graph was built with)
+        backend: Gemini backend ("google" or "fake"; None keeps the configured one)
+        llm_max_async: Maximum concurrent LLM calls LightRAG makes
+        embedding_backend: "gemini" or "local" (None: the one the graph was built with)
 
     Returns:
         Initialized LightRAG instance or None if failed
@@ -63,9 +109,12 @@ async def initialize_lightrag(
         logger.error("LightRAG is not available")
         return None
 
+    if backend is not None:
+        configure_backend(backend)
+
     # Check for API key
     api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
+    if get_backend() == "google" and not api_key:
         logger.error("GOOGLE_API_KEY not found in environment variables")
         return None
 
@@ -77,30 +126,35 @@ async def initialize_lightrag(
 
     try:
         logger.info("Initializing LightRAG...")
+        init_start = time.perf_counter()
 
         # Create wrapper functions for LightRAG
         async def llm_model_func(prompt, **kwargs):
             return await gemini_model_complete_async(prompt, model_name=llm_model, **kwargs)
 
-        async def embedding_func(texts):
-            if isinstance(texts, str):
-                texts = [texts]
-            embeddings = await gemini_embedding_async(texts, model_name=embedding_model)
-            return embeddings if len(texts) > 1 else embeddings[0]
+        # Queries must embed with the model the graph was built with
+        embedding_config = resolve_embedding_config(working_dir, embedding_backend, embedding_model)
+        embedding_func = create_embedding_func(embedding_config)
+        logger.info(f"Embedding: {embedding_config.backend} ({embedding_config.model})")
+
+        # Open the graph with the storage backends it was built with
+        storage_config = resolve_storage_config(working_dir)
 
         rag = LightRAG(
             working_dir=working_dir,
             llm_model_func=llm_model_func,
+            llm_model_max_async=llm_max_async,
             embedding_func=EmbeddingFunc(
-                embedding_dim=768,  # text-embedding-004 dimension
+                embedding_dim=embedding_config.dim,
                 max_token_size=8192,
                 func=embedding_func,
             ),
+            **storage_config.lightrag_kwargs(),
         )
 
         # Initialize storages
         await rag.initialize_storages()
-        logger.info("LightRAG initialized successfully")
+        logger.info(f"LightRAG initialized in {time.perf_counter() - init_start:.2f}s")
         return rag
 
     except Exception as e:
@@ -108,20 +162,107 @@ async def initialize_lightrag(
         return None
 
 
+async def stream_query_lightrag(
+    rag: LightRAG,
+    query: str,
+    mode: str = "hybrid",
+    top_k: int = 10,
+) -> AsyncIterator[str]:
+    """
+    Query LightRAG and stream the answer as it is generated
+
+    Args:
+        rag: LightRAG instance
+        query: Query string
+        mode: Query mode (local, global, hybrid, naive)
+        top_k: Number of results to return
+
+    Yields:
+        Text deltas of the answer
+    """
+    param = QueryParam(
+        mode=mode,
+        top_k=top_k,
+        stream=True,
+    )
+    response = await rag.aquery(query, param=param)
+
+    # LightRAG returns a plain string for cached answers and fallbacks
+    if isinstance(response, str):
+        yield response
+        return
+
+    async for delta in response:
+        yield delta
+
+
 async def query_lightrag(
     rag: LightRAG,
     query: str,
     mode: str = "hybrid",
     top_k: int = 10,
+    on_delta: Optional[Callable[[str], None]] = None,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+    latency_targets: Optional[Dict[str, float]] = None,
 ) -> Dict[str, Any]:
     """
     Query LightRAG knowledge graph
 
+    Args:
+        rag: LightRAG instance
+        query: Query string
+        mode: Query mode (local, global, hybrid, naive, fanout)
+        top_k: Number of results to return
+        on_delta: If given, stream the answer and call this with each text
+            delta as it arrives (a fan-out answer arrives in one piece)
+        answer_cache: If given, answer similar earlier queries from it and
+            cache this one's answer
+        latency_targets: Modes and their latency targets for the fanout mode
+            (see fanout_query_lightrag)
+
+    Returns:
+        Dictionary with query results ("cached_query" and "similarity" are
+        set for an answer from answer_cache)
+    """
+    if mode == FANOUT_MODE:
+        result = await fanout_query_lightrag(rag, query, latency_targets, top_k, answer_cache)
+        if on_delta is not None and result["status"] == "success":
+            on_delta(result["result"])
+        return result
+
+    if answer_cache is None:
+        return await answer_query(rag, query, mode, top_k, on_delta)
+
+    # Identical queries in flight share one lookup and one LightRAG call
+    result, shared = await answer_cache.coalesce(
+        query,
+        mode,
+        top_k,
+        lambda: answer_query(rag, query, mode, top_k, on_delta, answer_cache),
+    )
+    if shared and on_delta is not None and result["status"] == "success":
+        on_delta(result["result"])
+    return result
+
+
+async def answer_query(
+    rag: LightRAG,
+    query: str,
+    mode: str,
+    top_k: int,
+    on_delta: Optional[Callable[[str], None]] = None,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+) -> Dict[str, Any]:
+    """
+    Answer one query in a single LightRAG mode (see query_lightrag)
+
     Args:
         rag: LightRAG instance
         query: Query string
         mode: Query mode (local, global, hybrid, naive)
         top_k: Number of results to return
+        on_delta: If given, stream the answer and call this with each text delta
+        answer_cache: If given, look the query up first and cache its answer
 
     Returns:
         Dictionary with query results
@@ -129,24 +270,49 @@ async def query_lightrag(
     try:
         logger.info(f"Querying with mode '{mode}': {query}")
 
-        # Create query parameters
-        param = QueryParam(
-            mode=mode,
-            top_k=top_k,
-        )
+        lookup = None
+        if answer_cache is not None:
+            lookup = await answer_cache.lookup(query, mode, top_k)
+            if lookup.result is not None:
+                logger.info(f"Answered from cache (similarity {lookup.similarity:.3f})")
+                if on_delta is not None:
+                    on_delta(lookup.result["result"])
+                return {
+                    **lookup.result,
+                    "query": query,
+                    "cached_query": lookup.result["query"],
+                    "similarity": round(lookup.similarity, 4),
+                }
+
+        with caller_tag(f"query:{mode}"):
+            if on_delta is not None:
+                deltas = []
+                async for delta in stream_query_lightrag(rag, query, mode, top_k):
+                    on_delta(delta)
+                    deltas.append(delta)
+                result = "".join(deltas)
+            else:
+                # Create query parameters
+                param = QueryParam(
+                    mode=mode,
+                    top_k=top_k,
+                )
 
-        # Execute query
-        result = await rag.aquery(query, param=param)
+                # Execute query
+                result = await rag.aquery(query, param=param)
 
         logger.info(f"Query completed, result length: {len(result)} characters")
 
-        return {
+        response = {
             "status": "success",
             "query": query,
             "mode": mode,
             "result": result,
             "top_k": top_k,
         }
+        if answer_cache is not None:
+            answer_cache.store(query, mode, top_k, response, lookup.vector)
+        return response
 
     except Exception as e:
         logger.error(f"Error querying LightRAG: {e}")
@@ -158,29 +324,167 @@ async def query_lightrag(
         }
 
 
+async def fanout_query_lightrag(
+    rag: LightRAG,
+    query: str,
+    latency_targets: Optional[Dict[str, float]] = None,
+    top_k: int = 10,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+) -> Dict[str, Any]:
+    """
+    Query several modes at once and keep the most preferred timely answer
+
+    All modes start together. Each is waited for up to its latency target,
+    and the first mode in latency_targets order that answers in time wins.
+    A mode is cancelled as soon as it can no longer win: it missed its
+    target, or a more preferred mode has answered. A slow global traversal
+    therefore costs at most its target when a faster mode has an answer.
+    LightRAG's no-context reply only wins if no mode has a real answer.
+
+    Args:
+        rag: LightRAG instance
+        query: Query string
+        latency_targets: Seconds to wait for each mode, most preferred mode
+            first (default: DEFAULT_LATENCY_TARGETS)
+        top_k: Number of results to return
+        answer_cache: If given, passed on to each mode's query
+
+    Returns:
+        Result dict of the winning mode, with "fanout" mapping every mode to
+        its outcome (success, no-context, error, timeout or cancelled) and
+        latency; an error result if no mode finished in time
+    """
+    targets = dict(latency_targets or DEFAULT_LATENCY_TARGETS)
+    modes = list(targets)
+    logger.info(f"Fanning out over {', '.join(f'{m} ({targets[m]:g}s)' for m in modes)}: {query}")
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks = {
+        asyncio.ensure_future(query_lightrag(rag, query, mode, top_k, answer_cache=answer_cache)): mode
+        for mode in modes
+    }
+    results: Dict[str, Dict[str, Any]] = {}
+    outcomes: Dict[str, Dict[str, Any]] = {}
+
+    def finish(mode: str, status: str):
+        outcomes[mode] = {"status": status, "latency_ms": round((loop.time() - start) * 1000)}
+
+    pending = set(tasks)
+    try:
+        while pending:
+            now = loop.time()
+            answered = [mode for mode in modes if mode in results and is_answered(results[mode])]
+            best_rank = modes.index(answered[0]) if answered else len(modes)
+            for task in list(pending):
+                mode = tasks[task]
+                if modes.index(mode) > best_rank or now >= start + targets[mode]:
+                    task.cancel()
+                    pending.discard(task)
+                    finish(mode, "cancelled" if modes.index(mode) > best_rank else "timeout")
+            if not pending:
+                break
+
+            deadline = min(start + targets[tasks[task]] for task in pending)
+            done, pending = await asyncio.wait(
+                pending, timeout=deadline - now, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                mode = tasks[task]
+                results[mode] = task.result()
+                if is_answered(results[mode]):
+                    finish(mode, "success")
+                else:
+                    finish(mode, "no-context" if results[mode]["status"] == "success" else "error")
+    finally:
+        # Cancelled from outside, e.g. by the query server's timeout
+        for task in pending:
+            task.cancel()
+
+    # Most preferred real answer, else no-context reply, else error
+    ranked = sorted(
+        results,
+        key=lambda mode: (
+            not is_answered(results[mode]),
+            results[mode]["status"] != "success",
+            modes.index(mode),
+        ),
+    )
+    if ranked:
+        result = results[ranked[0]]
+    else:
+        result = {
+            "status": "error",
+            "query": query,
+            "mode": FANOUT_MODE,
+            "error": "No query mode finished within its latency target",
+        }
+    logger.info(
+        f"Fan-out answered with '{result['mode']}' after "
+        f"{round((loop.time() - start) * 1000)} ms: "
+        + ", ".join(f"{mode} {outcomes[mode]['status']}" for mode in modes)
+    )
+    return {**result, "fanout": {mode: outcomes[mode] for mode in modes}}
+
+
 async def batch_query(
     rag: LightRAG,
     queries: List[str],
     mode: str = "hybrid",
     top_k: int = 10,
+    concurrency: int = 4,
+    jsonl_path: Optional[str] = None,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+    latency_targets: Optional[Dict[str, float]] = None,
 ) -> List[Dict[str, Any]]:
     """
-    Execute multiple queries in batch
+    Execute multiple queries concurrently
+
+    A failed query becomes an error result without affecting the others.
 
     Args:
         rag: LightRAG instance
         queries: List of query strings
         mode: Query mode
         top_k: Number of results per query
+        concurrency: Maximum queries in flight
+        jsonl_path: If given, append each result to this JSON Lines file as
+            soon as it completes (with its "index" in queries)
+        answer_cache: If given, answer near-duplicate queries from it
+        latency_targets: Modes and their latency targets for the fanout mode
 
     Returns:
-        List of query results
+        List of query results, in the order of queries
     """
-    results = []
-    for query in queries:
-        result = await query_lightrag(rag, query, mode, top_k)
-        results.append(result)
-    return results
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    jsonl = None
+    if jsonl_path:
+        os.makedirs(os.path.dirname(jsonl_path) or ".", exist_ok=True)
+        jsonl = open(jsonl_path, "w", encoding="utf-8")
+
+    async def run(index: int, query: str) -> Dict[str, Any]:
+        async with semaphore:
+            result = await query_lightrag(
+                rag, query, mode, top_k, answer_cache=answer_cache, latency_targets=latency_targets
+            )
+        if jsonl is not None:
+            # The event loop is single-threaded, so lines never interleave
+            jsonl.write(json.dumps({"index": index, **result}, ensure_ascii=False) + "\n")
+            jsonl.flush()
+        return result
+
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(run(i, query) for i, query in enumerate(queries)))
+    finally:
+        if jsonl is not None:
+            jsonl.close()
+    failed = sum(result["status"] != "success" for result in results)
+    logger.info(
+        f"Answered {len(queries) - failed}/{len(queries)} queries in "
+        f"{time.perf_counter() - start:.1f}s (concurrency {concurrency})"
+    )
+    return list(results)
 
 
 def export_to_json(results: Dict[str, Any] | List[Dict[str, Any]], output_path: str):
@@ -210,7 +514,15 @@ async def run_query(
     top_k: int = 10,
     output_file: str = None,
     llm_model: str = "gemini-2.0-flash-exp",
-    embedding_model: str = "models/text-embedding-004",
+    embedding_model: Optional[str] = None,
+    stream: bool = False,
+    backend: Optional[str] = None,
+    embedding_backend: Optional[str] = None,
+    concurrency: int = 4,
+    answer_cache_threshold: Optional[float] = None,
+    bundle_file: Optional[str] = None,
+    generated_questions: int = 0,
+    latency_targets: Optional[Dict[str, float]] = None,
 ):
     """
     Main query function
@@ -219,14 +531,35 @@ async def run_query(
         working_dir: LightRAG working directory
         query: Single query string
         queries_file: File containing multiple queries (one per line)
-        mode: Query mode (local, global, hybrid, naive)
+        mode: Query mode (local, global, hybrid, naive, fanout)
         top_k: Number of results
         output_file: Output JSON file path
         llm_model: Gemini LLM model
-        embedding_model: Gemini embedding model
+        embedding_model: Embedding model (None: the one the graph was built with)
+        stream: Print a single query's answer to stdout as it is generated
+        backend: Gemini backend ("google" or "fake"; None keeps the configured one)
+        embedding_backend: "gemini" or "local" (None: the one the graph was built with)
+        concurrency: Queries of a queries_file answered at the same time
+        answer_cache_threshold: If given, answer queries of a queries_file
+            that are this cosine-similar to an earlier one with its answer
+        bundle_file: If given, also write the answers as an answer bundle
+        generated_questions: Also ask questions derived from this many of the
+            most connected entities
+        latency_targets: Modes and their latency targets for the fanout mode
+            (default: DEFAULT_LATENCY_TARGETS)
     """
+    # Account tokens and latency of this run's Gemini calls
+    get_usage_tracker().reset()
+
     # Initialize LightRAG
-    rag = await initialize_lightrag(working_dir, llm_model, embedding_model)
+    rag = await initialize_lightrag(
+        working_dir,
+        llm_model,
+        embedding_model,
+        backend,
+        llm_max_async=max(4, concurrency),
+        embedding_backend=embedding_backend,
+    )
     if not rag:
         return {"status": "error", "message": "Failed to initialize LightRAG"}
 
@@ -238,29 +571,60 @@ async def run_query(
         elif queries_file:
             with open(queries_file, "r", encoding="utf-8") as f:
                 queries = [line.strip() for line in f if line.strip()]
-        else:
-            logger.error("No query provided. Use --query or --queries_file")
-            await rag.finalize_storages()
+        if generated_questions > 0:
+            queries = list(dict.fromkeys(queries + await generate_questions(rag, generated_questions)))
+        if not queries:
+            logger.error("No query provided. Use --query, --queries_file or --generate_questions")
+            await finalize_lightrag(rag)
             return {"status": "error", "message": "No query provided"}
 
         # Execute queries
         if len(queries) == 1:
-            results = await query_lightrag(rag, queries[0], mode, top_k)
+            on_delta = (lambda delta: print(delta, end="", flush=True)) if stream else None
+            results = await query_lightrag(
+                rag, queries[0], mode, top_k, on_delta, latency_targets=latency_targets
+            )
+            if stream:
+                print()
         else:
-            results = await batch_query(rag, queries, mode, top_k)
+            # Results stream to <output>.jsonl as they complete
+            jsonl_path = str(Path(output_file).with_suffix(".jsonl")) if output_file else None
+            answer_cache = None
+            if answer_cache_threshold is not None:
+                answer_cache = SemanticAnswerCache(
+                    rag.embedding_func, working_dir, threshold=answer_cache_threshold
+                )
+            results = await batch_query(
+                rag, queries, mode, top_k, concurrency, jsonl_path, answer_cache, latency_targets
+            )
+            if answer_cache is not None:
+                logger.info(f"Answer cache: {answer_cache.summary()}")
 
         # Export to JSON if output file specified
         if output_file:
             export_to_json(results, output_file)
 
+        if bundle_file:
+            bundle = await build_answer_bundle(
+                rag,
+                working_dir,
+                results if isinstance(results, list) else [results],
+                resolve_embedding_config(working_dir, embedding_backend, embedding_model),
+                threshold=answer_cache_threshold or 0.92,
+            )
+            save_answer_bundle(bundle_file, bundle)
+
+        usage_path = get_usage_tracker().write_summary(working_dir, "query")
+        logger.info(f"Gemini usage summary written to {usage_path}")
+
         # Finalize
-        await rag.finalize_storages()
+        await finalize_lightrag(rag)
 
         return results
 
     except Exception as e:
         logger.error(f"Error during query execution: {e}")
-        await rag.finalize_storages()
+        await finalize_lightrag(rag)
         return {"status": "error", "message": str(e)}
 
 
@@ -285,8 +649,15 @@ def main():
     parser.add_argument(
         "--mode",
         default="hybrid",
-        choices=["local", "global", "hybrid", "naive"],
-        help="Query mode",
+        choices=[*QUERY_MODES, FANOUT_MODE],
+        help="Query mode; 'fanout' runs the --latency_target modes at once",
+    )
+    parser.add_argument(
+        "--latency_target",
+        action="append",
+        metavar="MODE=SECONDS",
+        help="Mode for --mode fanout and how long to wait for its answer, repeatable, "
+        f"most preferred mode first (default: {DEFAULT_LATENCY_TARGETS})",
     )
     parser.add_argument(
         "--top_k",
@@ -306,11 +677,54 @@ def main():
     )
     parser.add_argument(
         "--embedding_model",
-        default="models/text-embedding-004",
-        help="Gemini model for embeddings",
+        help="Embedding model (default: the one the knowledge graph was built with)",
+    )
+    parser.add_argument(
+        "--embedding_backend",
+        choices=["gemini", "local"],
+        help="Embed queries with the Gemini API or a local sentence-transformers model "
+        "(default: the backend the knowledge graph was built with)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the answer to a single query as it is generated",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Queries from --queries_file answered at the same time",
+    )
+    parser.add_argument(
+        "--answer_cache_threshold",
+        type=float,
+        help="Answer queries from --queries_file that are at least this cosine-similar "
+        "to an earlier one (e.g. 0.92) with its answer (default: off)",
+    )
+    parser.add_argument(
+        "--bundle_file",
+        help="Also write the answers as an answer bundle for lib/rag.js, "
+        "e.g. ./data/lightrag_answers.json",
+    )
+    parser.add_argument(
+        "--generate_questions",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Also ask questions derived from the N most connected entities of the graph",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["google", "fake"],
+        help="Gemini backend; 'fake' runs offline with simulated latency (default: GEMINI_BACKEND or google)",
     )
 
     args = parser.parse_args()
+    try:
+        latency_targets = parse_mode_seconds(args.latency_target) or None
+    except ValueError as e:
+        parser.error(str(e))
 
     # Run query
     results = asyncio.run(
@@ -323,6 +737,14 @@ def main():
             output_file=args.output_file,
             llm_model=args.llm_model,
             embedding_model=args.embedding_model,
+            stream=args.stream,
+            backend=args.backend,
+            embedding_backend=args.embedding_backend,
+            concurrency=args.concurrency,
+            answer_cache_threshold=args.answer_cache_threshold,
+            bundle_file=args.bundle_file,
+            generated_questions=args.generate_questions,
+            latency_targets=latency_targets,
         )
     )
 
@@ -342,7 +764,9 @@ def main():
         print(f"\nQuery: {results.get('query', 'N/A')}")
         print(f"Status: {results.get('status', 'N/A')}")
         if results.get('status') == 'success':
-            print(f"\n{results.get('result', 'No result')}\n")
+            # A streamed answer has already been printed as it arrived
+            if not args.stream:
+                print(f"\n{results.get('result', 'No result')}\n")
         else:
             print(f"Error: {results.get('error', 'Unknown error')}\n")
     print("=" * 80)
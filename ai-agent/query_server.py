@@ -0,0 +1,500 @@
+"""
+query_server.py - Long-running LightRAG query server
+
+Keeps one LightRAG instance (storages loaded, Gemini clients and embedding
+model warm) and answers queries over HTTP on localhost, so each query costs
+only retrieval and generation instead of a full query_lightrag.py startup.
+Used by lib/rag.js for questions without a precomputed answer.
+
+Endpoints:
+- POST /query  {"query": "...", "mode": "hybrid", "top_k": 10}
+  -> the same result dict query_lightrag.py exports ("mode": "fanout" runs
+  the --latency_target modes at once)
+- GET /health  -> {"status": "ok", ...}
+
+Requests are answered concurrently, up to --concurrency at a time, and each
+is bounded by the timeout of its query mode. SIGINT/SIGTERM stop accepting
+connections, let in-flight queries finish, then finalize the storages.
+
+Example:
+    python query_server.py --working_dir ./data/lightrag_storage --port 8765
+"""
+
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, Optional, Tuple
+
+from query_lightrag import (
+    DEFAULT_LATENCY_TARGETS,
+    FANOUT_MODE,
+    QUERY_MODES,
+    initialize_lightrag,
+    parse_mode_seconds,
+    query_lightrag,
+)
+from answer_cache import SemanticAnswerCache
+from answer_bundle import AnswerBundle
+from gemini_llm import finalize_lightrag, get_usage_tracker
+
+logger = logging.getLogger(__name__)
+
+SERVER_MODES = (*QUERY_MODES, FANOUT_MODE)
+
+# Seconds per query mode; graph modes make more LLM and storage calls. A
+# fan-out also ends by itself after its longest latency target.
+DEFAULT_TIMEOUTS = {
+    "naive": 30.0,
+    "local": 45.0,
+    "global": 60.0,
+    "hybrid": 60.0,
+    "fanout": 60.0,
+}
+
+MAX_BODY_BYTES = 64 * 1024
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class HTTPError(Exception):
+    """Request that is answered with an error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class QueryServer:
+    """HTTP front end for a warm LightRAG instance"""
+
+    def __init__(
+        self,
+        rag: Any,
+        concurrency: int = 8,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_top_k: int = 10,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        latency_targets: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            rag: Initialized LightRAG instance
+            concurrency: Maximum queries answered at the same time
+            timeouts: Seconds per query mode (missing modes use DEFAULT_TIMEOUTS)
+            default_top_k: top_k for requests that do not set it
+            answer_cache: Cache answering near-duplicate queries (None: off)
+            latency_targets: Modes and their latency targets for fanout
+                requests (None: DEFAULT_LATENCY_TARGETS)
+        """
+        self.rag = rag
+        self.latency_targets = latency_targets
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.default_top_k = default_top_k
+        self.answer_cache = answer_cache
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._started = time.time()
+        self._stopping = False
+        self.stats = {"queries": 0, "errors": 0, "timeouts": 0, "in_flight": 0}
+
+    async def answer(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Answer one query request
+
+        Args:
+            request: Decoded JSON body with "query" and optional "mode", "top_k"
+
+        Returns:
+            (HTTP status, result dict)
+        """
+        query = request.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HTTPError(400, '"query" must be a non-empty string')
+        mode = request.get("mode", "hybrid")
+        if mode not in SERVER_MODES:
+            raise HTTPError(400, f'"mode" must be one of {", ".join(SERVER_MODES)}')
+        top_k = request.get("top_k", self.default_top_k)
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+            raise HTTPError(400, '"top_k" must be a positive integer')
+        if self._stopping:
+            raise HTTPError(503, "Server is shutting down")
+
+        timeout = self.timeouts[mode]
+        self.stats["in_flight"] += 1
+        start = time.perf_counter()
+        try:
+            async with self._semaphore:
+                result = await asyncio.wait_for(
+                    query_lightrag(
+                        self.rag,
+                        query,
+                        mode,
+                        top_k,
+                        answer_cache=self.answer_cache,
+                        latency_targets=self.latency_targets,
+                    ),
+                    timeout,
+                )
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning(f"Query timed out after {timeout:g}s ({mode}): {query}")
+            return 504, {
+                "status": "error",
+                "query": query,
+                "mode": mode,
+                "error": f"Query timed out after {timeout:g}s",
+            }
+        finally:
+            self.stats["in_flight"] -= 1
+
+        self.stats["queries"] += 1
+        if result["status"] != "success":
+            self.stats["errors"] += 1
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000)
+        return 200, result
+
+    def health(self) -> Dict[str, Any]:
+        health = {
+            "status": "stopping" if self._stopping else "ok",
+            "uptime_s": round(time.time() - self._started),
+            **self.stats,
+        }
+        if self.answer_cache is not None:
+            health["answer_cache"] = self.answer_cache.summary()
+        return health
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP/1.1 request per connection"""
+        try:
+            try:
+                method, path, body = await read_request(reader)
+                if path == "/health":
+                    status, payload = 200, self.health()
+                elif path == "/query":
+                    if method != "POST":
+                        raise HTTPError(405, "Use POST /query")
+                    try:
+                        request = json.loads(body or b"{}")
+                    except ValueError:
+                        raise HTTPError(400, "Body must be JSON")
+                    if not isinstance(request, dict):
+                        raise HTTPError(400, "Body must be a JSON object")
+                    status, payload = await self.answer(request)
+                else:
+                    raise HTTPError(404, f"No endpoint {path}")
+            except HTTPError as e:
+                status, payload = e.status, {"status": "error", "error": str(e)}
+            await write_response(writer, status, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # The client went away
+            pass
+        except Exception as e:
+            logger.error(f"Error handling request: {e}")
+        finally:
+            writer.close()
+
+    def stop(self):
+        """Refuse new queries; in-flight ones finish"""
+        self._stopping = True
+
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    """
+    Read an HTTP request
+
+    Returns:
+        (method, path without query string, body)
+    """
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise HTTPError(400, "Malformed request line")
+    method, target = parts[0].upper(), parts[1]
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method, target.split("?", 1)[0], body
+
+
+async def write_response(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+def preload_answer_cache(cache: SemanticAnswerCache, path: str, working_dir: str) -> int:
+    """
+    Fill an answer cache with the answers of a bundle computed from working_dir
+
+    Returns:
+        Number of answers loaded (0 for a missing or stale bundle)
+    """
+    try:
+        bundle = AnswerBundle.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Not preloading answers from {path}: {e}")
+        return 0
+    if not bundle.is_current(working_dir):
+        logger.warning(f"Answer bundle {path} was computed from an older knowledge graph; not preloading it")
+        return 0
+    for entry, vector in zip(bundle.entries, bundle.vectors):
+        result = {
+            "status": "success",
+            "query": entry["query"],
+            "mode": entry["mode"],
+            "result": entry["result"],
+            "top_k": entry["top_k"],
+        }
+        cache.store(entry["query"], entry["mode"], entry["top_k"], result, vector)
+    logger.info(f"Preloaded {len(bundle.entries)} answers from {path}")
+    return len(bundle.entries)
+
+
+async def serve(
+    working_dir: str,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    concurrency: int = 8,
+    timeouts: Optional[Dict[str, float]] = None,
+    shutdown_grace: float = 30.0,
+    llm_model: str = "gemini-2.0-flash-exp",
+    backend: Optional[str] = None,
+    embedding_backend: Optional[str] = None,
+    embedding_model: Optional[str] = None,
+    answer_cache: bool = True,
+    answer_cache_threshold: float = 0.92,
+    answer_cache_size: int = 1024,
+    answer_cache_ttl_hours: Optional[float] = 24,
+    answer_bundle: Optional[str] = None,
+    latency_targets: Optional[Dict[str, float]] = None,
+):
+    """
+    Run the query server until SIGINT/SIGTERM
+
+    Args:
+        working_dir: LightRAG working directory
+        host: Address to listen on (keep it local: there is no authentication)
+        port: TCP port
+        concurrency: Maximum queries answered at the same time
+        timeouts: Seconds per query mode
+        shutdown_grace: Seconds in-flight queries get to finish on shutdown
+        llm_model: Gemini LLM model
+        backend: Gemini backend ("google" or "fake"; None keeps the configured one)
+        embedding_backend: "gemini" or "local" (None: the one the graph was built with)
+        embedding_model: Embedding model (None: the one the graph was built with)
+        answer_cache: Answer near-duplicate queries from a semantic cache
+        answer_cache_threshold: Minimum cosine similarity of a cache hit
+        answer_cache_size: Cached answers kept (least recently used are evicted)
+        answer_cache_ttl_hours: Lifetime of a cached answer (None: no expiry)
+        answer_bundle: Answer bundle (see answer_bundle.py) to preload the cache with
+        latency_targets: Modes and their latency targets for fanout requests
+    """
+    get_usage_tracker().reset()
+    rag = await initialize_lightrag(
+        working_dir,
+        llm_model,
+        embedding_model,
+        backend,
+        llm_max_async=max(4, concurrency),
+        embedding_backend=embedding_backend,
+    )
+    if not rag:
+        raise SystemExit("Failed to initialize LightRAG")
+
+    cache = None
+    if answer_cache:
+        cache = SemanticAnswerCache(
+            rag.embedding_func,
+            working_dir,
+            threshold=answer_cache_threshold,
+            max_entries=answer_cache_size,
+            ttl_seconds=answer_cache_ttl_hours * 3600 if answer_cache_ttl_hours else None,
+        )
+        if answer_bundle:
+            preload_answer_cache(cache, answer_bundle, working_dir)
+    query_server = QueryServer(
+        rag, concurrency, timeouts, answer_cache=cache, latency_targets=latency_targets
+    )
+    connections = set()
+
+    async def on_connection(reader, writer):
+        task = asyncio.current_task()
+        connections.add(task)
+        try:
+            await query_server.handle(reader, writer)
+        finally:
+            connections.discard(task)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        server = await asyncio.start_server(on_connection, host, port)
+    except OSError:
+        await finalize_lightrag(rag)
+        raise
+    logger.info(f"LightRAG query server listening on http://{host}:{port}")
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Shutting down: finishing in-flight queries")
+        query_server.stop()
+        server.close()
+        if connections:
+            _, pending = await asyncio.wait(set(connections), timeout=shutdown_grace)
+            for task in pending:
+                task.cancel()
+        usage_path = get_usage_tracker().write_summary(working_dir, "query-server")
+        logger.info(f"Gemini usage summary written to {usage_path}")
+        await finalize_lightrag(rag)
+        if cache is not None:
+            logger.info(f"Answer cache: {cache.summary()}")
+        logger.info(f"Stopped after {query_server.stats['queries']} queries")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve LightRAG queries over HTTP with warm storages",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--working_dir",
+        default="./data/lightrag_storage",
+        help="LightRAG working directory",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum queries answered at the same time",
+    )
+    parser.add_argument(
+        "--timeout",
+        action="append",
+        metavar="MODE=SECONDS",
+        help=f"Timeout of a query mode, repeatable (defaults: {DEFAULT_TIMEOUTS})",
+    )
+    parser.add_argument(
+        "--latency_target",
+        action="append",
+        metavar="MODE=SECONDS",
+        help="Mode for fanout requests and how long to wait for its answer, repeatable, "
+        f"most preferred mode first (default: {DEFAULT_LATENCY_TARGETS})",
+    )
+    parser.add_argument(
+        "--shutdown_grace",
+        type=float,
+        default=30.0,
+        help="Seconds in-flight queries get to finish on shutdown",
+    )
+    parser.add_argument(
+        "--no_answer_cache",
+        action="store_true",
+        help="Answer every query with LightRAG instead of reusing answers to similar queries",
+    )
+    parser.add_argument(
+        "--answer_cache_threshold",
+        type=float,
+        default=0.92,
+        help="Minimum cosine similarity between queries for a cached answer to be reused",
+    )
+    parser.add_argument(
+        "--answer_cache_size",
+        type=int,
+        default=1024,
+        help="Cached answers kept; least recently used ones are evicted",
+    )
+    parser.add_argument(
+        "--answer_cache_ttl_hours",
+        type=float,
+        default=24,
+        help="Lifetime of a cached answer (0: no expiry)",
+    )
+    parser.add_argument(
+        "--answer_bundle",
+        help="Answer bundle written by query_lightrag.py --bundle_file to preload the answer cache with",
+    )
+    parser.add_argument(
+        "--llm_model",
+        default="gemini-2.0-flash-exp",
+        help="Gemini model for text generation",
+    )
+    parser.add_argument(
+        "--embedding_model",
+        help="Embedding model (default: the one the knowledge graph was built with)",
+    )
+    parser.add_argument(
+        "--embedding_backend",
+        choices=["gemini", "local"],
+        help="Embedding backend (default: the one the knowledge graph was built with)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["google", "fake"],
+        help="Gemini backend; 'fake' runs offline with simulated latency (default: GEMINI_BACKEND or google)",
+    )
+
+    args = parser.parse_args()
+    try:
+        timeouts = parse_mode_seconds(args.timeout, SERVER_MODES)
+        latency_targets = parse_mode_seconds(args.latency_target) or None
+    except ValueError as e:
+        parser.error(str(e))
+
+    asyncio.run(
+        serve(
+            working_dir=args.working_dir,
+            host=args.host,
+            port=args.port,
+            concurrency=args.concurrency,
+            timeouts=timeouts,
+            shutdown_grace=args.shutdown_grace,
+            llm_model=args.llm_model,
+            backend=args.backend,
+            embedding_backend=args.embedding_backend,
+            embedding_model=args.embedding_model,
+            answer_cache=not args.no_answer_cache,
+            answer_cache_threshold=args.answer_cache_threshold,
+            answer_cache_size=args.answer_cache_size,
+            answer_cache_ttl_hours=args.answer_cache_ttl_hours,
+            answer_bundle=args.answer_bundle,
+            latency_targets=latency_targets,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
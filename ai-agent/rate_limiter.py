@@ -0,0 +1,184 @@
+"""
+Rate Limiter - Adaptive throttling and retries for Gemini API calls
+
+Combines three mechanisms shared by every call to the same model:
+- Token buckets for requests per minute (RPM) and tokens per minute (TPM)
+- An AIMD concurrency limit: grows by ~1 per window of successful calls,
+  halves when the API pushes back (429 / 5xx), at most once per window
+- Exponential backoff with full jitter on retryable errors
+"""
+
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Return True for rate-limit, transient server and timeout errors"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if code in RETRYABLE_STATUS_CODES:
+        return True
+    message = str(error)
+    return "RESOURCE_EXHAUSTED" in message or "UNAVAILABLE" in message
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for TPM budgeting (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute: float):
+        """
+        Args:
+            per_minute: Tokens added per minute; also the bucket's capacity
+        """
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1):
+        """Wait until `amount` tokens are available and take them"""
+        amount = min(amount, self.capacity)
+        # Waiters queue on the lock, so the bucket is served in FIFO order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class AdaptiveRateLimiter:
+    """RPM/TPM token buckets plus an AIMD concurrency limit with retries"""
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        """
+        Initialize the limiter
+
+        Args:
+            rpm: Requests per minute quota (None: unlimited)
+            tpm: Tokens per minute quota (None: unlimited)
+            initial_concurrency: Starting number of calls allowed in flight
+            min_concurrency: Lower bound for the concurrency limit
+            max_concurrency: Upper bound for the concurrency limit
+            max_retries: Retries per call before the error is raised
+            base_delay: Backoff delay before the first retry, in seconds
+            max_delay: Upper bound for a single backoff delay, in seconds
+        """
+        self.request_bucket = TokenBucket(rpm) if rpm else None
+        self.token_bucket = TokenBucket(tpm) if tpm else None
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self.retries = 0
+        self.throttled = 0
+        # Bumped by every decrease; calls remember the generation they started in
+        self._generation = 0
+        self._condition = asyncio.Condition()
+
+    async def _acquire_slot(self) -> int:
+        """Wait for a free slot; returns the current limit generation"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            return self._generation
+
+    async def _release_slot(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _on_success(self):
+        # Additive increase: about +1 per `limit` successful calls
+        self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+    def _on_throttle(self, generation: int):
+        self.throttled += 1
+        # Multiplicative decrease, once per window: calls that started before
+        # the last decrease were sent at the old limit, and their 429s are
+        # the same burst, not fresh evidence of overload
+        if generation == self._generation:
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            self._generation += 1
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[T]],
+        tokens: int = 0,
+        on_retry: Optional[Callable[[Exception], None]] = None,
+    ) -> T:
+        """
+        Run an API call under the rate limits, retrying retryable errors
+
+        Args:
+            func: Zero-argument coroutine function performing one API call
+            tokens: Estimated tokens consumed by the call (for the TPM bucket)
+            on_retry: Called with the error before each retry
+
+        Returns:
+            The call's result
+        """
+        attempt = 0
+        while True:
+            if self.request_bucket is not None:
+                await self.request_bucket.acquire(1)
+            if self.token_bucket is not None and tokens:
+                await self.token_bucket.acquire(tokens)
+
+            generation = await self._acquire_slot()
+            try:
+                result = await func()
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= self.max_retries:
+                    raise
+                self._on_throttle(generation)
+                # Full jitter: sleep uniformly in [0, base * 2^attempt]
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                self.retries += 1
+                if on_retry is not None:
+                    on_retry(e)
+                logger.warning(
+                    f"Retryable Gemini error ({e}); retry {attempt}/{self.max_retries} "
+                    f"in {delay:.1f}s, concurrency limit now {int(self.limit)}"
+                )
+            else:
+                self._on_success()
+                return result
+            finally:
+                await self._release_slot()
+
+            await asyncio.sleep(delay)
@@ -0,0 +1,73 @@
+"""
+Single Flight - Coalesce concurrent identical async calls into one
+
+While a call for a key is in flight, later callers with the same key wait
+for its result instead of starting their own call.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by request identity"""
+
+    def __init__(self):
+        self._futures: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    def join(self, key: str) -> Optional[asyncio.Future]:
+        """
+        Return the future of an in-flight call for key, if any
+
+        Joining counts as a coalesced (duplicate) call.
+        """
+        future = self._futures.get(key)
+        if future is not None:
+            self.coalesced += 1
+        return future
+
+    def lead(self, key: str) -> asyncio.Future:
+        """Register the caller as the one making the call for key"""
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        return future
+
+    def resolve(self, key: str, result: Any = None, error: Optional[BaseException] = None):
+        """Publish the leader's result (or error) to every waiter and unregister key"""
+        future = self._futures.pop(key, None)
+        if future is None or future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+            # Mark the exception as retrieved in case nobody joined
+            future.exception()
+        else:
+            future.set_result(result)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func for key, or wait for the identical call already in flight
+
+        Args:
+            key: Request identity
+            func: Zero-argument coroutine function making the call
+
+        Returns:
+            The (shared) result of the call
+        """
+        future = self.join(key)
+        if future is not None:
+            # Shield so one waiter's cancellation doesn't cancel the shared result
+            return await asyncio.shield(future)
+
+        self.lead(key)
+        try:
+            result = await func()
+        except BaseException as e:
+            self.resolve(key, error=e)
+            raise
+        self.resolve(key, result)
+        return result
@@ -0,0 +1,251 @@
+"""
+Source Manifest - Which LightRAG documents each source produced
+
+Maps every document source (a local file's relative path, or
+"github:owner/repo/path") to the IDs of the documents in the LightRAG storage
+that came from it. Document IDs hash the source and its content (see
+make_document_id), so a changed file produces a new ID, which LightRAG 1.5
+refuses while the old document holds the file name. Sync mode compares the
+manifest with the current sources and deletes documents whose source
+vanished or changed, before their replacements are inserted, so the storage
+follows the corpus without a full rebuild.
+"""
+
+import os
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ingest_journal import DELETED, get_document_statuses
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "source_manifest.json"
+
+GITHUB_PREFIX = "github:"
+
+
+def github_repo_of(file_path: str) -> str:
+    """Repository of a GitHub document path ("github:owner/repo/file.md" -> "owner/repo")"""
+    return "/".join(file_path[len(GITHUB_PREFIX):].split("/")[:2])
+
+
+def stored_file_name(file_path: str) -> str:
+    """
+    Name LightRAG stores and deduplicates a document's file path under
+
+    LightRAG 1.5 keeps only the base name ("notes/resume.md" -> "resume.md")
+    and refuses a new document whose name another document already holds.
+    Earlier versions store the path as given.
+    """
+    try:
+        from lightrag.utils_pipeline import normalize_document_file_path
+    except ImportError:
+        return file_path
+    return normalize_document_file_path(file_path)
+
+
+async def find_stored_document(rag: Any, file_path: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Find the document LightRAG stores under a file path's name
+
+    Args:
+        rag: Initialized LightRAG instance
+        file_path: Source path of a document about to be inserted
+
+    Returns:
+        (document ID, status) of the holder of the name, or None if it is
+        free (always None before LightRAG 1.5, which has no filename dedup)
+    """
+    if not hasattr(rag.doc_status, "get_doc_by_file_basename"):
+        return None
+    found = await rag.doc_status.get_doc_by_file_basename(stored_file_name(file_path))
+    if not found:
+        return None
+    doc_id = found[0]
+    record = (await get_document_statuses(rag, [doc_id])).get(doc_id)
+    return doc_id, record["status"] if record else None
+
+
+def save_source_manifest(working_dir: str, manifest: Dict[str, List[str]]):
+    """Write the manifest atomically"""
+    path = os.path.join(working_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({file_path: sorted(ids) for file_path, ids in sorted(manifest.items())}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def load_source_manifest(working_dir: str, rag: Any = None) -> Dict[str, List[str]]:
+    """
+    Read the manifest of a LightRAG working directory
+
+    Storages built before the manifest existed are bootstrapped from the
+    file paths in LightRAG's document status store.
+
+    Args:
+        working_dir: LightRAG working directory
+        rag: Initialized LightRAG instance, used for bootstrapping
+
+    Returns:
+        Document IDs per source file path
+    """
+    path = os.path.join(working_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    manifest: Dict[str, List[str]] = {}
+    if rag is not None:
+        from lightrag.base import DocStatus
+
+        statuses = [DocStatus.PROCESSED, DocStatus.FAILED]
+        if hasattr(rag.doc_status, "get_docs_by_statuses"):
+            docs = await rag.doc_status.get_docs_by_statuses(statuses)
+        else:
+            # LightRAG before 1.5 queries one status at a time
+            docs = {}
+            for status in statuses:
+                docs.update(await rag.doc_status.get_docs_by_status(status))
+        for doc_id, doc in docs.items():
+            file_path = getattr(doc, "file_path", None)
+            if file_path is None and isinstance(doc, dict):
+                file_path = doc.get("file_path")
+            if file_path:
+                manifest.setdefault(file_path, []).append(doc_id)
+        if manifest:
+            logger.info(f"Built source manifest for {len(manifest)} sources from LightRAG document status")
+    return manifest
+
+
+def merge_source_manifest(
+    manifest: Dict[str, List[str]], documents: Dict[str, str]
+) -> Dict[str, List[str]]:
+    """
+    Add the documents of an ingestion run to the manifest
+
+    Args:
+        manifest: Document IDs per source file path
+        documents: Document ID per source file path inserted by the run
+
+    Returns:
+        Updated manifest (earlier IDs are kept: a run without sync deletes nothing)
+    """
+    merged = {file_path: list(ids) for file_path, ids in manifest.items()}
+    for file_path, doc_id in documents.items():
+        ids = merged.setdefault(file_path, [])
+        if doc_id not in ids:
+            ids.append(doc_id)
+    return merged
+
+
+def plan_sync(
+    manifest: Dict[str, List[str]],
+    documents: Dict[str, str],
+    local_files: Iterable[str],
+    github_repos: Iterable[str],
+    enable_github: bool,
+    completed: Set[str],
+) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """
+    Decide which documents of the manifest to delete
+
+    A document is stale when its source was removed, or when its source now
+    produces a different document listed in completed. The caller lists the
+    new versions that completed insertion, and the ones deferred until their
+    old version is deleted (LightRAG 1.5 keeps one document per file name).
+    Documents of sources that were listed but produced nothing (a parse
+    error, a failed GitHub fetch) are kept, so a transient failure never
+    empties the graph. Without enable_github, GitHub documents are out of
+    scope and kept.
+
+    Args:
+        manifest: Document IDs per source file path
+        documents: Current document ID per source file path
+        local_files: Relative paths of the local source files
+        github_repos: GitHub repositories being ingested
+        enable_github: Whether GitHub sources are part of this run
+        completed: IDs of the new documents that replace their source's old ones
+
+    Returns:
+        (stale document ID -> source file path, manifest after deletion)
+    """
+    local_files = set(local_files)
+    github_repos = set(github_repos) if enable_github else set()
+    fetched_repos = {
+        github_repo_of(file_path) for file_path in documents if file_path.startswith(GITHUB_PREFIX)
+    }
+
+    stale: Dict[str, str] = {}
+    synced: Dict[str, List[str]] = {}
+    for file_path, ids in manifest.items():
+        current_id = documents.get(file_path)
+        if file_path.startswith(GITHUB_PREFIX):
+            repo = github_repo_of(file_path)
+            removed = enable_github and (
+                repo not in github_repos or (repo in fetched_repos and current_id is None)
+            )
+        else:
+            removed = file_path not in local_files
+
+        if removed:
+            stale.update({doc_id: file_path for doc_id in ids})
+        elif current_id is not None and current_id in completed:
+            stale.update({doc_id: file_path for doc_id in ids if doc_id != current_id})
+            synced[file_path] = [current_id]
+        else:
+            is_github = file_path.startswith(GITHUB_PREFIX)
+            if current_id is None and (enable_github or not is_github):
+                logger.warning(f"{file_path} produced no document this run; keeping its stored version")
+            # A failed new version is in the storage too, and retried next run
+            synced[file_path] = list(ids) + [
+                doc_id for doc_id in [current_id] if doc_id is not None and doc_id not in ids
+            ]
+
+    # Sources new since the last run
+    for file_path, doc_id in documents.items():
+        if file_path not in manifest:
+            synced[file_path] = [doc_id]
+    return stale, synced
+
+
+async def delete_documents(
+    rag: Any, stale: Dict[str, str], journal: Any = None
+) -> Tuple[int, Dict[str, List[str]]]:
+    """
+    Delete documents with their chunks, entities and relations from LightRAG
+
+    Entities and relations shared with other documents are rebuilt by
+    LightRAG from the remaining chunks. Deletions run one at a time, as each
+    rewrites the graph.
+
+    Args:
+        rag: Initialized LightRAG instance
+        stale: Document ID -> source file path (see plan_sync)
+        journal: Optional IngestJournal each deletion is recorded in, so a
+            deleted document is no longer listed as completed
+
+    Returns:
+        (number deleted, IDs per source whose deletion failed)
+    """
+    deleted = 0
+    failed: Dict[str, List[str]] = {}
+    for doc_id, file_path in stale.items():
+        try:
+            result = await rag.adelete_by_doc_id(doc_id)
+            status = getattr(result, "status", "success")
+            message = getattr(result, "message", status)
+        except Exception as e:
+            status, message = "fail", e
+        # "not_found": already gone, e.g. deleted by an interrupted sync. Any
+        # other status ("fail", "not_allowed" while a pipeline is busy, ...)
+        # leaves the document in place, to be retried by the next sync
+        if status not in ("success", "not_found"):
+            logger.error(f"Error deleting {doc_id} ({file_path}): {message}")
+            failed.setdefault(file_path, []).append(doc_id)
+            continue
+        deleted += status == "success"
+        if journal is not None:
+            journal.record({"id": doc_id, "file_path": file_path}, DELETED)
+        logger.info(f"Deleted {doc_id} ({file_path})")
+    return deleted, failed
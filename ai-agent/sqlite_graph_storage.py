@@ -0,0 +1,418 @@
+"""
+SQLite Graph Storage - Embedded knowledge graph backend for LightRAG
+
+LightRAG's default NetworkXStorage parses the whole GraphML file into memory
+at startup and rewrites it on every flush, so cold start and per-document
+flush time grow with the graph. SQLiteGraphStorage keeps the graph in one
+SQLite file per namespace (graph_<namespace>.sqlite) with a node table and an
+edge table indexed on both endpoints: opening it reads nothing, node and
+neighbor lookups are indexed queries, and a flush commits only the changed
+rows.
+
+Edges are undirected like NetworkX's, stored once with their endpoints in
+sorted order. Node and edge attributes are JSON objects and upserts merge
+into them, as graph.add_node / add_edge do.
+
+Imported by LightRAG through its storage registry; see
+lightrag_storage.register_storages. Intended for the single-process
+ingestion and query scripts: uncommitted writes are visible to this
+process only, like an unflushed NetworkX graph.
+"""
+
+import os
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, final
+
+from lightrag.base import BaseGraphStorage
+from lightrag.types import KnowledgeGraph, KnowledgeGraphEdge, KnowledgeGraphNode
+from lightrag.utils import logger
+
+# Stay well below SQLite's bound-parameter limit
+_MAX_PARAMS = 500
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS nodes (id TEXT PRIMARY KEY, data TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS edges ("
+    "source TEXT NOT NULL, target TEXT NOT NULL, data TEXT NOT NULL, "
+    "PRIMARY KEY (source, target))",
+    "CREATE INDEX IF NOT EXISTS edges_target ON edges (target)",
+)
+
+# Degree of every node with edges; a self-loop counts twice, as in NetworkX
+_DEGREES = (
+    "SELECT id, COUNT(*) AS degree FROM "
+    "(SELECT source AS id FROM edges UNION ALL SELECT target FROM edges) GROUP BY id"
+)
+
+
+def _chunked(items: List[Any], size: int = _MAX_PARAMS) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _edge_key(source: str, target: str) -> Tuple[str, str]:
+    """Undirected edge as stored: endpoints in sorted order"""
+    return (source, target) if source <= target else (target, source)
+
+
+@final
+@dataclass
+class SQLiteGraphStorage(BaseGraphStorage):
+    """LightRAG graph storage backed by one SQLite file per namespace"""
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        if self.workspace:
+            workspace_dir = os.path.join(working_dir, self.workspace)
+        else:
+            workspace_dir = working_dir
+            self.workspace = ""
+        os.makedirs(workspace_dir, exist_ok=True)
+        self._file_name = os.path.join(workspace_dir, f"graph_{self.namespace}.sqlite")
+        self._db: Optional[sqlite3.Connection] = None
+
+    async def initialize(self):
+        if self._db is not None:
+            return
+        self._db = sqlite3.connect(self._file_name)
+        # WAL: commits append to a log instead of rewriting pages
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        nodes = self._db.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+        edges = self._db.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+        logger.info(
+            f"[{self.workspace}] SQLite graph opened {self.namespace} with {nodes} nodes, {edges} edges"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise RuntimeError(f"SQLiteGraphStorage {self.namespace} used before initialize()")
+        return self._db
+
+    def _select_in(self, query: str, values: Iterable[Any]) -> List[tuple]:
+        """Rows of query, whose "{}" is filled with placeholders for values, in chunks"""
+        rows: List[tuple] = []
+        db = self._connection()
+        for chunk in _chunked(list(values)):
+            rows.extend(db.execute(query.format(",".join("?" * len(chunk))), chunk).fetchall())
+        return rows
+
+    def _nodes(self, node_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        rows = self._select_in("SELECT id, data FROM nodes WHERE id IN ({})", node_ids)
+        return {id: json.loads(data) for id, data in rows}
+
+    def _degrees(self, node_ids: Iterable[str]) -> Dict[str, int]:
+        node_ids = list(node_ids)
+        degrees = dict.fromkeys(node_ids, 0)
+        for column in ("source", "target"):
+            rows = self._select_in(
+                f"SELECT {column}, COUNT(*) FROM edges WHERE {column} IN ({{}}) GROUP BY {column}",
+                node_ids,
+            )
+            for id, count in rows:
+                degrees[id] += count
+        return degrees
+
+    def _edges_of(self, node_ids: Iterable[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """(node, neighbor) pairs per node"""
+        node_ids = list(node_ids)
+        edges: Dict[str, List[Tuple[str, str]]] = {id: [] for id in node_ids}
+        for source, target in self._select_in(
+            "SELECT source, target FROM edges WHERE source IN ({})", node_ids
+        ):
+            edges[source].append((source, target))
+        for source, target in self._select_in(
+            "SELECT source, target FROM edges WHERE target IN ({}) AND source != target", node_ids
+        ):
+            edges[target].append((target, source))
+        return edges
+
+    def _write_nodes(self, nodes: List[Tuple[str, Dict[str, Any]]]):
+        """Merge attributes into nodes, creating the missing ones"""
+        existing = self._nodes({node_id for node_id, _ in nodes})
+        for node_id, node_data in nodes:
+            existing[node_id] = {**existing.get(node_id, {}), **node_data}
+        self._connection().executemany(
+            "INSERT OR REPLACE INTO nodes (id, data) VALUES (?, ?)",
+            [(id, json.dumps(data, ensure_ascii=False)) for id, data in existing.items()],
+        )
+
+    def _write_edges(self, edges: List[Tuple[str, str, Dict[str, Any]]]):
+        """Merge attributes into edges, creating missing edges and endpoints"""
+        db = self._connection()
+        db.executemany(
+            "INSERT OR IGNORE INTO nodes (id, data) VALUES (?, '{}')",
+            [(id,) for source, target, _ in edges for id in (source, target)],
+        )
+        merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for source, target, edge_data in edges:
+            key = _edge_key(source, target)
+            if key not in merged:
+                row = db.execute(
+                    "SELECT data FROM edges WHERE source = ? AND target = ?", key
+                ).fetchone()
+                merged[key] = json.loads(row[0]) if row else {}
+            merged[key].update(edge_data)
+        db.executemany(
+            "INSERT OR REPLACE INTO edges (source, target, data) VALUES (?, ?, ?)",
+            [(*key, json.dumps(data, ensure_ascii=False)) for key, data in merged.items()],
+        )
+
+    async def has_node(self, node_id: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM nodes WHERE id = ?", (node_id,)).fetchone()
+        return row is not None
+
+    async def has_nodes_batch(self, node_ids: List[str]) -> Set[str]:
+        return {row[0] for row in self._select_in("SELECT id FROM nodes WHERE id IN ({})", node_ids)}
+
+    async def has_edge(self, source_node_id: str, target_node_id: str) -> bool:
+        return await self.get_edge(source_node_id, target_node_id) is not None
+
+    async def node_degree(self, node_id: str) -> int:
+        return self._degrees([node_id])[node_id]
+
+    async def node_degrees_batch(self, node_ids: List[str]) -> Dict[str, int]:
+        return self._degrees(node_ids)
+
+    async def edge_degree(self, src_id: str, tgt_id: str) -> int:
+        degrees = self._degrees([src_id, tgt_id])
+        return degrees[src_id] + degrees[tgt_id]
+
+    async def edge_degrees_batch(
+        self, edge_pairs: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], int]:
+        degrees = self._degrees({id for pair in edge_pairs for id in pair})
+        return {(src, tgt): degrees[src] + degrees[tgt] for src, tgt in edge_pairs}
+
+    async def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        return self._nodes([node_id]).get(node_id)
+
+    async def get_nodes_batch(self, node_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return self._nodes(node_ids)
+
+    async def get_edge(self, source_node_id: str, target_node_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM edges WHERE source = ? AND target = ?",
+            _edge_key(source_node_id, target_node_id),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def get_edges_batch(self, pairs: List[Dict[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        edges = {}
+        for pair in pairs:
+            edge = await self.get_edge(pair["src"], pair["tgt"])
+            if edge is not None:
+                edges[(pair["src"], pair["tgt"])] = edge
+        return edges
+
+    async def get_node_edges(self, source_node_id: str) -> Optional[List[Tuple[str, str]]]:
+        if not await self.has_node(source_node_id):
+            return None
+        return self._edges_of([source_node_id])[source_node_id]
+
+    async def get_nodes_edges_batch(self, node_ids: List[str]) -> Dict[str, List[Tuple[str, str]]]:
+        return self._edges_of(node_ids)
+
+    async def upsert_node(self, node_id: str, node_data: Dict[str, Any]) -> None:
+        """Insert a node or merge attributes into it; committed by the next index_done_callback"""
+        self._write_nodes([(node_id, node_data)])
+
+    async def upsert_nodes_batch(self, nodes: List[Tuple[str, Dict[str, Any]]]) -> None:
+        self._write_nodes(nodes)
+
+    async def upsert_edge(
+        self, source_node_id: str, target_node_id: str, edge_data: Dict[str, Any]
+    ) -> None:
+        """Insert an edge or merge attributes into it; missing endpoints are created empty"""
+        self._write_edges([(source_node_id, target_node_id, edge_data)])
+
+    async def upsert_edges_batch(self, edges: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        self._write_edges(edges)
+
+    async def delete_node(self, node_id: str) -> None:
+        if not await self.has_node(node_id):
+            logger.warning(f"[{self.workspace}] Node {node_id} not found in the graph for deletion")
+            return
+        await self.remove_nodes([node_id])
+
+    async def remove_nodes(self, nodes: List[str]):
+        """Delete nodes with their edges"""
+        db = self._connection()
+        params = [(id,) for id in nodes]
+        db.executemany("DELETE FROM edges WHERE source = ?", params)
+        db.executemany("DELETE FROM edges WHERE target = ?", params)
+        db.executemany("DELETE FROM nodes WHERE id = ?", params)
+
+    async def remove_edges(self, edges: List[Tuple[str, str]]):
+        self._connection().executemany(
+            "DELETE FROM edges WHERE source = ? AND target = ?",
+            [_edge_key(source, target) for source, target in edges],
+        )
+
+    async def get_all_labels(self) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT id FROM nodes ORDER BY id")]
+
+    def _ranked_labels(self, limit: int) -> List[str]:
+        """Node IDs by degree, highest first, ties on the ID (BINARY collation: code point order)"""
+        return [
+            row[0]
+            for row in self._connection().execute(
+                f"SELECT nodes.id FROM nodes LEFT JOIN ({_DEGREES}) AS d ON d.id = nodes.id "
+                "ORDER BY COALESCE(d.degree, 0) DESC, nodes.id LIMIT ?",
+                (limit,),
+            )
+        ]
+
+    async def get_popular_labels(self, limit: int = 300) -> List[str]:
+        return self._ranked_labels(limit)
+
+    async def search_labels(self, query: str, limit: int = 50) -> List[str]:
+        """Labels containing query, scored like NetworkXStorage.search_labels"""
+        query_lower = query.lower().strip()
+        if not query_lower:
+            return []
+        matches = []
+        for (label,) in self._connection().execute("SELECT id FROM nodes"):
+            label_lower = label.lower()
+            if query_lower not in label_lower:
+                continue
+            if label_lower == query_lower:
+                score = 1000
+            elif label_lower.startswith(query_lower):
+                score = 500
+            else:
+                score = 100 - len(label)
+                if f" {query_lower}" in label_lower or f"_{query_lower}" in label_lower:
+                    score += 50
+            matches.append((label, score))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return [label for label, _ in matches[:limit]]
+
+    def _bfs(self, start: str, max_depth: int, max_nodes: int) -> Tuple[List[str], bool]:
+        """
+        Nodes within max_depth of start, each level in degree order
+
+        Returns:
+            (node IDs, whether max_nodes cut off nodes that were reachable)
+        """
+        visited: Set[str] = set()
+        nodes: List[str] = []
+        level = [start]
+        for depth in range(max_depth + 1):
+            degrees = self._degrees(level)
+            for node_id in sorted(level, key=lambda id: (-degrees[id], id)):
+                if len(nodes) >= max_nodes:
+                    return nodes, True
+                visited.add(node_id)
+                nodes.append(node_id)
+            neighbors = {
+                neighbor
+                for edges in self._edges_of(level).values()
+                for _, neighbor in edges
+                if neighbor not in visited
+            }
+            if not neighbors:
+                break
+            # Full with more reachable, even past max_depth: truncated, as in NetworkXStorage
+            if len(nodes) >= max_nodes:
+                return nodes, True
+            if depth == max_depth:
+                logger.info(
+                    f"[{self.workspace}] Graph truncated: found {len(nodes)} nodes within max_depth {max_depth}"
+                )
+            level = list(neighbors)
+        return nodes, False
+
+    async def get_knowledge_graph(
+        self, node_label: str, max_depth: int = 3, max_nodes: int = None
+    ) -> KnowledgeGraph:
+        """
+        Subgraph around node_label ("*": the highest-degree nodes)
+
+        Args:
+            node_label: Label of the starting node, or "*" for the whole graph
+            max_depth: Maximum BFS depth from the starting node
+            max_nodes: Maximum nodes to return (capped by max_graph_nodes)
+
+        Returns:
+            KnowledgeGraph, with is_truncated set when max_nodes cut it off
+        """
+        graph_limit = self.global_config.get("max_graph_nodes", 1000)
+        max_nodes = graph_limit if max_nodes is None else min(max_nodes, graph_limit)
+
+        result = KnowledgeGraph()
+        if node_label == "*":
+            node_ids = self._ranked_labels(max_nodes + 1)
+            result.is_truncated = len(node_ids) > max_nodes
+            node_ids = node_ids[:max_nodes]
+        else:
+            if not await self.has_node(node_label):
+                logger.warning(f"[{self.workspace}] Node {node_label} not found in the graph")
+                return result
+            node_ids, result.is_truncated = self._bfs(node_label, max_depth, max_nodes)
+        if result.is_truncated:
+            logger.info(f"[{self.workspace}] Graph truncated: max_nodes limit {max_nodes} reached")
+
+        selected = set(node_ids)
+        for node_id, data in self._nodes(node_ids).items():
+            result.nodes.append(KnowledgeGraphNode(id=node_id, labels=[node_id], properties=data))
+        for source, target, data in self._select_in(
+            "SELECT source, target, data FROM edges WHERE source IN ({})", node_ids
+        ):
+            if target in selected:
+                result.edges.append(
+                    KnowledgeGraphEdge(
+                        id=f"{source}-{target}",
+                        type="DIRECTED",
+                        source=source,
+                        target=target,
+                        properties=json.loads(data),
+                    )
+                )
+        logger.info(
+            f"[{self.workspace}] Subgraph query successful | Node count: {len(result.nodes)} | "
+            f"Edge count: {len(result.edges)}"
+        )
+        return result
+
+    async def get_all_nodes(self) -> List[Dict[str, Any]]:
+        return [
+            {**json.loads(data), "id": id}
+            for id, data in self._connection().execute("SELECT id, data FROM nodes")
+        ]
+
+    async def get_all_edges(self) -> List[Dict[str, Any]]:
+        return [
+            {**json.loads(data), "source": source, "target": target}
+            for source, target, data in self._connection().execute("SELECT source, target, data FROM edges")
+        ]
+
+    async def index_done_callback(self) -> None:
+        """Commit the writes since the last flush"""
+        db = self._connection()
+        if db.in_transaction:
+            db.commit()
+
+    async def drop(self) -> Dict[str, str]:
+        try:
+            db = self._connection()
+            db.execute("DELETE FROM edges")
+            db.execute("DELETE FROM nodes")
+            db.commit()
+            logger.info(f"[{self.workspace}] Process {os.getpid()} drop {self.namespace}")
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def finalize(self):
+        """Commit pending writes and close the file"""
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
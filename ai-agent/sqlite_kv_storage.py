@@ -0,0 +1,170 @@
+"""
+SQLite KV Storage - Embedded key-value storage backend for LightRAG
+
+LightRAG's default JsonKVStorage keeps every namespace (documents, chunks,
+entity/relation indexes, LLM response cache) in memory and rewrites the
+whole JSON file on every flush, so startup and per-document flush time grow
+with the size of the graph. SQLiteKVStorage keeps one SQLite file per
+namespace (kv_store_<namespace>.sqlite): reads are indexed point lookups,
+writes accumulate in a transaction, and a flush is a commit of just the
+changed rows.
+
+Imported by LightRAG through its storage registry; see
+lightrag_storage.register_storages. Intended for the single-process
+ingestion and query scripts: uncommitted writes are visible to this
+process only, like unflushed JsonKVStorage data.
+"""
+
+import os
+import json
+import time
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Iterable, Iterator, List, Optional, final
+
+from lightrag.base import BaseKVStorage
+from lightrag.utils import logger
+
+# Stay well below SQLite's bound-parameter limit
+_MAX_PARAMS = 500
+
+
+def _chunked(items: List[str], size: int = _MAX_PARAMS) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@final
+@dataclass
+class SQLiteKVStorage(BaseKVStorage):
+    """LightRAG KV storage backed by one SQLite file per namespace"""
+
+    supports_strict_point_reads: ClassVar[bool] = True
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        if self.workspace:
+            workspace_dir = os.path.join(working_dir, self.workspace)
+        else:
+            workspace_dir = working_dir
+            self.workspace = ""
+        os.makedirs(workspace_dir, exist_ok=True)
+        self._file_name = os.path.join(workspace_dir, f"kv_store_{self.namespace}.sqlite")
+        self._db: Optional[sqlite3.Connection] = None
+
+    async def initialize(self):
+        if self._db is not None:
+            return
+        self._db = sqlite3.connect(self._file_name)
+        # WAL: commits append to a log instead of rewriting pages
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS kv (id TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+        count = self._db.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+        logger.info(f"[{self.workspace}] SQLite KV opened {self.namespace} with {count} records")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise RuntimeError(f"SQLiteKVStorage {self.namespace} used before initialize()")
+        return self._db
+
+    @staticmethod
+    def _decode(id: str, value: str) -> Dict[str, Any]:
+        record = json.loads(value)
+        # Same defaults JsonKVStorage adds for records written by older versions
+        record.setdefault("create_time", 0)
+        record.setdefault("update_time", 0)
+        record["_id"] = id
+        return record
+
+    def _fetch(self, ids: Iterable[str]) -> Dict[str, str]:
+        """Raw JSON values of the ids that exist"""
+        rows: Dict[str, str] = {}
+        db = self._connection()
+        for chunk in _chunked(list(ids)):
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(
+                db.execute(f"SELECT id, value FROM kv WHERE id IN ({placeholders})", chunk).fetchall()
+            )
+        return rows
+
+    async def get_by_id(self, id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT value FROM kv WHERE id = ?", (id,)).fetchone()
+        return self._decode(id, row[0]) if row else None
+
+    async def get_by_id_strict(self, id: str) -> Optional[Dict[str, Any]]:
+        """A miss is a confirmed absence: the file is local and read synchronously"""
+        return await self.get_by_id(id)
+
+    async def get_by_ids(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        rows = self._fetch(ids)
+        return [self._decode(id, rows[id]) if id in rows else None for id in ids]
+
+    async def filter_keys(self, keys: set) -> set:
+        return set(keys) - set(self._fetch(keys))
+
+    async def upsert(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Insert or replace records; they are committed by the next index_done_callback
+
+        Stamps create_time/update_time and _id exactly like JsonKVStorage.
+        """
+        if not data:
+            return
+        current_time = int(time.time())
+        existing = set(self._fetch(data))
+        for k, v in data.items():
+            if self.namespace.endswith("text_chunks") and "llm_cache_list" not in v:
+                v["llm_cache_list"] = []
+            if k in existing:
+                v["update_time"] = current_time
+            else:
+                v["create_time"] = current_time
+                v["update_time"] = current_time
+            v["_id"] = k
+        self.load_records(data)
+
+    def load_records(self, data: Dict[str, Dict[str, Any]]):
+        """Write records as given, without timestamps (used by storage migration)"""
+        self._connection().executemany(
+            "INSERT OR REPLACE INTO kv (id, value) VALUES (?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False)) for k, v in data.items()],
+        )
+
+    async def get_all(self) -> Dict[str, Dict[str, Any]]:
+        """Every record, keyed by id"""
+        return {
+            id: self._decode(id, value)
+            for id, value in self._connection().execute("SELECT id, value FROM kv")
+        }
+
+    async def delete(self, ids: List[str]) -> None:
+        self._connection().executemany("DELETE FROM kv WHERE id = ?", [(id,) for id in ids])
+
+    async def is_empty(self) -> bool:
+        return self._connection().execute("SELECT 1 FROM kv LIMIT 1").fetchone() is None
+
+    async def index_done_callback(self) -> None:
+        """Commit the writes since the last flush"""
+        db = self._connection()
+        if db.in_transaction:
+            db.commit()
+
+    async def drop(self) -> Dict[str, str]:
+        try:
+            db = self._connection()
+            db.execute("DELETE FROM kv")
+            db.commit()
+            logger.info(f"[{self.workspace}] Process {os.getpid()} drop {self.namespace}")
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"[{self.workspace}] Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def finalize(self):
+        """Commit pending writes (e.g. LLM cache entries) and close the file"""
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
@@ -0,0 +1,157 @@
+"""
+Test script for the semantic answer cache with a deterministic bag-of-words embedding
+"""
+
+import os
+import sys
+import asyncio
+import hashlib
+import logging
+import tempfile
+
+import numpy as np
+from lightrag.prompt import PROMPTS
+
+from answer_cache import SemanticAnswerCache
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+async def embed(texts):
+    """Sum of one random vector per word, so queries sharing words are similar"""
+    vectors = np.zeros((len(texts), 64), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.split():
+            seed = int.from_bytes(hashlib.sha256(word.encode("utf-8")).digest()[:4], "little")
+            vectors[row] += np.random.default_rng(seed).standard_normal(64)
+    return vectors
+
+
+def make_result(query, answer, status="success"):
+    return {"status": status, "query": query, "mode": "hybrid", "result": answer, "top_k": 10}
+
+
+async def ask(cache, query, answer=None, mode="hybrid", top_k=10, status="success"):
+    """Look a query up and, on a miss with an answer, store it"""
+    lookup = await cache.lookup(query, mode, top_k)
+    if lookup.result is None and answer is not None:
+        cache.store(query, mode, top_k, make_result(query, answer, status), lookup.vector)
+    return lookup
+
+
+def test_lookup_and_store():
+    """Rephrased queries hit; other modes, errors and the no-context reply do not"""
+
+    print("\n=== Testing Answer Cache Lookups ===\n")
+
+    async def run():
+        cache = SemanticAnswerCache(embed, threshold=0.75)
+        await ask(cache, "What projects has Kyle built with LightRAG?", "Portfolio Chat.")
+
+        exact = await ask(cache, "what projects has kyle built with lightrag")
+        assert exact.result is not None and exact.similarity == 1.0, "Expected an exact hit"
+        similar = await ask(cache, "Which projects has Kyle built with LightRAG?")
+        print(f"  Rephrased query similarity: {similar.similarity:.3f}")
+        assert similar.result is not None and similar.similarity < 1.0, "Expected a semantic hit"
+        assert (await ask(cache, "What projects has Kyle built with LightRAG?", mode="local")).result is None
+        assert (await ask(cache, "Where did Kyle study?")).result is None
+
+        # Neither is an answer: replaying them would hide what the graph knows later
+        await ask(cache, "Does Kyle know Rust?", PROMPTS["fail_response"])
+        await ask(cache, "What is Kyle's favorite color?", "", status="success")
+        await ask(cache, "Who is Kyle?", "Quota exceeded", status="error")
+        assert len(cache) == 1, f"Expected only the real answer to be cached, found {len(cache)}"
+        assert (await ask(cache, "Does Kyle know Rust?")).result is None
+
+        print(f"  Stats: {cache.summary()}")
+        assert cache.stats["hits"] == 2
+
+    asyncio.run(run())
+
+    print("\n✓ Only real answers were cached and reused!")
+
+
+def test_eviction_and_invalidation():
+    """Least recently used entries go first; a changed graph drops everything"""
+
+    print("\n=== Testing Answer Cache Eviction ===\n")
+
+    async def run():
+        with tempfile.TemporaryDirectory() as working_dir:
+            status_path = os.path.join(working_dir, "kv_store_doc_status.json")
+            with open(status_path, "w", encoding="utf-8") as f:
+                f.write("{}")
+            cache = SemanticAnswerCache(embed, working_dir=working_dir, max_entries=2)
+
+            await ask(cache, "first question", "one")
+            await ask(cache, "second question", "two")
+            await ask(cache, "first question")
+            await ask(cache, "third question", "three")
+            assert (await ask(cache, "second question")).result is None, "Expected the LRU entry evicted"
+            assert (await ask(cache, "first question")).result is not None
+            assert cache.stats["evictions"] == 1
+
+            # An ingestion rewrites the document status store
+            with open(status_path, "w", encoding="utf-8") as f:
+                f.write('{"doc-1": {}}')
+            assert (await ask(cache, "first question")).result is None, "Expected the cache dropped"
+            assert len(cache) == 0 and cache.stats["invalidations"] == 1
+
+    asyncio.run(run())
+
+    print("\n✓ Cache evicted and invalidated as expected!")
+
+
+def test_concurrent_identical_queries():
+    """Identical queries in flight share the first one's answer instead of all missing"""
+
+    print("\n=== Testing Concurrent Identical Queries ===\n")
+
+    async def run():
+        cache = SemanticAnswerCache(embed)
+        calls = []
+
+        async def answer(query, mode="hybrid"):
+            async def call():
+                lookup = await cache.lookup(query, mode, 10)
+                if lookup.result is not None:
+                    return lookup.result
+                calls.append(query)
+                await asyncio.sleep(0.05)
+                result = make_result(query, f"Answer to {query}")
+                cache.store(query, mode, 10, result, lookup.vector)
+                return result
+
+            return await cache.coalesce(query, mode, 10, call)
+
+        queries = ["What projects?", "what projects", "What  projects!", "What projects?"]
+        results = await asyncio.gather(*(answer(q) for q in queries), answer("What projects?", "local"))
+        print(f"  Answered: {calls}")
+        assert calls == ["What projects?", "What projects?"], "Expected one answer per mode"
+        assert [result["query"] for result, _ in results] == queries + ["What projects?"]
+        assert [shared for _, shared in results] == [False, True, True, True, False]
+        assert all(result["result"] == "Answer to What projects?" for result, _ in results)
+        assert results[1][0]["cached_query"] == "What projects?"
+
+        print(f"  Stats: {cache.summary()}")
+        assert cache.stats["coalesced"] == 3 and cache.stats["hits"] == 3 and cache.stats["misses"] == 2
+
+        # Once answered, the same query is an ordinary hit
+        result, shared = await answer("what projects")
+        assert not shared and cache.stats["hits"] == 4 and len(calls) == 2
+
+    asyncio.run(run())
+
+    print("\n✓ Concurrent identical queries were answered once!")
+
+
+if __name__ == "__main__":
+    try:
+        test_lookup_and_store()
+        test_eviction_and_invalidation()
+        test_concurrent_identical_queries()
+    except AssertionError as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,108 @@
+"""
+Test script for the ingestion journal against a fake LightRAG document status store
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import tempfile
+from types import SimpleNamespace
+
+from ingest_journal import FAILED, PROCESSED, IngestJournal
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+class FakeDocStatus:
+    """Document status store holding a status record per document ID"""
+
+    def __init__(self, records):
+        self.records = records
+
+    async def get_by_ids(self, doc_ids):
+        return [self.records.get(doc_id) for doc_id in doc_ids]
+
+
+def make_rag(records):
+    return SimpleNamespace(doc_status=FakeDocStatus(records))
+
+
+def make_doc(doc_id):
+    return {"id": doc_id, "file_path": f"{doc_id}.md", "content": "text"}
+
+
+def test_checkpoint_and_resume():
+    """Outcomes are journaled once LightRAG has them and survive a reload"""
+
+    print("\n=== Testing Journal Checkpoints ===\n")
+
+    with tempfile.TemporaryDirectory() as working_dir:
+        records = {
+            "doc-a": {"status": PROCESSED},
+            "doc-b": {"status": FAILED, "error_msg": "extraction timed out"},
+            "doc-c": {"status": "pending"},
+        }
+        rag = make_rag(records)
+        journal = IngestJournal(working_dir)
+        docs = [make_doc(doc_id) for doc_id in ("doc-a", "doc-b", "doc-c", "doc-d")]
+
+        failed = asyncio.run(journal.checkpoint(rag, docs))
+        print(f"  After first checkpoint: completed={sorted(journal.completed)} failed={sorted(journal.failed)}")
+        assert failed == 1, f"Expected 1 failed document, got {failed}"
+        assert journal.completed == {"doc-a"}
+        assert journal.failed == {"doc-b"}
+        assert journal.entries["doc-b"]["error"] == "extraction timed out"
+
+        # doc-c finishes later; doc-d never reaches LightRAG
+        records["doc-c"] = {"status": PROCESSED}
+        failed = asyncio.run(journal.checkpoint(rag, final=True))
+        print(f"  After final checkpoint: completed={sorted(journal.completed)} failed={sorted(journal.failed)}")
+        assert failed == 1, f"Expected doc-d to fail the final checkpoint, got {failed}"
+        assert journal.completed == {"doc-a", "doc-c"}
+        assert journal.failed == {"doc-b", "doc-d"}
+
+        # A torn last line from a crash is skipped on load
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"id": "doc-e", "sta')
+        reloaded = IngestJournal(working_dir)
+        assert reloaded.completed == {"doc-a", "doc-c"}, "Reloaded journal lost completed documents"
+        assert reloaded.failed == {"doc-b", "doc-d"}, "Reloaded journal lost failed documents"
+        assert reloaded.is_completed("doc-a") and not reloaded.is_completed("doc-b")
+
+    print("\n✓ Journal recorded every outcome and resumed from disk!")
+
+
+def test_verify_and_reset():
+    """Completed entries the storage does not confirm are dropped; reset deletes the file"""
+
+    print("\n=== Testing Journal Verification ===\n")
+
+    with tempfile.TemporaryDirectory() as working_dir:
+        journal = IngestJournal(working_dir)
+        for doc_id in ("doc-a", "doc-b", "doc-c"):
+            journal.record(make_doc(doc_id), PROCESSED)
+
+        # The storage was rebuilt: doc-b is gone and doc-c failed there
+        rag = make_rag({"doc-a": {"status": PROCESSED}, "doc-c": {"status": FAILED}})
+        dropped = asyncio.run(journal.verify(rag))
+        print(f"  Dropped: {dropped}")
+        assert dropped == 2, f"Expected 2 unconfirmed entries, got {dropped}"
+        assert journal.completed == {"doc-a"}
+
+        journal.reset()
+        assert not os.path.exists(journal.path), "Reset should delete the journal file"
+        assert IngestJournal(working_dir).entries == {}
+
+    print("\n✓ Journal dropped unconfirmed entries and reset cleanly!")
+
+
+if __name__ == "__main__":
+    try:
+        test_checkpoint_and_resume()
+        test_verify_and_reset()
+    except AssertionError as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
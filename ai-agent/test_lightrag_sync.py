@@ -0,0 +1,120 @@
+"""
+Test script for re-ingesting changed sources into a real LightRAG storage with the fake Gemini backend
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import tempfile
+
+os.environ.setdefault("FAKE_GEMINI_LATENCY_MS", "0")
+
+from lightrag.kg.shared_storage import finalize_share_data
+
+from ingest_lightrag import run_lightrag_ingestion
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+ABOUT = "# About\n\nKyle builds retrieval systems with LightRAG and FAISS for his portfolio chat."
+ABOUT_EDITED = "# About\n\nKyle builds agents with LightRAG and Gemini, and evaluates them offline."
+SKILLS = "# Skills\n\nPython, Rust and distributed systems, with a focus on search infrastructure."
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def ingest(source_dir, output_dir, sync=False):
+    """One ingestion run, as if by a new process"""
+    try:
+        return asyncio.run(run_lightrag_ingestion(
+            source_dir,
+            output_dir,
+            backend="fake",
+            parse_cache_dir=None,
+            llm_cache_dir=None,
+            sync=sync,
+        ))
+    finally:
+        # LightRAG keeps storage data in process-wide shared dicts
+        finalize_share_data()
+
+
+def stored_documents(output_dir):
+    """Status and file name of every record in LightRAG's document status store"""
+    with open(os.path.join(output_dir, "kv_store_doc_status.json"), "r", encoding="utf-8") as f:
+        return {doc_id: (record["status"], record["file_path"]) for doc_id, record in json.load(f).items()}
+
+
+def read_manifest(output_dir):
+    with open(os.path.join(output_dir, "source_manifest.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_reingest_changed_source():
+    """A changed file without --sync keeps its old version; it is not a failed insertion"""
+
+    print("\n=== Testing Re-ingestion of a Changed File ===\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        source_dir, output_dir = os.path.join(root, "src"), os.path.join(root, "out")
+        write(os.path.join(source_dir, "about.md"), ABOUT)
+        assert ingest(source_dir, output_dir)["status"] == "success"
+        before = stored_documents(output_dir)
+
+        write(os.path.join(source_dir, "about.md"), ABOUT_EDITED)
+        result = ingest(source_dir, output_dir)
+        print(f"  Result: {result}")
+        assert result["status"] == "success", f"Expected success, got {result}"
+        assert result["failed_documents"] == 0 and result["name_conflicts"] == 1
+        assert stored_documents(output_dir) == before, "Expected the old version kept, and no duplicate record"
+
+    print("\n✓ Changed file was skipped with a warning, not failed!")
+
+
+def test_sync_replaces_changed_source():
+    """--sync deletes the old version of an edited file and a removed file, then inserts the new version"""
+
+    print("\n=== Testing Sync of Edited and Removed Files ===\n")
+
+    with tempfile.TemporaryDirectory() as root:
+        source_dir, output_dir = os.path.join(root, "src"), os.path.join(root, "out")
+        write(os.path.join(source_dir, "about.md"), ABOUT)
+        write(os.path.join(source_dir, "notes", "skills.md"), SKILLS)
+        assert ingest(source_dir, output_dir, sync=True)["status"] == "success"
+        assert len(stored_documents(output_dir)) == 2
+
+        write(os.path.join(source_dir, "about.md"), ABOUT_EDITED)
+        os.remove(os.path.join(source_dir, "notes", "skills.md"))
+        result = ingest(source_dir, output_dir, sync=True)
+        print(f"  Result: {result}")
+        assert result["status"] == "success", f"Expected success, got {result}"
+        assert result["deleted_documents"] == 2 and result["failed_documents"] == 0
+
+        stored = stored_documents(output_dir)
+        manifest = read_manifest(output_dir)
+        print(f"  Stored: {stored}")
+        assert list(manifest) == ["about.md"], f"Unexpected manifest: {manifest}"
+        assert stored == {manifest["about.md"][0]: ("processed", "about.md")}, "Expected only the new version"
+
+        # Nothing left to do: the new version is skipped, nothing deleted
+        result = ingest(source_dir, output_dir, sync=True)
+        assert result["skipped_documents"] == 1 and result["deleted_documents"] == 0
+        assert stored_documents(output_dir) == stored
+
+    print("\n✓ Sync replaced the edited file and removed the deleted one!")
+
+
+if __name__ == "__main__":
+    try:
+        test_reingest_changed_source()
+        test_sync_replaces_changed_source()
+    except AssertionError as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
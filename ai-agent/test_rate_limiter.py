@@ -0,0 +1,122 @@
+"""
+Test script for the adaptive rate limiter against a local fake server that returns 429s
+"""
+
+import json
+import asyncio
+import logging
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rate_limiter import AdaptiveRateLimiter
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 429 to every third request, 200 otherwise"""
+
+    request_count = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        with FlakyHandler.lock:
+            FlakyHandler.request_count += 1
+            throttle = FlakyHandler.request_count % 3 == 0
+
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = 429 if throttle else 200
+        body = json.dumps({"error": "RESOURCE_EXHAUSTED"} if throttle else {"text": "ok"})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def post(url: str) -> str:
+    """Blocking POST; urllib raises HTTPError (with .code) on 429"""
+    request = urllib.request.Request(url, data=b"{}", method="POST")
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["text"]
+
+
+def test_rate_limiter():
+    """Every call should eventually succeed despite injected 429s"""
+
+    print("\n=== Testing Adaptive Rate Limiter ===\n")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/generate"
+
+    limiter = AdaptiveRateLimiter(
+        rpm=600, initial_concurrency=8, base_delay=0.05, max_delay=0.5
+    )
+
+    async def run_calls():
+        return await asyncio.gather(
+            *(limiter.run(lambda: asyncio.to_thread(post, url), tokens=10) for _ in range(30))
+        )
+
+    try:
+        results = asyncio.run(run_calls())
+
+        print(f"  Server requests: {FlakyHandler.request_count}")
+        print(f"  Retries: {limiter.retries}")
+        print(f"  Final concurrency limit: {int(limiter.limit)}")
+
+        assert results == ["ok"] * 30, "Not every call succeeded"
+        assert limiter.retries > 0, "Expected retries on 429 responses"
+        assert limiter.limit < 8, "Expected the concurrency limit to back off"
+
+        print(f"\n✓ All {len(results)} calls succeeded through injected 429s!")
+
+    finally:
+        server.shutdown()
+
+
+def test_burst_halves_limit_once():
+    """A burst of 429s from calls sent at the same limit halves it only once"""
+
+    print("\n=== Testing Concurrency Backoff on a 429 Burst ===\n")
+
+    limiter = AdaptiveRateLimiter(initial_concurrency=8, base_delay=0.01, max_delay=0.01)
+    attempts = {}
+    # Limit after each throttled call; it recovers once the retries succeed
+    limits = []
+
+    async def call(index: int) -> int:
+        attempts[index] = attempts.get(index, 0) + 1
+        # Hold every first attempt until all 8 are in flight, then throttle them all
+        if attempts[index] == 1:
+            await asyncio.sleep(0.05)
+            raise ConnectionError("RESOURCE_EXHAUSTED")
+        return index
+
+    async def run_calls():
+        return await asyncio.gather(
+            *(limiter.run(lambda i=i: call(i), on_retry=lambda e: limits.append(limiter.limit))
+            for i in range(8))
+        )
+
+    results = asyncio.run(run_calls())
+
+    print(f"  Throttled calls: {limiter.throttled}")
+    print(f"  Lowest concurrency limit: {min(limits):g}")
+
+    assert results == list(range(8)), "Not every call succeeded"
+    assert limiter.throttled == 8, "Expected all 8 first attempts to be throttled"
+    assert min(limits) == 4, f"Expected one halving from 8, got down to {min(limits):g}"
+
+    print("\n✓ One burst of 429s halved the concurrency limit once!")
+
+
+if __name__ == "__main__":
+    test_rate_limiter()
+    test_burst_halves_limit_once()
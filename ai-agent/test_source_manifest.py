@@ -0,0 +1,144 @@
+"""
+Test script for sync planning and stale-document deletion against a fake LightRAG
+"""
+
+import sys
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from source_manifest import delete_documents, plan_sync
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+MANIFEST = {
+    "resume.pdf": ["doc-resume-v1"],
+    "old-notes.md": ["doc-notes"],
+    "essay.md": ["doc-essay-v1"],
+    "blog.md": ["doc-blog"],
+    "github:kyle/app/README.md": ["doc-app-readme"],
+    "github:kyle/app/GONE.md": ["doc-app-gone"],
+    "github:kyle/dropped/README.md": ["doc-dropped"],
+}
+
+
+def test_plan_sync():
+    """Removed and replaced documents are stale; failed and unparsed sources keep theirs"""
+
+    print("\n=== Testing Sync Planning ===\n")
+
+    documents = {
+        # Changed, new version completed
+        "resume.pdf": "doc-resume-v2",
+        # Changed, new version failed
+        "essay.md": "doc-essay-v2",
+        # blog.md is listed but produced nothing (parse error)
+        "github:kyle/app/README.md": "doc-app-readme",
+        "new.md": "doc-new",
+    }
+    stale, synced = plan_sync(
+        MANIFEST,
+        documents,
+        local_files=["resume.pdf", "essay.md", "blog.md", "new.md"],
+        github_repos=["kyle/app"],
+        enable_github=True,
+        completed={"doc-resume-v2", "doc-app-readme", "doc-new"},
+    )
+
+    print(f"  Stale: {sorted(stale)}")
+
+    assert stale == {
+        "doc-resume-v1": "resume.pdf",
+        "doc-notes": "old-notes.md",
+        "doc-app-gone": "github:kyle/app/GONE.md",
+        "doc-dropped": "github:kyle/dropped/README.md",
+    }, f"Unexpected stale documents: {stale}"
+    assert synced == {
+        "resume.pdf": ["doc-resume-v2"],
+        "essay.md": ["doc-essay-v1", "doc-essay-v2"],
+        "blog.md": ["doc-blog"],
+        "github:kyle/app/README.md": ["doc-app-readme"],
+        "new.md": ["doc-new"],
+    }, f"Unexpected manifest after sync: {synced}"
+
+    print("\n✓ Sync plan deletes only removed sources and completed replacements!")
+
+
+def test_plan_sync_without_github():
+    """GitHub documents are out of scope, not removed, when GitHub is disabled"""
+
+    print("\n=== Testing Sync Planning Without GitHub ===\n")
+
+    stale, synced = plan_sync(
+        MANIFEST,
+        {},
+        local_files=["resume.pdf", "old-notes.md", "essay.md", "blog.md"],
+        github_repos=[],
+        enable_github=False,
+        completed=set(),
+    )
+
+    assert stale == {}, f"Unexpected stale documents: {stale}"
+    assert synced == MANIFEST, f"Unexpected manifest after sync: {synced}"
+
+    print("\n✓ Nothing was deleted without GitHub in scope!")
+
+
+class FakeRAG:
+    """Answers adelete_by_doc_id with a fixed status (or error) per document ID"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.calls = []
+
+    async def adelete_by_doc_id(self, doc_id):
+        self.calls.append(doc_id)
+        outcome = self.outcomes[doc_id]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(status=outcome, message=f"{outcome} for {doc_id}")
+
+
+def test_delete_documents():
+    """Only "success" counts as deleted; anything but "success"/"not_found" is retried"""
+
+    print("\n=== Testing Stale Document Deletion ===\n")
+
+    rag = FakeRAG({
+        "doc-a": "success",
+        "doc-b": "not_found",
+        "doc-c": "not_allowed",
+        "doc-d": "fail",
+        "doc-e": RuntimeError("graph storage unavailable"),
+        "doc-f": "success",
+    })
+    stale = {
+        "doc-a": "a.md",
+        "doc-b": "b.md",
+        "doc-c": "c.md",
+        "doc-d": "d.md",
+        "doc-e": "d.md",
+        "doc-f": "f.md",
+    }
+    deleted, failed = asyncio.run(delete_documents(rag, stale))
+
+    print(f"  Deleted: {deleted}")
+    print(f"  Failed: {failed}")
+
+    assert rag.calls == list(stale), "Expected one deletion call per stale document"
+    assert deleted == 2, f"Expected 2 deletions, got {deleted}"
+    assert failed == {"c.md": ["doc-c"], "d.md": ["doc-d", "doc-e"]}, f"Unexpected failures: {failed}"
+
+    print("\n✓ Refused and failed deletions are kept for the next sync!")
+
+
+if __name__ == "__main__":
+    try:
+        test_plan_sync()
+        test_plan_sync_without_github()
+        test_delete_documents()
+    except AssertionError as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
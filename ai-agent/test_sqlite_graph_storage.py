@@ -0,0 +1,108 @@
+"""
+Test script for the SQLite graph backend against LightRAG's NetworkX graph storage
+"""
+
+import sys
+import random
+import asyncio
+import logging
+import tempfile
+
+from lightrag.kg.networkx_impl import NetworkXStorage
+from lightrag.kg.shared_storage import initialize_share_data
+
+from sqlite_graph_storage import SQLiteGraphStorage
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+NAMES = [f"Entity {i}" for i in range(60)]
+
+
+def open_storage(storage_class, working_dir):
+    return storage_class(
+        namespace="chunk_entity_relation",
+        workspace="",
+        global_config={"working_dir": working_dir, "max_graph_nodes": 1000},
+        embedding_func=None,
+    )
+
+
+async def fill(storage):
+    """The same random nodes, edges and deletions on every storage"""
+    rng = random.Random(7)
+    for name in NAMES[:50]:
+        await storage.upsert_node(name, {"entity_id": name, "description": f"about {name}"})
+    await storage.upsert_nodes_batch([(name, {"entity_type": "project"}) for name in NAMES[20:30]])
+    for _ in range(150):
+        # Endpoints past NAMES[:50] are created by the edge
+        await storage.upsert_edge(rng.choice(NAMES), rng.choice(NAMES), {"weight": rng.random()})
+    await storage.remove_edges([(rng.choice(NAMES), rng.choice(NAMES)) for _ in range(60)])
+    await storage.remove_nodes(NAMES[:3])
+    await storage.delete_node(NAMES[5])
+    await storage.index_done_callback()
+
+
+async def compare(expected, actual):
+    node_ids = sorted(node["id"] for node in await expected.get_all_nodes())
+    assert node_ids == sorted(node["id"] for node in await actual.get_all_nodes()), "Node sets differ"
+    assert len(await expected.get_all_edges()) == len(await actual.get_all_edges()), "Edge counts differ"
+
+    for node_id in node_ids:
+        assert await expected.get_node(node_id) == await actual.get_node(node_id), f"{node_id} differs"
+        assert await expected.node_degree(node_id) == await actual.node_degree(node_id), f"{node_id} degree differs"
+        assert sorted(await expected.get_node_edges(node_id)) == sorted(await actual.get_node_edges(node_id))
+    for source in node_ids[:15]:
+        for target in node_ids[:15]:
+            assert await expected.get_edge(source, target) == await actual.get_edge(source, target)
+    assert await actual.get_node_edges("Missing") is None
+
+    assert await expected.get_popular_labels(20) == await actual.get_popular_labels(20), "Popular labels differ"
+    assert await expected.search_labels("entity 1") == await actual.search_labels("entity 1"), "Search differs"
+
+    for label in ["*"] + node_ids[:10]:
+        for max_nodes in (1, 8, 1000):
+            wanted = await expected.get_knowledge_graph(label, max_depth=2, max_nodes=max_nodes)
+            got = await actual.get_knowledge_graph(label, max_depth=2, max_nodes=max_nodes)
+            assert {n.id for n in wanted.nodes} == {n.id for n in got.nodes}, f"Subgraph of {label} differs"
+            assert {e.id for e in wanted.edges} == {e.id for e in got.edges}, f"Subgraph of {label} differs"
+            assert wanted.is_truncated == got.is_truncated, f"Truncation of {label} differs"
+    return len(node_ids)
+
+
+def test_matches_networkx():
+    """Every graph operation LightRAG uses answers like NetworkXStorage, also after reopening"""
+
+    print("\n=== Testing SQLite Graph Storage ===\n")
+
+    initialize_share_data()
+
+    async def run():
+        with tempfile.TemporaryDirectory() as networkx_dir, tempfile.TemporaryDirectory() as sqlite_dir:
+            expected = open_storage(NetworkXStorage, networkx_dir)
+            actual = open_storage(SQLiteGraphStorage, sqlite_dir)
+            for storage in (expected, actual):
+                await storage.initialize()
+                await fill(storage)
+            count = await compare(expected, actual)
+            print(f"  {count} nodes match")
+
+            await actual.finalize()
+            reopened = open_storage(SQLiteGraphStorage, sqlite_dir)
+            await reopened.initialize()
+            await compare(expected, reopened)
+            await reopened.finalize()
+            print("  Reopened graph matches")
+
+    asyncio.run(run())
+
+    print("\n✓ SQLite graph matched NetworkX on every operation!")
+
+
+if __name__ == "__main__":
+    try:
+        test_matches_networkx()
+    except AssertionError as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
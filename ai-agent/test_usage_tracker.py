@@ -0,0 +1,56 @@
+"""
+Test script for LightRAG stage classification against the installed LightRAG prompt templates
+"""
+
+import sys
+import string
+import logging
+from collections import defaultdict
+
+from lightrag.prompt import PROMPTS
+
+from usage_tracker import lightrag_stage
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+SAMPLE_TEXT = "Kyle Zhang built Portfolio Chat with Next.js and LightRAG at Acme Corp."
+
+
+def render(name: str, **values) -> str:
+    """Fill a PROMPTS template, with placeholders not given rendered as "sample" """
+    fields = defaultdict(lambda: "sample", values)
+    return string.Formatter().vformat(PROMPTS[name], (), fields)
+
+
+def test_lightrag_stages():
+    """The user prompt of each LightRAG stage is attributed to that stage"""
+
+    print("\n=== Testing LightRAG Stage Classification ===\n")
+
+    prompts = {
+        "extraction": render("entity_extraction_user_prompt", input_text=SAMPLE_TEXT),
+        "gleaning": render("entity_continue_extraction_user_prompt"),
+        "summary": render("summarize_entity_descriptions", description_list='{"description": "A chat app."}'),
+        "keywords": render("keywords_extraction", query="What did Kyle build?"),
+        # The answer's instructions and context go in the system prompt; the user prompt is the query
+        "answer": "What projects were missed in the last release?",
+    }
+    if "entity_extraction_json_user_prompt" in PROMPTS:
+        prompts["extraction (json)"] = render("entity_extraction_json_user_prompt", input_text=SAMPLE_TEXT)
+
+    for expected, prompt in prompts.items():
+        stage = lightrag_stage(prompt)
+        print(f"  {expected}: {stage}")
+        assert stage == expected.split()[0], f"{expected} prompt classified as {stage}"
+
+    print("\n✓ Every LightRAG stage was classified correctly!")
+
+
+if __name__ == "__main__":
+    try:
+        test_lightrag_stages()
+    except AssertionError as e:
+        print(f"\n✗ Error: {e}")
+        sys.exit(1)
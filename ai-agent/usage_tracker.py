@@ -0,0 +1,221 @@
+"""
+Usage Tracker - Token and latency accounting for Gemini calls
+
+Every completion and embedding call is recorded with its token counts,
+latency, retries, the caller tag of the code that triggered it (e.g.
+"ingest" or "query:hybrid") and the LightRAG stage its prompt belongs to
+(entity extraction, gleaning, keyword extraction, summary, answer). At the end
+of a run the records are aggregated per caller and stage into p50/p95 latency
+and token totals, and written as JSON next to the LightRAG storage.
+"""
+
+import os
+import json
+import time
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+# Tag of the code path making Gemini calls; inherited by tasks it spawns
+_caller: contextvars.ContextVar[str] = contextvars.ContextVar("gemini_caller", default="other")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of values (0.0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def lightrag_stage(prompt: str) -> str:
+    """
+    Guess which LightRAG stage a completion prompt belongs to
+
+    Only the user prompt is looked at: GeminiLLM does not receive LightRAG's
+    system prompt, which is where newer releases put the record delimiters
+    and the answer instructions.
+
+    Args:
+        prompt: Completion prompt
+
+    Returns:
+        One of "keywords", "gleaning", "extraction", "summary" or "answer"
+    """
+    if "high_level_keywords" in prompt:
+        return "keywords"
+    lowered = prompt.lower()
+    # "Based on the last extraction task, ..." (older: "... were missed in the last extraction")
+    if "last extraction" in lowered:
+        return "gleaning"
+    if "comprehensive summary" in lowered or "description list" in lowered:
+        return "summary"
+    # Newer releases: "Extract entities and relationships from the `---Input Text---` section"
+    if "---Input Text---" in prompt or "extract entities and relationships" in lowered:
+        return "extraction"
+    # Older releases spell out the record delimiters in the prompt itself
+    if "entity" in lowered and "relationship" in lowered and ("<|>" in prompt or "<|#|>" in prompt):
+        return "extraction"
+    return "answer"
+
+
+@contextmanager
+def caller_tag(tag: str) -> Iterator[None]:
+    """Attribute Gemini calls made inside the block (and its tasks) to tag"""
+    token = _caller.set(tag)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+@dataclass
+class CallRecord:
+    """One Gemini call (or cache hit)"""
+
+    kind: str
+    model: str
+    caller: str
+    stage: str
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    latency_s: float = 0.0
+    retries: int = 0
+    cached: bool = False
+    error: bool = False
+
+    def count_retry(self, error: Optional[Exception] = None):
+        """Rate limiter on_retry callback"""
+        self.retries += 1
+
+    def set_usage(self, usage: Any):
+        """Copy token counts from a response's usage_metadata, if present"""
+        if usage is None:
+            return
+        self.prompt_tokens = getattr(usage, "prompt_token_count", None) or self.prompt_tokens
+        self.output_tokens = getattr(usage, "candidates_token_count", None) or 0
+        self.total_tokens = (
+            getattr(usage, "total_token_count", None) or self.prompt_tokens + self.output_tokens
+        )
+
+
+class UsageTracker:
+    """Collects CallRecords for one run and summarizes them"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Drop all records and restart the run clock"""
+        self.records: List[CallRecord] = []
+        self.started_at = time.time()
+
+    @contextmanager
+    def track(
+        self,
+        kind: str,
+        model: str,
+        stage: str,
+        prompt_tokens: int = 0,
+    ) -> Iterator[CallRecord]:
+        """
+        Time a call and record it when the block exits
+
+        Args:
+            kind: "completion" or "embedding"
+            model: Gemini model name
+            stage: LightRAG stage (see lightrag_stage)
+            prompt_tokens: Estimated input tokens, replaced by usage_metadata if set
+
+        Yields:
+            The CallRecord, for set_usage() and count_retry()
+        """
+        record = CallRecord(
+            kind=kind,
+            model=model,
+            caller=_caller.get(),
+            stage=stage,
+            prompt_tokens=prompt_tokens,
+            total_tokens=prompt_tokens,
+        )
+        start = time.perf_counter()
+        try:
+            yield record
+        except GeneratorExit:
+            # A stream closed early by its consumer is not a failed call
+            raise
+        except BaseException:
+            record.error = True
+            raise
+        finally:
+            record.latency_s = time.perf_counter() - start
+            self.records.append(record)
+
+    def record_cached(self, kind: str, model: str, stage: str):
+        """Record a call answered from the response cache"""
+        self.records.append(
+            CallRecord(kind=kind, model=model, caller=_caller.get(), stage=stage, cached=True)
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Aggregate the records per caller and stage
+
+        Returns:
+            Dictionary with run totals and a "by_stage" breakdown keyed by
+            "caller/kind/stage"; latency percentiles cover API calls only
+        """
+        groups: Dict[str, List[CallRecord]] = {}
+        for record in self.records:
+            groups.setdefault(f"{record.caller}/{record.kind}/{record.stage}", []).append(record)
+
+        def aggregate(records: List[CallRecord]) -> Dict[str, Any]:
+            latencies = [r.latency_s for r in records if not r.cached]
+            return {
+                "calls": len(records),
+                "cached": sum(r.cached for r in records),
+                "errors": sum(r.error for r in records),
+                "retries": sum(r.retries for r in records),
+                "prompt_tokens": sum(r.prompt_tokens for r in records),
+                "output_tokens": sum(r.output_tokens for r in records),
+                "total_tokens": sum(r.total_tokens for r in records),
+                "latency_p50_s": round(percentile(latencies, 0.5), 4),
+                "latency_p95_s": round(percentile(latencies, 0.95), 4),
+                "latency_total_s": round(sum(latencies), 4),
+            }
+
+        return {
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "duration_s": round(time.time() - self.started_at, 2),
+            "totals": aggregate(self.records),
+            "by_stage": {
+                key: aggregate(records) for key, records in sorted(groups.items())
+            },
+        }
+
+    def write_summary(self, output_dir: str, run_name: str, include_calls: bool = False) -> str:
+        """
+        Write the run summary to <output_dir>/usage/<run_name>-<timestamp>.json
+
+        Args:
+            output_dir: LightRAG working directory
+            run_name: Run label, e.g. "ingest" or "query"
+            include_calls: Also write every individual call record
+
+        Returns:
+            Path of the written file
+        """
+        usage_dir = os.path.join(output_dir, "usage")
+        os.makedirs(usage_dir, exist_ok=True)
+        timestamp = datetime.fromtimestamp(self.started_at).strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(usage_dir, f"{run_name}-{timestamp}.json")
+
+        data = {"run": run_name, **self.summary()}
+        if include_calls:
+            data["calls"] = [asdict(record) for record in self.records]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return path
@@ -5,6 +5,37 @@
 
 import fs from 'fs';
 import path from 'path';
+import crypto from 'crypto';
+import { GoogleGenerativeAI } from '@google/generative-ai';
+
+/**
+ * Normalize a query the way ai-agent/answer_cache.py normalize_query does
+ */
+function normalizeQuery(query) {
+  return query
+    .normalize('NFKC')
+    .toLowerCase()
+    .replace(/[^\p{L}\p{N}_\s]/gu, ' ')
+    .split(/\s+/)
+    .filter(Boolean)
+    .join(' ');
+}
+
+/**
+ * Version of a LightRAG working directory, as in ai-agent/answer_bundle.py
+ * storage_version: hash of the sorted IDs of its processed documents
+ */
+function storageVersion(workingDir) {
+  const statusPath = path.join(workingDir, 'kv_store_doc_status.json');
+  if (!fs.existsSync(statusPath)) {
+    return null;
+  }
+  const statuses = JSON.parse(fs.readFileSync(statusPath, 'utf-8'));
+  const processed = Object.keys(statuses)
+    .filter((id) => statuses[id] && statuses[id].status === 'processed')
+    .sort();
+  return crypto.createHash('sha256').update(processed.join('\n')).digest('hex').slice(0, 16);
+}
 
 /**
  * Portfolio RAG with support for multiple backends
@@ -16,8 +47,12 @@ class PortfolioRAG {
     this.backend = backend; // 'faiss' or 'lightrag'
     this.metadata = null;
     this.lightragResults = null;
+    this.answerBundle = null;
     this.indexLoaded = false;
     this.baseDir = path.join(process.cwd(), 'ai-agent', 'data');
+    // ai-agent/query_server.py, for queries without a pre-computed result
+    this.lightragServerUrl = process.env.LIGHTRAG_SERVER_URL || null;
+    this.lightragServerTimeoutMs = Number(process.env.LIGHTRAG_SERVER_TIMEOUT_MS) || 30000;
   }
 
   /**
@@ -44,10 +79,130 @@ class PortfolioRAG {
     }
   }
 
+  /**
+   * Load the answer bundle written by query_lightrag.py --bundle_file
+   * A bundle computed from an older knowledge graph than the local one is ignored
+   */
+  loadAnswerBundle() {
+    try {
+      const bundlePath = path.join(this.baseDir, 'lightrag_answers.json');
+      if (!fs.existsSync(bundlePath)) {
+        return false;
+      }
+
+      const bundle = JSON.parse(fs.readFileSync(bundlePath, 'utf-8'));
+      if (bundle.format !== 1) {
+        console.warn(`Unsupported LightRAG answer bundle format ${bundle.format}`);
+        return false;
+      }
+      const currentVersion = storageVersion(path.join(this.baseDir, 'lightrag_storage'));
+      if (currentVersion && bundle.storage_version && currentVersion !== bundle.storage_version) {
+        console.warn('LightRAG answer bundle is older than the knowledge graph; re-run query_lightrag.py --bundle_file');
+        return false;
+      }
+
+      // Flat index: one int8-quantized unit vector per entry, row-major
+      const raw = Buffer.from(bundle.vectors, 'base64');
+      const vectors = new Int8Array(raw.buffer, raw.byteOffset, raw.length);
+      const dim = bundle.embedding.dim;
+      const norms = new Float32Array(bundle.entries.length);
+      for (let i = 0; i < bundle.entries.length; i++) {
+        let sum = 0;
+        for (let j = i * dim; j < (i + 1) * dim; j++) {
+          sum += vectors[j] * vectors[j];
+        }
+        norms[i] = Math.sqrt(sum) || 1;
+      }
+
+      this.answerBundle = {
+        entries: bundle.entries,
+        embedding: bundle.embedding,
+        threshold: bundle.threshold,
+        vectors,
+        norms,
+        exact: new Map(bundle.entries.map((entry, i) => [entry.normalized, i])),
+      };
+      console.log(`Loaded LightRAG answer bundle with ${bundle.entries.length} answers`);
+      return true;
+    } catch (error) {
+      console.error('Error loading LightRAG answer bundle:', error);
+      return false;
+    }
+  }
+
+  /**
+   * Embed a query with the bundle's Gemini embedding model, or return null
+   */
+  async embedQuery(query) {
+    const { backend, model, dim, task_type: taskType } = this.answerBundle.embedding;
+    // Local sentence-transformers bundles can only be matched exactly here
+    if (backend !== 'gemini' || !process.env.GOOGLE_API_KEY) {
+      return null;
+    }
+    try {
+      const genAI = new GoogleGenerativeAI(process.env.GOOGLE_API_KEY);
+      const response = await genAI.getGenerativeModel({ model }).embedContent({
+        content: { role: 'user', parts: [{ text: query }] },
+        taskType,
+      });
+      // Truncated (Matryoshka) bundles keep the leading dimensions
+      return Float32Array.from(response.embedding.values.slice(0, dim));
+    } catch (error) {
+      console.error('Error embedding query for the answer bundle:', error);
+      return null;
+    }
+  }
+
+  /**
+   * Find the pre-computed answer whose question is closest to the query
+   */
+  async searchAnswerBundle(query) {
+    const bundle = this.answerBundle;
+    const normalized = normalizeQuery(query);
+
+    if (bundle.exact.has(normalized)) {
+      const entry = bundle.entries[bundle.exact.get(normalized)];
+      return [{ text: entry.result, score: 1.0, source: 'lightrag' }];
+    }
+
+    const vector = await this.embedQuery(normalized);
+    if (!vector) {
+      return [];
+    }
+    let queryNorm = 0;
+    for (let j = 0; j < vector.length; j++) {
+      queryNorm += vector[j] * vector[j];
+    }
+    queryNorm = Math.sqrt(queryNorm) || 1;
+
+    const { dim } = bundle.embedding;
+    const { vectors, norms } = bundle;
+    let best = -1;
+    let bestScore = -Infinity;
+    for (let i = 0; i < norms.length; i++) {
+      let dot = 0;
+      const offset = i * dim;
+      for (let j = 0; j < dim; j++) {
+        dot += vectors[offset + j] * vector[j];
+      }
+      const score = dot / (norms[i] * queryNorm);
+      if (score > bestScore) {
+        best = i;
+        bestScore = score;
+      }
+    }
+
+    if (best >= 0 && bestScore >= bundle.threshold) {
+      return [{ text: bundle.entries[best].result, score: bestScore, source: 'lightrag' }];
+    }
+    return [];
+  }
+
   /**
    * Load LightRAG results (from pre-computed queries)
    */
   async loadLightRAGResults() {
+    this.loadAnswerBundle();
     try {
       const resultsPath = path.join(this.baseDir, 'lightrag_results.json');
 
@@ -133,12 +288,41 @@ class PortfolioRAG {
     return topChunks;
   }
 
+  /**
+   * Query the LightRAG query server (ai-agent/query_server.py)
+   */
+  async queryLightRAGServer(query, topK = 5) {
+    try {
+      const response = await fetch(`${this.lightragServerUrl}/query`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ query, mode: 'hybrid', top_k: topK }),
+        signal: AbortSignal.timeout(this.lightragServerTimeoutMs),
+      });
+      const result = await response.json();
+      if (result.status === 'success') {
+        return [{ text: result.result, score: 1.0, source: 'lightrag' }];
+      }
+      console.warn(`LightRAG server query failed: ${result.error}`);
+    } catch (error) {
+      console.error('Error querying LightRAG server:', error);
+    }
+    return [];
+  }
+
   /**
    * Search using LightRAG backend
-   * Note: For server-side rendering, we use pre-computed results
-   * For dynamic querying, you'd need to call the Python script via child_process
+   * The answer bundle and pre-computed results are used first; other queries
+   * go to the LightRAG query server when LIGHTRAG_SERVER_URL is set
    */
   async searchLightRAG(query, topK = 5) {
+    if (this.answerBundle) {
+      const answer = await this.searchAnswerBundle(query);
+      if (answer.length > 0) {
+        return answer;
+      }
+    }
+
     // If we have pre-computed results, return them
     if (this.lightragResults) {
       // Check if results is a single query result or array
@@ -155,10 +339,15 @@ class PortfolioRAG {
       }
     }
 
-    // If no pre-computed results, return empty (would need to spawn Python process)
+    if (this.lightragServerUrl) {
+      return await this.queryLightRAGServer(query, topK);
+    }
+
+    // Without a server, only pre-computed results can be returned
     console.warn(
       'LightRAG: No pre-computed results found. ' +
-      'Run query_lightrag.py with your query to generate results.'
+      'Run query_lightrag.py with your query to generate results, ' +
+      'or start query_server.py and set LIGHTRAG_SERVER_URL.'
     );
     return [];
   }